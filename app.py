@@ -6,18 +6,49 @@
 # 5. Enhanced opportunity queries to support calendar display
 # 6. Added date filtering and formatting utilities
 
-from flask import Flask, render_template, send_from_directory, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, \
+    has_app_context, has_request_context, Response, send_file, abort
+from werkzeug.security import safe_join
+from markupsafe import Markup
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
 import os
-from flask_login import LoginManager, login_user, login_required, logout_user, current_user, UserMixin
+from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 import sqlite3
 import json
+import re
+import csv
+import io
+import threading
+import tempfile
+import zlib
+import gzip
+import hashlib
+import hmac
+import mimetypes
+import time
+import functools
+import itertools
+import heapq
+import smtplib
+from email.message import EmailMessage
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import base64
+import random
+import bisect
+from contextlib import closing
 from datetime import datetime, timedelta
 import calendar
+import math
 from werkzeug.utils import secure_filename
 import uuid
-from PIL import Image
+import click
+from flask.cli import AppGroup
+from PIL import Image, ImageOps
 
-app = Flask(__name__)
+# The built-in static route is replaced by static_files() below
+app = Flask(__name__, static_folder=None)
 app.secret_key = 'your-secret-key-change-this-in-production'
 
 # Configure template and static folders
@@ -39,144 +70,647 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
 
+def day_after(date_string):
+    """Return the ISO date following a YYYY-MM-DD string, for exclusive upper bounds.
+
+    Timestamps are stored as ISO strings, so `column < day_after(end)` matches
+    everything on the end date without wrapping the column in DATE().
+    """
+    try:
+        return (datetime.strptime(date_string, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    except ValueError:
+        return date_string
+
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def resize_image(image_path, max_size=(300, 300)):
-    """Resize image to maximum dimensions while maintaining aspect ratio"""
-    try:
-        with Image.open(image_path) as img:
-            # Convert RGBA to RGB if necessary
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-
-            # Resize image
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            img.save(image_path, 'JPEG', quality=85, optimize=True)
-            return True
-    except Exception as e:
-        print(f"Error resizing image: {e}")
-        return False
+# Profile pictures are stored as square-bounded variants named <stem>_<size>.<format>.
+# The contact row keeps the URL of the detail-size JPEG, templates ask for other sizes
+# with profile_picture_url().
+PROFILE_PICTURE_SIZES = {'avatar': 48, 'card': 150, 'detail': 300}
+PROFILE_PICTURE_FORMATS = {'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+                           'webp': ('WEBP', {'quality': 80, 'method': 4})}
+PROFILE_PICTURE_VARIANT = re.compile(r'^(?P<stem>.+)_(?P<size>\d+)\.(?P<format>jpg|webp)$')
+
+
+def create_image_variants(source_path, folder, stem):
+    """Write every size and format of a profile picture, returning the file names.
+
+    Runs in the image worker pool, so it only takes and returns picklable values.
+    """
+    with Image.open(source_path) as img:
+        img = ImageOps.exif_transpose(img)
+        # Convert RGBA to RGB if necessary
+        if img.mode in ('RGBA', 'LA', 'P'):
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        filenames = []
+        # Largest first, so each smaller size is resampled from the previous one
+        for size in sorted(PROFILE_PICTURE_SIZES.values(), reverse=True):
+            img.thumbnail((size, size), Image.Resampling.LANCZOS)
+            for extension, (image_format, options) in PROFILE_PICTURE_FORMATS.items():
+                filename = f"{stem}_{size}.{extension}"
+                img.save(os.path.join(folder, filename), image_format, **options)
+                filenames.append(filename)
+        return filenames
+
+
+def profile_picture_url(url, size='detail', extension='jpg'):
+    """Return the URL of a profile picture variant, or the URL itself for older uploads"""
+    if not url:
+        return url
+    folder, _, filename = url.rpartition('/')
+    match = PROFILE_PICTURE_VARIANT.match(filename)
+    if not match:
+        return url
+    return f"{folder}/{match['stem']}_{PROFILE_PICTURE_SIZES[size]}.{extension}"
+
+
+def profile_picture_style(url, size='detail'):
+    """CSS background-image for a profile picture, preferring WebP where the browser supports it"""
+    jpeg_url = profile_picture_url(url, size)
+    style = f"background-image: url('{jpeg_url}');"
+    webp_url = profile_picture_url(url, size, 'webp')
+    if webp_url != jpeg_url:
+        style += (f" background-image: image-set(url('{webp_url}') type('image/webp'), "
+                  f"url('{jpeg_url}') type('image/jpeg'));")
+    return style
+
+
+app.jinja_env.globals.update(profile_picture_url=profile_picture_url, profile_picture_style=profile_picture_style)
+
+
+def remove_profile_picture_files(url):
+    """Delete a stored profile picture and all of its variants"""
+    if not url:
+        return
+    paths = {os.path.join('static', url.replace('/static/', '', 1).lstrip('/'))}
+    for size in PROFILE_PICTURE_SIZES:
+        for extension in PROFILE_PICTURE_FORMATS:
+            paths.add(os.path.join('static', profile_picture_url(url, size, extension).replace('/static/', '', 1)))
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # File might be in use or already deleted
 
 
 # --- Database Setup ---
 DATABASE = 'bluefin.db'
 
+app.config['DATABASE'] = DATABASE
+# Pragmas applied to every new connection. WAL lets readers run alongside a writer,
+# busy_timeout makes writers wait for the lock instead of failing immediately.
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': 5000,  # milliseconds
+    'cache_size': -16000,  # negative values are KiB, so ~16MB
+    'mmap_size': 64 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
 
-def get_db():
-    conn = sqlite3.connect(DATABASE)
+
+# Rows are read from metered cursors in batches of this many when iterated, so the
+# timing happens once per batch rather than once per row
+METERED_FETCH_SIZE = 256
+
+
+class MeteredCursor(sqlite3.Cursor):
+    """Cursor that times its statement at the execute and fetch calls, so queries whose
+    rows are produced lazily while they are read are not under-counted"""
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._statement = None  # the connection's key for the statement being read
+
+    def _timed(self, run):
+        if self._statement is None:
+            return run()
+        started = time.perf_counter()
+        try:
+            return run()
+        finally:
+            self.connection._add_time(self._statement, time.perf_counter() - started)
+
+    def _start(self, run, sql, parameters):
+        self._finish()
+        if not self.connection.metered:
+            return run()
+        self._statement = self.connection._begin_statement(sql, parameters)
+        try:
+            self._timed(run)
+        finally:
+            if self.description is None:
+                self._finish()  # failed, or has no rows to read
+        return self
+
+    def _finish(self):
+        if self._statement is not None:
+            self.connection._finish_statement(self._statement)
+            self._statement = None
+
+    def execute(self, sql, parameters=()):
+        return self._start(lambda: super(MeteredCursor, self).execute(sql, parameters), sql, parameters)
+
+    def executemany(self, sql, parameters):
+        # The parameters may be a generator, so there is no row to explain the statement with
+        return self._start(lambda: super(MeteredCursor, self).executemany(sql, parameters), sql, None)
+
+    def executescript(self, sql_script):
+        return self._start(lambda: super(MeteredCursor, self).executescript(sql_script), sql_script, None)
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(lambda: super(MeteredCursor, self).fetchmany(size))
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        if self._statement is None:
+            return super().__iter__()
+        return self._iter_rows()
+
+    def _iter_rows(self):
+        while True:
+            rows = self.fetchmany(METERED_FETCH_SIZE)
+            yield from rows
+            if len(rows) < METERED_FETCH_SIZE:
+                return
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class MeteredConnection(sqlite3.Connection):
+    """Connection that counts its statements and the time spent running them, including
+    reading their rows, and reports them to the slow-query log when it is enabled"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metered = False
+        self.query_count = 0
+        self.query_time = 0.0
+        # Statements whose rows may still be read: key -> [sql, parameters, endpoint, elapsed]
+        self._statements = {}
+
+    def start_metering(self):
+        """Start counting statements, once the connection's own setup is done"""
+        self.metered = True
+
+    def _begin_statement(self, sql, parameters):
+        self.query_count += 1
+        endpoint = request.endpoint if has_request_context() else None
+        self._statements[self.query_count] = [sql, parameters, endpoint, 0.0]
+        return self.query_count
+
+    def _add_time(self, key, elapsed):
+        self.query_time += elapsed
+        statement = self._statements.get(key)
+        if statement is not None:
+            statement[3] += elapsed
+
+    def _finish_statement(self, key):
+        statement = self._statements.pop(key, None)
+        if statement is not None and app.config['SLOW_QUERY_THRESHOLD_MS'] is not None:
+            observe_query(self, *statement)
+
+    def finish_statements(self):
+        """Report the statements whose cursors were dropped before their last row was read"""
+        for key in list(self._statements):
+            self._finish_statement(key)
+
+    def cursor(self, factory=MeteredCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def close(self):
+        self.finish_statements()
+        super().close()
+
+
+def connect_db(factory=sqlite3.Connection):
+    """Open a new connection to the database with the configured pragmas applied"""
+    conn = sqlite3.connect(app.config['DATABASE'], factory=factory)
     conn.row_factory = sqlite3.Row
+    for pragma, value in app.config['SQLITE_PRAGMAS'].items():
+        conn.execute(f'PRAGMA {pragma} = {value}')
     return conn
 
 
-def init_db():
-    with get_db() as db:
-        db.execute('''CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            name TEXT NOT NULL
-        )''')
+def get_db():
+    """Return the connection for the current request, opening it on first use.
+
+    Outside of an app context (startup code, scripts) a new connection is returned
+    and the caller is responsible for closing it.
+    """
+    if not has_app_context():
+        return connect_db()
+    if 'db' not in g:
+        g.db = connect_db(MeteredConnection)
+        g.db.start_metering()
+    return g.db
+
+
+@app.teardown_appcontext
+def close_db(exception=None):
+    db = g.pop('db', None)
+    if db is not None:
+        db.close()
+
+
+# --- Request Metrics ---
+# Every request records its latency, status, response size and the SQL statements it
+# ran on the request connection, in memory, per endpoint. /metrics serves the totals in
+# Prometheus text format. Each worker process keeps its own numbers. Scrapers send
+# METRICS_TOKEN as a bearer token; without one configured only local requests are served.
+app.config['METRICS_TOKEN'] = None
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Bucket counts plus sum and count, like a Prometheus histogram"""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.9g}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+request_metrics = {}  # (endpoint, method) -> per-route totals
+request_metrics_lock = threading.Lock()
+
+
+def route_metrics(endpoint, method):
+    metrics = request_metrics.get((endpoint, method))
+    if metrics is None:
+        metrics = request_metrics.setdefault((endpoint, method), {
+            'latency': Histogram(LATENCY_BUCKETS),
+            'queries': Histogram(QUERY_COUNT_BUCKETS),
+            'statuses': {},
+            'response_bytes': 0,
+            'query_seconds': 0.0,
+        })
+    return metrics
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    db = g.get('db')
+    endpoint = request.endpoint or 'unmatched'
+    with request_metrics_lock:
+        metrics = route_metrics(endpoint, request.method)
+        metrics['latency'].observe(elapsed)
+        metrics['statuses'][response.status_code] = metrics['statuses'].get(response.status_code, 0) + 1
+        # Streamed responses have no length up front and are not counted
+        metrics['response_bytes'] += response.content_length or 0
+        metrics['queries'].observe(db.query_count if db is not None else 0)
+        metrics['query_seconds'] += db.query_time if db is not None else 0.0
+    return response
+
+
+def format_metrics():
+    """All request metrics in Prometheus text exposition format"""
+    lines = []
+    with request_metrics_lock:
+        routes = sorted(request_metrics.items())
+
+        lines += ['# HELP bluefin_http_request_duration_seconds Time spent handling requests.',
+                  '# TYPE bluefin_http_request_duration_seconds histogram']
+        for (endpoint, method), metrics in routes:
+            lines += metrics['latency'].lines('bluefin_http_request_duration_seconds',
+                                              f'endpoint="{endpoint}",method="{method}"')
+
+        lines += ['# HELP bluefin_http_requests_total Requests handled, by response status.',
+                  '# TYPE bluefin_http_requests_total counter']
+        for (endpoint, method), metrics in routes:
+            for status, count in sorted(metrics['statuses'].items()):
+                lines.append(f'bluefin_http_requests_total'
+                             f'{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+        lines += ['# HELP bluefin_http_response_bytes_total Bytes sent in response bodies of known length.',
+                  '# TYPE bluefin_http_response_bytes_total counter']
+        for (endpoint, method), metrics in routes:
+            lines.append(f'bluefin_http_response_bytes_total{{endpoint="{endpoint}",method="{method}"}} '
+                         f'{metrics["response_bytes"]}')
+
+        lines += ['# HELP bluefin_sql_queries_per_request SQL statements run on the request connection.',
+                  '# TYPE bluefin_sql_queries_per_request histogram']
+        for (endpoint, method), metrics in routes:
+            lines += metrics['queries'].lines('bluefin_sql_queries_per_request',
+                                              f'endpoint="{endpoint}",method="{method}"')
+
+        lines += ['# HELP bluefin_sql_query_seconds_total Time spent running SQL statements and reading their rows.',
+                  '# TYPE bluefin_sql_query_seconds_total counter']
+        for (endpoint, method), metrics in routes:
+            lines.append(f'bluefin_sql_query_seconds_total{{endpoint="{endpoint}",method="{method}"}} '
+                         f'{metrics["query_seconds"]:.6f}')
+    return '\n'.join(lines) + '\n'
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Request metrics for Prometheus to scrape"""
+    token = app.config['METRICS_TOKEN']
+    if token:
+        authorization = request.headers.get('Authorization', '')
+        allowed = hmac.compare_digest(authorization, f'Bearer {token}')
+    else:
+        allowed = request.remote_addr in ('127.0.0.1', '::1')
+    if not allowed:
+        return jsonify({'error': 'Not allowed to read metrics'}), 403
+    return Response(format_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+# --- Slow Query Log ---
+# Opt-in: set SLOW_QUERY_THRESHOLD_MS to log every statement on a request connection
+# that takes longer. Statements are grouped by shape (the SQL with literals replaced by
+# ? and IN lists collapsed), and the first time a shape is seen its EXPLAIN QUERY PLAN
+# is captured, so full-table scans show up even for queries that are fast on small data.
+# /api/slow_queries lists the shapes seen so far.
+app.config['SLOW_QUERY_THRESHOLD_MS'] = None  # e.g. 50; None disables the log
+SLOW_QUERY_MAX_SHAPES = 1000
+EXPLAINABLE_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+SQL_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+SQL_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+SQL_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+# Plan lines that read a whole table or index; lookups say SEARCH instead
+PLAN_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(\S+)(?=\s|$)(?! VIRTUAL TABLE)')
+
+query_shapes = {}
+query_shapes_lock = threading.Lock()
+
+
+def normalize_sql(sql):
+    """Reduce a statement to its shape, so queries differing only in values group together"""
+    sql = SQL_STRING_LITERAL.sub('?', sql)
+    sql = SQL_NUMBER_LITERAL.sub('?', sql)
+    sql = SQL_PLACEHOLDER_LIST.sub('(?, ...)', sql)
+    return ' '.join(sql.split())
+
+
+def parameters_shape(parameters):
+    """Parameter types without their values, e.g. ['int', 'str']"""
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if parameters is None:
+        return None
+    return [type(value).__name__ for value in parameters]
 
-        # Check if contacts table exists and get its schema
-        cursor = db.execute("PRAGMA table_info(contacts)")
-        contact_columns = {row[1]: row[2] for row in cursor.fetchall()}
 
-        if not contact_columns:
-            # Create new contacts table with all required columns including created_at
-            print("Creating new contacts table...")
-            db.execute('''CREATE TABLE contacts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                firm TEXT,
-                address TEXT,
-                crd_number TEXT,
-                title TEXT,
-                profile_picture TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )''')
-            print("New contacts table created successfully.")
-        else:
-            # Check if we need to add new columns
-            if 'crd_number' not in contact_columns:
-                print("Adding crd_number column to contacts table...")
-                db.execute('ALTER TABLE contacts ADD COLUMN crd_number TEXT')
-            if 'title' not in contact_columns:
-                print("Adding title column to contacts table...")
-                db.execute('ALTER TABLE contacts ADD COLUMN title TEXT')
-            if 'profile_picture' not in contact_columns:
-                print("Adding profile_picture column to contacts table...")
-                db.execute('ALTER TABLE contacts ADD COLUMN profile_picture TEXT')
-            if 'created_at' not in contact_columns:
-                print("Adding created_at column to contacts table...")
-                db.execute('ALTER TABLE contacts ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
-                # Update existing records with current timestamp
-                db.execute('UPDATE contacts SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
-            if 'updated_at' not in contact_columns:
-                print("Adding updated_at column to contacts table...")
-                db.execute('ALTER TABLE contacts ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
-                # Update existing records with current timestamp
-                db.execute('UPDATE contacts SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL')
-
-        # Create contact_notes table
-        db.execute('''CREATE TABLE IF NOT EXISTS contact_notes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            contact_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(contact_id) REFERENCES contacts(id) ON DELETE CASCADE,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )''')
-
-        # Create calendar_notes table for daily custom notes
-        db.execute('''CREATE TABLE IF NOT EXISTS calendar_notes (
+def explain_query(db, sql, parameters):
+    """EXPLAIN QUERY PLAN detail lines and the tables they scan in full"""
+    if not sql.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+        return None, []
+    try:
+        plan = [row[3] for row in sqlite3.Connection.execute(db, 'EXPLAIN QUERY PLAN ' + sql, parameters)]
+    except sqlite3.Error:
+        return None, []
+    scans = [match.group(1) for match in map(PLAN_SCAN.match, plan) if match]
+    return plan, scans
+
+
+def observe_query(db, sql, parameters, endpoint, elapsed):
+    """Record a statement's shape, and log it if it was slower than the threshold"""
+    shape = normalize_sql(sql)
+    slow = elapsed * 1000 >= app.config['SLOW_QUERY_THRESHOLD_MS']
+
+    with query_shapes_lock:
+        entry = query_shapes.get(shape)
+        is_new = entry is None and len(query_shapes) < SLOW_QUERY_MAX_SHAPES
+    if is_new:
+        plan, scans = explain_query(db, sql, parameters)
+        entry = {'sql': shape, 'parameters': parameters_shape(parameters), 'plan': plan, 'scans': scans,
+                 'endpoints': set(), 'slow_count': 0, 'max_ms': 0.0, 'total_slow_ms': 0.0}
+        with query_shapes_lock:
+            entry = query_shapes.setdefault(shape, entry)
+        if scans:
+            print(f"Query scans {', '.join(scans)} in {endpoint or 'no request'}: {shape}")
+
+    # Past SLOW_QUERY_MAX_SHAPES new shapes aren't stored, but are still logged when slow
+    if entry is not None:
+        with query_shapes_lock:
+            if endpoint:
+                entry['endpoints'].add(endpoint)
+            if slow:
+                entry['slow_count'] += 1
+                entry['total_slow_ms'] += elapsed * 1000
+                entry['max_ms'] = max(entry['max_ms'], elapsed * 1000)
+    if slow:
+        print(f"Slow query ({elapsed * 1000:.1f}ms) in {endpoint or 'no request'} "
+              f"with parameters {parameters_shape(parameters)}: {shape}")
+
+
+@app.route('/api/slow_queries', methods=['GET'])
+@login_required
+def api_slow_queries():
+    """Query shapes seen since startup, slowest first, with their plans and full-table scans"""
+    with query_shapes_lock:
+        shapes = [dict(entry, endpoints=sorted(entry['endpoints'])) for entry in query_shapes.values()]
+    shapes.sort(key=lambda entry: (entry['max_ms'], len(entry['scans'])), reverse=True)
+    return jsonify({
+        'enabled': app.config['SLOW_QUERY_THRESHOLD_MS'] is not None,
+        'threshold_ms': app.config['SLOW_QUERY_THRESHOLD_MS'],
+        'shapes': shapes,
+    })
+
+
+# --- Schema Migrations ---
+def migrate_001_initial_schema(db):
+    """Create the original tables, bringing databases from before versioning up to date"""
+    db.execute('''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        name TEXT NOT NULL
+    )''')
+
+    # Check if contacts table exists and get its schema
+    cursor = db.execute("PRAGMA table_info(contacts)")
+    contact_columns = {row[1]: row[2] for row in cursor.fetchall()}
+
+    if not contact_columns:
+        # Create new contacts table with all required columns including created_at
+        print("Creating new contacts table...")
+        db.execute('''CREATE TABLE contacts (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER NOT NULL,
-            note_date DATE NOT NULL,
-            content TEXT NOT NULL,
+            name TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            firm TEXT,
+            address TEXT,
+            crd_number TEXT,
+            title TEXT,
+            profile_picture TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY(user_id) REFERENCES users(id)
         )''')
-
-        # Create registered_accounts table
-        db.execute('''CREATE TABLE IF NOT EXISTS registered_accounts (
+        print("New contacts table created successfully.")
+    else:
+        # Check if we need to add new columns
+        if 'crd_number' not in contact_columns:
+            print("Adding crd_number column to contacts table...")
+            db.execute('ALTER TABLE contacts ADD COLUMN crd_number TEXT')
+        if 'title' not in contact_columns:
+            print("Adding title column to contacts table...")
+            db.execute('ALTER TABLE contacts ADD COLUMN title TEXT')
+        if 'profile_picture' not in contact_columns:
+            print("Adding profile_picture column to contacts table...")
+            db.execute('ALTER TABLE contacts ADD COLUMN profile_picture TEXT')
+        if 'created_at' not in contact_columns:
+            print("Adding created_at column to contacts table...")
+            db.execute('ALTER TABLE contacts ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
+            # Update existing records with current timestamp
+            db.execute('UPDATE contacts SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
+        if 'updated_at' not in contact_columns:
+            print("Adding updated_at column to contacts table...")
+            db.execute('ALTER TABLE contacts ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
+            # Update existing records with current timestamp
+            db.execute('UPDATE contacts SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL')
+
+    # Create contact_notes table
+    db.execute('''CREATE TABLE IF NOT EXISTS contact_notes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        contact_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(contact_id) REFERENCES contacts(id) ON DELETE CASCADE,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )''')
+
+    # Create calendar_notes table for daily custom notes
+    db.execute('''CREATE TABLE IF NOT EXISTS calendar_notes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        note_date DATE NOT NULL,
+        content TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )''')
+
+    # Create registered_accounts table
+    db.execute('''CREATE TABLE IF NOT EXISTS registered_accounts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        contact_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        account_number TEXT,
+        client_name TEXT,
+        strategy TEXT,
+        inception_value REAL,
+        fee_percent REAL,
+        open_date DATE,
+        status TEXT NOT NULL DEFAULT 'New',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(contact_id) REFERENCES contacts(id) ON DELETE CASCADE,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )''')
+
+    # Check if opportunities table exists and get its schema
+    cursor = db.execute("PRAGMA table_info(opportunities)")
+    columns = {row[1]: row[2] for row in cursor.fetchall()}
+
+    if not columns:
+        # Create new opportunities table with correct schema
+        print("Creating new opportunities table...")
+        db.execute('''CREATE TABLE opportunities (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            contact_id INTEGER NOT NULL,
             user_id INTEGER NOT NULL,
-            account_number TEXT,
-            client_name TEXT,
-            strategy TEXT,
-            inception_value REAL,
-            fee_percent REAL,
-            open_date DATE,
-            status TEXT NOT NULL DEFAULT 'New',
+            title TEXT NOT NULL,
+            contact TEXT NOT NULL,
+            salesperson TEXT,
+            amount REAL DEFAULT 0,
+            probability INTEGER DEFAULT 50,
+            stage TEXT NOT NULL DEFAULT 'prospecting',
+            close_date DATE,
+            notes TEXT,
+            reminder DATETIME,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(contact_id) REFERENCES contacts(id) ON DELETE CASCADE,
             FOREIGN KEY(user_id) REFERENCES users(id)
         )''')
-
-        # Check if opportunities table exists and get its schema
-        cursor = db.execute("PRAGMA table_info(opportunities)")
-        columns = {row[1]: row[2] for row in cursor.fetchall()}
-
-        if not columns:
-            # Create new opportunities table with correct schema
-            print("Creating new opportunities table...")
-            db.execute('''CREATE TABLE opportunities (
+        print("New opportunities table created successfully.")
+    else:
+        # Check if we need to migrate the schema
+        needs_migration = False
+        migration_reason = ""
+
+        if 'contact' not in columns:
+            needs_migration = True
+            migration_reason = "Missing 'contact' column"
+        elif 'salesperson' not in columns:
+            needs_migration = True
+            migration_reason = "Missing 'salesperson' column"
+        elif 'probability' not in columns:
+            needs_migration = True
+            migration_reason = "Missing 'probability' column"
+
+        if needs_migration:
+            print(f"Migrating opportunities table: {migration_reason}")
+
+            # Create new table with correct schema
+            db.execute('''CREATE TABLE opportunities_new (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_id INTEGER NOT NULL,
                 title TEXT NOT NULL,
@@ -192,183 +726,820 @@ def init_db():
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY(user_id) REFERENCES users(id)
             )''')
-            print("New opportunities table created successfully.")
-        else:
-            # Check if we need to migrate the schema
-            needs_migration = False
-            migration_reason = ""
-
-            if 'contact' not in columns:
-                needs_migration = True
-                migration_reason = "Missing 'contact' column"
-            elif 'salesperson' not in columns:
-                needs_migration = True
-                migration_reason = "Missing 'salesperson' column"
-            elif 'probability' not in columns:
-                needs_migration = True
-                migration_reason = "Missing 'probability' column"
-
-            if needs_migration:
-                print(f"Migrating opportunities table: {migration_reason}")
-
-                # Create new table with correct schema
-                db.execute('''CREATE TABLE opportunities_new (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    title TEXT NOT NULL,
-                    contact TEXT NOT NULL,
-                    salesperson TEXT,
-                    amount REAL DEFAULT 0,
-                    probability INTEGER DEFAULT 50,
-                    stage TEXT NOT NULL DEFAULT 'prospecting',
-                    close_date DATE,
-                    notes TEXT,
-                    reminder DATETIME,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(user_id) REFERENCES users(id)
-                )''')
-
-                # Build dynamic migration query based on existing columns
-                select_parts = []
-                select_parts.append('o.id')
-                select_parts.append('o.user_id')
-                select_parts.append('o.title' if 'title' in columns else "'Untitled' as title")
-
-                # Handle contact field - could be contact_id or contact
-                if 'contact' in columns:
-                    select_parts.append('o.contact')
-                elif 'contact_id' in columns:
-                    select_parts.append("COALESCE(c.name, 'Unknown Contact') as contact")
-                else:
-                    select_parts.append("'Unknown Contact' as contact")
-
-                # Handle other optional fields
-                select_parts.append('o.salesperson' if 'salesperson' in columns else 'NULL as salesperson')
-                select_parts.append('o.amount' if 'amount' in columns else '0 as amount')
-                select_parts.append('o.probability' if 'probability' in columns else '50 as probability')
-                select_parts.append('o.stage' if 'stage' in columns else "'prospecting' as stage")
-                select_parts.append('o.close_date' if 'close_date' in columns else 'NULL as close_date')
-                select_parts.append('o.notes' if 'notes' in columns else 'NULL as notes')
-                select_parts.append('o.reminder' if 'reminder' in columns else 'NULL as reminder')
-                select_parts.append('o.created_at' if 'created_at' in columns else 'CURRENT_TIMESTAMP as created_at')
-                select_parts.append('o.updated_at' if 'updated_at' in columns else 'CURRENT_TIMESTAMP as updated_at')
-
-                # Build the migration query
-                select_clause = ', '.join(select_parts)
-
-                if 'contact_id' in columns and 'contact' not in columns:
-                    # Need to join with contacts table
-                    migration_query = f'''INSERT INTO opportunities_new
-                                          (id, user_id, title, contact, salesperson, amount, probability, stage, close_date, notes, reminder, created_at, updated_at)
-                                         SELECT {select_clause}
-                                         FROM opportunities o
-                                         LEFT JOIN contacts c ON o.contact_id = c.id'''
-                else:
-                    # Simple migration without joins
-                    migration_query = f'''INSERT INTO opportunities_new
-                                          (id, user_id, title, contact, salesperson, amount, probability, stage, close_date, notes, reminder, created_at, updated_at)
-                                         SELECT {select_clause}
-                                         FROM opportunities o'''
-
-                try:
-                    db.execute(migration_query)
-                    # Drop old table and rename new one
-                    db.execute('DROP TABLE opportunities')
-                    db.execute('ALTER TABLE opportunities_new RENAME TO opportunities')
-                    print("Schema migration completed successfully.")
-                except Exception as e:
-                    print(f"Migration error: {e}")
-                    # Clean up failed migration
-                    db.execute('DROP TABLE IF EXISTS opportunities_new')
-                    raise e
 
+            # Build dynamic migration query based on existing columns
+            select_parts = []
+            select_parts.append('o.id')
+            select_parts.append('o.user_id')
+            select_parts.append('o.title' if 'title' in columns else "'Untitled' as title")
+
+            # Handle contact field - could be contact_id or contact
+            if 'contact' in columns:
+                select_parts.append('o.contact')
+            elif 'contact_id' in columns:
+                select_parts.append("COALESCE(c.name, 'Unknown Contact') as contact")
+            else:
+                select_parts.append("'Unknown Contact' as contact")
+
+            # Handle other optional fields
+            select_parts.append('o.salesperson' if 'salesperson' in columns else 'NULL as salesperson')
+            select_parts.append('o.amount' if 'amount' in columns else '0 as amount')
+            select_parts.append('o.probability' if 'probability' in columns else '50 as probability')
+            select_parts.append('o.stage' if 'stage' in columns else "'prospecting' as stage")
+            select_parts.append('o.close_date' if 'close_date' in columns else 'NULL as close_date')
+            select_parts.append('o.notes' if 'notes' in columns else 'NULL as notes')
+            select_parts.append('o.reminder' if 'reminder' in columns else 'NULL as reminder')
+            select_parts.append('o.created_at' if 'created_at' in columns else 'CURRENT_TIMESTAMP as created_at')
+            select_parts.append('o.updated_at' if 'updated_at' in columns else 'CURRENT_TIMESTAMP as updated_at')
+
+            # Build the migration query
+            select_clause = ', '.join(select_parts)
+
+            if 'contact_id' in columns and 'contact' not in columns:
+                # Need to join with contacts table
+                migration_query = f'''INSERT INTO opportunities_new
+                                      (id, user_id, title, contact, salesperson, amount, probability, stage, close_date, notes, reminder, created_at, updated_at)
+                                     SELECT {select_clause}
+                                     FROM opportunities o
+                                     LEFT JOIN contacts c ON o.contact_id = c.id'''
+            else:
+                # Simple migration without joins
+                migration_query = f'''INSERT INTO opportunities_new
+                                      (id, user_id, title, contact, salesperson, amount, probability, stage, close_date, notes, reminder, created_at, updated_at)
+                                     SELECT {select_clause}
+                                     FROM opportunities o'''
+
+            try:
+                db.execute(migration_query)
+                # Drop old table and rename new one
+                db.execute('DROP TABLE opportunities')
+                db.execute('ALTER TABLE opportunities_new RENAME TO opportunities')
+                print("Schema migration completed successfully.")
+            except Exception as e:
+                print(f"Migration error: {e}")
+                # Clean up failed migration
+                db.execute('DROP TABLE IF EXISTS opportunities_new')
+                raise e
+
+
+    db.execute('''CREATE TABLE IF NOT EXISTS notes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user TEXT NOT NULL,
+        content TEXT NOT NULL,
+        timestamp TEXT NOT NULL
+    )''')
+
+
+def migrate_002_indexes(db):
+    """Add indexes for the per-user lookups and date ranges used by the views"""
+    db.execute('CREATE INDEX IF NOT EXISTS idx_contacts_user_name ON contacts(user_id, name)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_contacts_user_firm ON contacts(user_id, firm)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_contacts_user_created ON contacts(user_id, created_at)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_contact_notes_contact '
+               'ON contact_notes(contact_id, user_id, created_at)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_registered_accounts_contact '
+               'ON registered_accounts(contact_id, user_id)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_calendar_notes_user_date ON calendar_notes(user_id, note_date)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_opportunities_user_created ON opportunities(user_id, created_at)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_opportunities_user_close ON opportunities(user_id, close_date)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_opportunities_user_reminder ON opportunities(user_id, reminder)')
+    db.execute('ANALYZE')
+
+
+# Full-text indexes: FTS5 table name -> (source table, indexed columns). The FTS tables
+# are external-content tables over the source, so only the index is stored twice.
+FTS_TABLES = {
+    'contacts_fts': ('contacts', ('name', 'email', 'firm', 'title', 'crd_number')),
+    'contact_notes_fts': ('contact_notes', ('content',)),
+    'registered_accounts_fts': ('registered_accounts', ('account_number', 'client_name', 'strategy')),
+}
 
-init_db()
 
+def migrate_003_full_text_search(db):
+    """Add FTS5 indexes over contacts, contact notes and registered accounts, kept in sync by triggers"""
+    for fts_table, (table, columns) in FTS_TABLES.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
 
-# Add this after init_db()
-def init_notes_table():
-    with get_db() as db:
-        db.execute('''CREATE TABLE IF NOT EXISTS notes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user TEXT NOT NULL,
-            content TEXT NOT NULL,
-            timestamp TEXT NOT NULL
+        db.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+            {column_list}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
         )''')
+        db.execute(f'''CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END''')
+        db.execute(f'''CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END''')
+        db.execute(f'''CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END''')
+        # Index the rows that already exist
+        db.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+
+def migrate_004_import_jobs(db):
+    """Add the import_jobs table that records the outcome of bulk contact imports"""
+    db.execute('''CREATE TABLE IF NOT EXISTS import_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        filename TEXT,
+        status TEXT NOT NULL DEFAULT 'running',
+        total_bytes INTEGER,
+        processed_rows INTEGER NOT NULL DEFAULT 0,
+        imported_rows INTEGER NOT NULL DEFAULT 0,
+        error_count INTEGER NOT NULL DEFAULT 0,
+        errors TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )''')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_import_jobs_user ON import_jobs(user_id, id)')
+
+
+def migrate_005_analytics_summaries(db):
+    """Add per-user summary tables for the analytics page, maintained by triggers.
+
+    opportunity_stats holds counts and amount totals by (user, stage, close month) and
+    contact_firm_stats holds contact counts by (user, firm). A missing close date or firm
+    is stored as '' because primary key columns of WITHOUT ROWID tables can't be NULL.
+    """
+    db.execute('''CREATE TABLE IF NOT EXISTS opportunity_stats (
+        user_id INTEGER NOT NULL,
+        stage TEXT NOT NULL,
+        close_month TEXT NOT NULL,
+        opportunity_count INTEGER NOT NULL DEFAULT 0,
+        amount_total REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, stage, close_month)
+    ) WITHOUT ROWID''')
+    db.execute('''CREATE TABLE IF NOT EXISTS contact_firm_stats (
+        user_id INTEGER NOT NULL,
+        firm TEXT NOT NULL,
+        contact_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, firm)
+    ) WITHOUT ROWID''')
+
+    add_opportunity = '''
+        INSERT INTO opportunity_stats (user_id, stage, close_month, opportunity_count, amount_total)
+        VALUES (new.user_id, new.stage, COALESCE(substr(new.close_date, 1, 7), ''), 1, COALESCE(new.amount, 0))
+        ON CONFLICT (user_id, stage, close_month) DO UPDATE
+        SET opportunity_count = opportunity_count + 1, amount_total = amount_total + excluded.amount_total;
+    '''
+    remove_opportunity = '''
+        UPDATE opportunity_stats
+        SET opportunity_count = opportunity_count - 1, amount_total = amount_total - COALESCE(old.amount, 0)
+        WHERE user_id = old.user_id AND stage = old.stage
+          AND close_month = COALESCE(substr(old.close_date, 1, 7), '');
+        DELETE FROM opportunity_stats
+        WHERE user_id = old.user_id AND stage = old.stage
+          AND close_month = COALESCE(substr(old.close_date, 1, 7), '') AND opportunity_count <= 0;
+    '''
+    add_contact = '''
+        INSERT INTO contact_firm_stats (user_id, firm, contact_count)
+        VALUES (new.user_id, COALESCE(new.firm, ''), 1)
+        ON CONFLICT (user_id, firm) DO UPDATE SET contact_count = contact_count + 1;
+    '''
+    remove_contact = '''
+        UPDATE contact_firm_stats SET contact_count = contact_count - 1
+        WHERE user_id = old.user_id AND firm = COALESCE(old.firm, '');
+        DELETE FROM contact_firm_stats
+        WHERE user_id = old.user_id AND firm = COALESCE(old.firm, '') AND contact_count <= 0;
+    '''
 
+    db.execute(f'''CREATE TRIGGER IF NOT EXISTS opportunity_stats_ai AFTER INSERT ON opportunities BEGIN
+        {add_opportunity}
+    END''')
+    db.execute(f'''CREATE TRIGGER IF NOT EXISTS opportunity_stats_ad AFTER DELETE ON opportunities BEGIN
+        {remove_opportunity}
+    END''')
+    db.execute(f'''CREATE TRIGGER IF NOT EXISTS opportunity_stats_au
+        AFTER UPDATE OF user_id, stage, close_date, amount ON opportunities BEGIN
+        {remove_opportunity}
+        {add_opportunity}
+    END''')
+    db.execute(f'''CREATE TRIGGER IF NOT EXISTS contact_firm_stats_ai AFTER INSERT ON contacts BEGIN
+        {add_contact}
+    END''')
+    db.execute(f'''CREATE TRIGGER IF NOT EXISTS contact_firm_stats_ad AFTER DELETE ON contacts BEGIN
+        {remove_contact}
+    END''')
+    db.execute(f'''CREATE TRIGGER IF NOT EXISTS contact_firm_stats_au AFTER UPDATE OF user_id, firm ON contacts BEGIN
+        {remove_contact}
+        {add_contact}
+    END''')
+
+    # Summarize the rows that already exist
+    rebuild_analytics_summaries(db)
+
+
+def migrate_006_data_versions(db):
+    """Add data_versions, a per-user counter bumped by every write, for cache invalidation"""
+    db.execute('''CREATE TABLE IF NOT EXISTS data_versions (
+        user_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )''')
+
+
+def migrate_007_forecast_index(db):
+    """Replace the (user_id, close_date) opportunities index with a covering one for forecasts"""
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_opportunities_forecast
+                  ON opportunities(user_id, close_date, stage, probability, amount, salesperson)''')
+    db.execute('DROP INDEX IF EXISTS idx_opportunities_user_close')
+
+
+def migrate_008_opportunity_sync(db):
+    """Record deleted opportunity ids and index updated_at for /api/opportunities?since= delta sync"""
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_opportunities_user_updated
+                  ON opportunities(user_id, updated_at)''')
+    db.execute('''CREATE TABLE IF NOT EXISTS opportunity_tombstones (
+        opportunity_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        deleted_at TEXT NOT NULL
+    )''')
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_opportunity_tombstones_user_deleted
+                  ON opportunity_tombstones(user_id, deleted_at)''')
+    # deleted_at uses the local ISO format the API writes to updated_at, so both compare
+    # against the same cursor. Tombstones older than 30 days are pruned as new ones arrive.
+    db.execute('''CREATE TRIGGER IF NOT EXISTS opportunity_tombstones_ad AFTER DELETE ON opportunities BEGIN
+        INSERT OR REPLACE INTO opportunity_tombstones (opportunity_id, user_id, deleted_at)
+        VALUES (old.id, old.user_id, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'));
+        DELETE FROM opportunity_tombstones
+        WHERE user_id = old.user_id
+          AND deleted_at < strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime', '-30 days');
+    END''')
+
+
+def migrate_009_reminder_scheduler(db):
+    """Index reminders across users and add the tables the reminder scheduler writes to"""
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_opportunities_reminder
+                  ON opportunities(reminder) WHERE reminder IS NOT NULL''')
+    # One row per delivered reminder, so restarts and multiple workers never deliver twice
+    db.execute('''CREATE TABLE IF NOT EXISTS reminder_deliveries (
+        opportunity_id INTEGER NOT NULL,
+        reminder TEXT NOT NULL,
+        delivered_at TEXT NOT NULL,
+        PRIMARY KEY (opportunity_id, reminder)
+    ) WITHOUT ROWID''')
+    # Filled by the 'queue' reminder sink for another process to pick up
+    db.execute('''CREATE TABLE IF NOT EXISTS reminder_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        opportunity_id INTEGER NOT NULL,
+        email TEXT,
+        title TEXT,
+        reminder TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        processed_at TEXT
+    )''')
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_reminder_queue_pending
+                  ON reminder_queue(id) WHERE processed_at IS NULL''')
+
+
+def migrate_010_opportunity_contact_id(db):
+    """Link opportunities to contacts by id; contact stays as the denormalized display name"""
+    db.execute('ALTER TABLE opportunities ADD COLUMN contact_id INTEGER REFERENCES contacts(id) ON DELETE SET NULL')
+    # Covers the per-contact pipeline rollup on the contact card
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_opportunities_contact
+                  ON opportunities(contact_id, stage, amount, probability) WHERE contact_id IS NOT NULL''')
+    # Backfill from names that match exactly one of the user's contacts; ambiguous or
+    # unknown names stay unlinked
+    db.execute('''
+        UPDATE opportunities SET contact_id = (
+            SELECT MIN(c.id) FROM contacts c
+            WHERE c.user_id = opportunities.user_id AND c.name = opportunities.contact
+            HAVING COUNT(*) = 1
+        )
+    ''')
+
+
+def migrate_011_notes_user_id(db):
+    """Scope the opportunities page notes to their author and index them newest-first"""
+    db.execute('ALTER TABLE notes ADD COLUMN user_id INTEGER REFERENCES users(id)')
+    # Notes only stored the author's display name; names shared by several users, or
+    # belonging to no one, can't be attributed and are left out of every feed
+    db.execute('''
+        UPDATE notes SET user_id = (
+            SELECT MIN(u.id) FROM users u WHERE u.name = notes.user HAVING COUNT(*) = 1
+        )
+    ''')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_notes_user_id ON notes(user_id, id)')
+
+
+def migrate_012_import_progress(db):
+    """Record how far into its file a running import is, now that it commits as it goes"""
+    db.execute('ALTER TABLE import_jobs ADD COLUMN processed_bytes INTEGER NOT NULL DEFAULT 0')
+
+
+def migrate_013_opportunity_updated_at(db):
+    """Keep opportunities.updated_at on one clock and bump it on every change, for delta sync"""
+    # Rows stamped by the CURRENT_TIMESTAMP column default hold UTC as 'YYYY-MM-DD HH:MM:SS';
+    # everything else, and the sync cursors, use local time in isoformat()
+    db.execute('''
+        UPDATE opportunities SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', updated_at, 'localtime')
+        WHERE updated_at LIKE '____-__-__ __:__:__%'
+    ''')
+    # Migration 010 backfilled contact_id without touching updated_at, so synced clients
+    # never received it
+    db.execute('''
+        UPDATE opportunities SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+        WHERE contact_id IS NOT NULL
+    ''')
+    db.execute('''CREATE TRIGGER IF NOT EXISTS opportunities_updated_at_ai AFTER INSERT ON opportunities
+        WHEN new.updated_at IS NULL OR new.updated_at LIKE '____-__-__ __:__:__%' BEGIN
+        UPDATE opportunities
+        SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', COALESCE(new.updated_at, 'now'), 'localtime')
+        WHERE id = new.id;
+    END''')
+    # Changes made without setting updated_at, such as contact_id being set to NULL when
+    # its contact is deleted, are stamped here so ?since= picks them up
+    db.execute('''CREATE TRIGGER IF NOT EXISTS opportunities_updated_at_au AFTER UPDATE ON opportunities
+        WHEN new.updated_at IS old.updated_at BEGIN
+        UPDATE opportunities SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+        WHERE id = new.id;
+    END''')
+
+
+# Migrations run in order and each runs exactly once per database. The number of the
+# last applied migration is stored in PRAGMA user_version. New schema changes are
+# added as a new function at the end of this list, never by editing an old one.
+MIGRATIONS = [
+    migrate_001_initial_schema,
+    migrate_002_indexes,
+    migrate_003_full_text_search,
+    migrate_004_import_jobs,
+    migrate_005_analytics_summaries,
+    migrate_006_data_versions,
+    migrate_007_forecast_index,
+    migrate_008_opportunity_sync,
+    migrate_009_reminder_scheduler,
+    migrate_010_opportunity_contact_id,
+    migrate_011_notes_user_id,
+    migrate_012_import_progress,
+    migrate_013_opportunity_updated_at,
+]
+
+
+def get_schema_version(db):
+    return db.execute('PRAGMA user_version').fetchone()[0]
+
+
+def upgrade_db():
+    """Apply all pending migrations in a single transaction and return the versions applied.
+
+    BEGIN IMMEDIATE takes the write lock before the version is read, so when several
+    processes upgrade at once the others wait and then find nothing left to do.
+    """
+    applied = []
+    with closing(connect_db()) as db:
+        db.isolation_level = None  # manage the transaction explicitly
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            for version in range(get_schema_version(db) + 1, len(MIGRATIONS) + 1):
+                MIGRATIONS[version - 1](db)
+                db.execute(f'PRAGMA user_version = {version}')
+                applied.append(version)
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+    return applied
+
+
+db_cli = AppGroup('db', help='Manage the database schema and data.')
+
+
+@db_cli.command('upgrade')
+def db_upgrade_command():
+    """Apply pending schema migrations."""
+    applied = upgrade_db()
+    if applied:
+        click.echo(f"Applied migrations {', '.join(map(str, applied))}.")
+    click.echo(f"Database is at schema version {len(MIGRATIONS)}.")
+
+
+app.cli.add_command(db_cli)
+
+
+# --- Synthetic Data ---
+# `flask seed` generates realistic, correlated sample data for demos and capacity
+# planning: users, firms, contacts at those firms, contact notes, registered accounts,
+# opportunities against the contacts and calendar notes. Everything is inserted in one
+# transaction with executemany. Into an empty database the load takes shortcuts: no
+# fsync until the end, and the indexes and triggers on the loaded tables are dropped
+# first and recreated from their saved sqlite_master SQL afterwards, with the full-text
+# indexes and analytics summaries rebuilt once at the end instead of row by row. A
+# database that already holds data is only added to with --force, and then without them.
+SEED_TABLES = ('contacts', 'contact_notes', 'registered_accounts', 'opportunities', 'calendar_notes')
+SEED_BATCH_SIZE = 50000
+FIRST_NAMES = ('James Mary Robert Patricia John Jennifer Michael Linda David Elizabeth William Barbara Richard '
+               'Susan Joseph Jessica Thomas Sarah Charles Karen Daniel Lisa Matthew Nancy Anthony Sandra Mark '
+               'Ashley Steven Emily Andrew Michelle Paul Amanda Kevin Melissa Brian Laura George Rebecca').split()
+LAST_NAMES = ('Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez Hernandez Lopez Gonzalez '
+              'Wilson Anderson Thomas Taylor Moore Jackson Martin Lee Perez Thompson White Harris Sanchez Clark '
+              'Ramirez Lewis Robinson Walker Young Allen King Wright Scott Torres Nguyen Hill Flores').split()
+FIRM_NAMES = ('Morgan Stanley', 'Goldman Sachs', 'JPMorgan Chase', 'Bank of America', 'Wells Fargo', 'Citigroup',
+              'Deutsche Bank', 'UBS', 'Charles Schwab', 'Fidelity', 'Vanguard', 'Edward Jones', 'Raymond James',
+              'Ameriprise', 'LPL Financial', 'Merrill Lynch', 'Northern Trust', 'BNY Mellon', 'State Street',
+              'RBC Wealth Management', 'Stifel', 'Baird', 'Janney', 'Oppenheimer', 'Piper Sandler')
+JOB_TITLES = ('Financial Advisor', 'Senior Financial Advisor', 'Vice President', 'Managing Director',
+              'Portfolio Manager', 'Private Wealth Manager', 'Investment Advisor', 'Branch Manager')
+STRATEGIES = ('Large Cap Growth', 'Core Fixed Income', 'Municipal Bonds', 'Dividend Income', 'Balanced 60/40',
+              'International Equity', 'ESG Core', 'Small Cap Value')
+ACCOUNT_STATUSES = ('New', 'Pending', 'Open', 'Open', 'Open', 'Closed')
+# (stage, relative frequency, typical win probability)
+STAGE_DISTRIBUTION = (('prospecting', 25, 10), ('qualifying', 20, 25), ('proposal', 18, 50),
+                      ('negotiation', 12, 75), ('closed-won', 15, 100), ('closed-lost', 10, 0))
+NOTE_TEMPLATES = ('Discussed {topic} with {name}.', 'Follow up with {name} about {topic}.',
+                  'Sent {topic} materials to {name}.', '{name} asked for an update on {topic}.',
+                  'Quarterly review with {name}, covered {topic}.')
+NOTE_TOPICS = ('portfolio rebalancing', 'retirement income', 'estate planning', 'tax-loss harvesting',
+               'fee schedule', 'ESG options', 'model portfolios', 'cash management', 'bond ladder')
+
+
+def seed_indexes_and_triggers(db):
+    """CREATE statements of the indexes and triggers on the tables the generator loads"""
+    placeholders = ','.join('?' * len(SEED_TABLES))
+    return db.execute(f'''
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    ''', SEED_TABLES).fetchall()
+
+
+def seed_tables_have_data(db):
+    """Whether any of the tables the generator loads, or users, already has rows"""
+    return any(db.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone() for table in ('users',) + SEED_TABLES)
+
+
+def rebuild_analytics_summaries(db):
+    """Recompute opportunity_stats and contact_firm_stats from the base tables"""
+    db.execute('DELETE FROM opportunity_stats')
+    db.execute('DELETE FROM contact_firm_stats')
+    db.execute('''
+        INSERT INTO opportunity_stats (user_id, stage, close_month, opportunity_count, amount_total)
+        SELECT user_id, stage, COALESCE(substr(close_date, 1, 7), ''), COUNT(*), COALESCE(SUM(amount), 0)
+        FROM opportunities
+        GROUP BY 1, 2, 3
+    ''')
+    db.execute('''
+        INSERT INTO contact_firm_stats (user_id, firm, contact_count)
+        SELECT user_id, COALESCE(firm, ''), COUNT(*)
+        FROM contacts
+        GROUP BY 1, 2
+    ''')
+
+
+def generate_user_rows(rng, user_id, first_contact_id, options, days, times):
+    """Rows for one user's contacts, notes, accounts, opportunities and calendar notes.
+
+    Random picks use rng.choices(k=...) and int(random() * n), which are several times
+    faster than a choice() or randrange() call per value.
+    """
+    random_ = rng.random
+    contacts_per_user = options['contacts_per_user']
+    past_days = options['history_days'] + 1  # the rest of `days` is in the future
+    # A few large firms hold most of a user's contacts
+    firms = rng.sample(FIRM_NAMES, min(options['firms_per_user'], len(FIRM_NAMES)))
+    contact_firms = rng.choices(firms, [1 / (rank + 1) for rank in range(len(firms))], k=contacts_per_user)
+    first_names = rng.choices(FIRST_NAMES, k=contacts_per_user)
+    last_names = rng.choices(LAST_NAMES, k=contacts_per_user)
+    created_days = rng.choices(days[:past_days], k=contacts_per_user)
+    domains = {firm: firm.lower().replace(' ', '') + '.com' for firm in firms}
+
+    contacts = []
+    for offset in range(contacts_per_user):
+        contact_id = first_contact_id + offset
+        first, last, firm = first_names[offset], last_names[offset], contact_firms[offset]
+        created = created_days[offset] + times[contact_id % len(times)]
+        email = f'{first[0].lower()}{last.lower()}{contact_id}@{domains[firm]}'
+        contacts.append((contact_id, user_id, f'{first} {last}', email, f'555-{contact_id % 10000:04d}', firm,
+                         f'{contact_id % 900 + 100} Main St', f'{10000000 + contact_id}',
+                         JOB_TITLES[contact_id % len(JOB_TITLES)], created, created))
+
+    # Per-contact counts follow a geometric distribution with the requested mean
+    def counts(mean):
+        keep = mean / (mean + 1)
+        values = []
+        for _ in range(contacts_per_user):
+            count = 0
+            while random_() < keep:
+                count += 1
+            values.append(count)
+        return values
+
+    notes = []
+    templates, topics, time_count = NOTE_TEMPLATES, NOTE_TOPICS, len(times)
+    for contact, count in zip(contacts, counts(options['notes_per_contact'])):
+        for _ in range(count):
+            text = templates[int(random_() * len(templates))].format(
+                name=contact[2], topic=topics[int(random_() * len(topics))])
+            notes.append((contact[0], user_id, text, contact[9][:10] + times[int(random_() * time_count)]))
+
+    accounts = []
+    for contact, count in zip(contacts, counts(options['accounts_per_contact'])):
+        for _ in range(count):
+            accounts.append((contact[0], user_id, str(10000000 + int(random_() * 90000000)), contact[2],
+                             STRATEGIES[int(random_() * len(STRATEGIES))], round(rng.lognormvariate(12, 1), 2),
+                             (0.5, 0.75, 1.0, 1.25)[int(random_() * 4)], contact[9][:10],
+                             ACCOUNT_STATUSES[int(random_() * len(ACCOUNT_STATUSES))]))
+
+    stages = [stage for stage, _, _ in STAGE_DISTRIBUTION]
+    stage_weights = [weight for _, weight, _ in STAGE_DISTRIBUTION]
+    stage_probability = {stage: probability for stage, _, probability in STAGE_DISTRIBUTION}
+    salespeople = [f'{first} {last}' for first, last in zip(rng.sample(FIRST_NAMES, 4), rng.sample(LAST_NAMES, 4))]
+    opportunities = []
+    for stage in rng.choices(stages, stage_weights, k=options['opportunities_per_user']):
+        contact = contacts[int(random_() * contacts_per_user)]
+        created_index = int(random_() * past_days)
+        close_index = min(created_index + 14 + int(random_() * 166), len(days) - 1)
+        probability = stage_probability[stage]
+        if 0 < probability < 100:
+            probability = max(5, min(95, probability + 5 * int(random_() * 5) - 10))
+        reminder = None
+        if stage not in CLOSED_STAGES and random_() < 0.3:
+            reminder = days[min(created_index + 1 + int(random_() * 29), len(days) - 1)] + \
+                times[int(random_() * time_count)][:6]
+        created = days[created_index] + times[int(random_() * time_count)]
+        title = f'{contact[5]} {STRATEGIES[int(random_() * len(STRATEGIES))]}'
+        opportunities.append((user_id, title, contact[2], contact[0],
+                              salespeople[int(random_() * len(salespeople))], round(rng.lognormvariate(11, 0.8), -2),
+                              probability, stage, days[close_index], f'Opportunity with {contact[2]} at {contact[5]}.',
+                              reminder, created, created))
+
+    calendar_notes = [(user_id, days[int(random_() * len(days))], templates[int(random_() * len(templates))].format(
+        name=contacts[int(random_() * contacts_per_user)][2], topic=topics[int(random_() * len(topics))]))
+        for _ in range(options['calendar_notes_per_user'])]
+
+    return contacts, notes, accounts, opportunities, calendar_notes
+
+
+def generate_seed_data(users, contacts_per_user, firms_per_user=8, notes_per_contact=2.0,
+                       accounts_per_contact=1.5, opportunities_per_user=None, calendar_notes_per_user=20,
+                       history_days=730, seed=None, force=False):
+    """Add `users` new users with generated data and return the number of rows inserted per table.
+
+    If the users table is empty, the first user is the demo account (demo@bluefin.com / demo123).
+    Raises ValueError if the database already has data, unless `force` is set.
+    """
+    options = {
+        'contacts_per_user': contacts_per_user,
+        'firms_per_user': firms_per_user,
+        'notes_per_contact': notes_per_contact,
+        'accounts_per_contact': accounts_per_contact,
+        'opportunities_per_user': contacts_per_user // 2 if opportunities_per_user is None else opportunities_per_user,
+        'calendar_notes_per_user': calendar_notes_per_user,
+        'history_days': history_days,
+    }
+    # Timestamps are assembled from precomputed day and time strings, which is much
+    # faster than formatting a datetime per row. Days run to 60 days ahead for close dates.
+    today = datetime.now().date()
+    days = [(today - timedelta(days=history_days - day)).isoformat() for day in range(history_days + 60)]
+    times = [f'T{hour:02d}:{minute:02d}:00' for hour in range(8, 19) for minute in range(0, 60, 5)]
+    counts = dict.fromkeys(SEED_TABLES + ('users',), 0)
+
+    with closing(connect_db()) as db:
+        db.isolation_level = None
+        bulk = not seed_tables_have_data(db)
+        if not bulk and not force:
+            raise ValueError('The database already has data')
+        journal_mode = None
+        if bulk:
+            # Bulk-load settings for this connection only. Generated rows are consistent, so
+            # foreign keys aren't checked row by row, and nothing is fsynced until the end.
+            # Leaving WAL avoids writing every page twice; it only succeeds when no other
+            # connection is open, otherwise the load simply runs in WAL mode.
+            db.execute('PRAGMA foreign_keys = OFF')
+            db.execute('PRAGMA synchronous = OFF')
+            db.execute('PRAGMA cache_size = -262144')  # 256MB, for rebuilding the indexes
+            journal_mode = db.execute('PRAGMA journal_mode = TRUNCATE').fetchone()[0]
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if bulk and seed_tables_have_data(db):
+                raise ValueError('The database was written to while the load was starting')
+            saved = seed_indexes_and_triggers(db) if bulk else []
+            for kind, name, _ in saved:
+                db.execute(f'DROP {kind.upper()} {name}')
+
+            next_user_id = db.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM users').fetchone()[0]
+            first_contact_id = db.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM contacts').fetchone()[0]
+
+            # Each user's rows come from their own seeded generator, so the next user's rows
+            # can be generated in a thread while this one's are inserted (sqlite3 releases
+            # the GIL while it executes).
+            def generate(index):
+                rng = random.Random(f'{seed}:{index}') if seed is not None else random.Random()
+                return generate_user_rows(rng, next_user_id + index, first_contact_id + index * contacts_per_user,
+                                          options, days, times)
+
+            generator = ThreadPoolExecutor(max_workers=1)
+            pending = generator.submit(generate, 0) if users else None
+            for index in range(users):
+                user_id = next_user_id + index
+                if user_id == 1:
+                    db.execute('''INSERT INTO users (id, email, password, name)
+                                  VALUES (1, 'demo@bluefin.com', 'demo123', 'Demo User')''')
+                else:
+                    db.execute('INSERT INTO users (id, email, password, name) VALUES (?, ?, ?, ?)',
+                               (user_id, f'user{user_id}@example.com', 'demo123', f'Sample User {user_id}'))
+                counts['users'] += 1
+
+                contacts, notes, accounts, opportunities, calendar_notes = pending.result()
+                if index + 1 < users:
+                    pending = generator.submit(generate, index + 1)
+                for table, sql, rows in (
+                        ('contacts', '''INSERT INTO contacts (id, user_id, name, email, phone, firm, address,
+                                        crd_number, title, created_at, updated_at)
+                                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', contacts),
+                        ('contact_notes', '''INSERT INTO contact_notes (contact_id, user_id, content, created_at)
+                                             VALUES (?, ?, ?, ?)''', notes),
+                        ('registered_accounts', '''INSERT INTO registered_accounts (contact_id, user_id,
+                                                   account_number, client_name, strategy, inception_value,
+                                                   fee_percent, open_date, status)
+                                                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', accounts),
+                        ('opportunities', '''INSERT INTO opportunities (user_id, title, contact, contact_id,
+                                             salesperson, amount, probability, stage, close_date, notes,
+                                             reminder, created_at, updated_at)
+                                             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', opportunities),
+                        ('calendar_notes', '''INSERT INTO calendar_notes (user_id, note_date, content)
+                                              VALUES (?, ?, ?)''', calendar_notes)):
+                    for start in range(0, len(rows), SEED_BATCH_SIZE):
+                        db.executemany(sql, rows[start:start + SEED_BATCH_SIZE])
+                    counts[table] += len(rows)
+                bump_data_version(db, user_id)
+            generator.shutdown()
+
+            if bulk:
+                # Recreate what was dropped, then index and summarize everything in bulk
+                for _, _, sql in saved:
+                    db.execute(sql)
+                for fts_table in FTS_TABLES:
+                    db.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+                rebuild_analytics_summaries(db)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        finally:
+            if journal_mode not in (None, 'wal'):
+                db.execute(f"PRAGMA journal_mode = {app.config['SQLITE_PRAGMAS']['journal_mode']}")
+        # Sampled statistics are enough for the planner and take seconds instead of minutes
+        db.execute('PRAGMA analysis_limit = 1000')
+        db.execute('ANALYZE')
+    return counts
+
+
+@app.cli.command('seed')
+@click.option('--users', default=1, show_default=True, help='Users to create.')
+@click.option('--contacts-per-user', default=50, show_default=True)
+@click.option('--firms-per-user', default=8, show_default=True)
+@click.option('--notes-per-contact', default=2.0, show_default=True, help='Average contact notes per contact.')
+@click.option('--accounts-per-contact', default=1.5, show_default=True,
+              help='Average registered accounts per contact.')
+@click.option('--opportunities-per-user', type=int, help='Defaults to half the contacts per user.')
+@click.option('--calendar-notes-per-user', default=20, show_default=True)
+@click.option('--days', 'history_days', default=730, show_default=True, help='Days of history to spread data over.')
+@click.option('--seed', type=int, help='Random seed, for reproducible data.')
+@click.option('--force', is_flag=True,
+              help='Add to a database that already has data (slower, indexes and triggers stay in place).')
+def seed_command(**options):
+    """Generate sample users, contacts, notes, accounts, opportunities and calendar notes."""
+    upgrade_db()
+    started = time.perf_counter()
+    try:
+        counts = generate_seed_data(**options)
+    except ValueError as e:
+        raise click.ClickException(f'{e}. Use --force to add to it anyway.')
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    click.echo(', '.join(f'{count} {table}' for table, count in counts.items()))
+    click.echo(f'Inserted {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s).')
+
+
+# --- Result Cache ---
+# Read-heavy per-user results (analytics, opportunity listings) are cached under keys
+# that include the user's data version. Every write bumps that version in the same
+# transaction, so cached results from before the write are simply never asked for
+# again and age out of the LRU. The version lives in SQLite, so it is shared by all
+# worker processes whichever cache backend is used.
+app.config['CACHE_BACKEND'] = 'local'  # 'local' (in-process LRU) or 'redis'
+app.config['CACHE_MAX_ENTRIES'] = 1024
+app.config['CACHE_TTL'] = 300  # seconds
+app.config['CACHE_REDIS_URL'] = 'redis://localhost:6379/0'
+
+
+class LocalCache:
+    """Bounded in-process LRU cache. Values are stored as-is and must not be mutated."""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    """Cache stored in a Redis-compatible server, shared by every worker process.
+
+    Values are JSON encoded. Size is bounded by the server's maxmemory setting, which
+    should use an LRU eviction policy such as allkeys-lru.
+    """
+
+    def __init__(self, url, ttl=300, prefix='bluefin:'):
+        import redis  # optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+
+
+cache_backend = None
+cache_stats = {'hits': 0, 'misses': 0}
+
+
+def get_cache():
+    """Return the configured cache backend, creating it on first use"""
+    global cache_backend
+    if cache_backend is None:
+        if app.config['CACHE_BACKEND'] == 'redis':
+            cache_backend = RedisCache(app.config['CACHE_REDIS_URL'], ttl=app.config['CACHE_TTL'])
+        else:
+            cache_backend = LocalCache(app.config['CACHE_MAX_ENTRIES'], ttl=app.config['CACHE_TTL'])
+    return cache_backend
 
-def seed_sample_data():
-    """Add sample data for analytics if tables are empty"""
-    with get_db() as db:
-        # Check if we already have data
-        opp_count = db.execute('SELECT COUNT(*) as count FROM opportunities').fetchone()['count']
-        if opp_count == 0:
-            print("Seeding sample opportunities data...")
-            # Add sample opportunities with contact names (not IDs)
-            sample_opportunities = [
-                (1, 'Morgan Stanley Portfolio Review', 'John Smith', 'Alex Rodriguez', 75000, 80, 'negotiation',
-                 '2024-02-15', 'Follow up on portfolio diversification strategy. Client interested in ESG investments.',
-                 '2024-01-20 10:00:00'),
-                (1, 'Goldman Sachs Retirement Planning', 'Sarah Johnson', 'Maria Garcia', 120000, 60, 'proposal',
-                 '2024-02-28', 'Comprehensive retirement planning for executive. Needs tax optimization strategies.',
-                 '2024-01-25 14:00:00'),
-                (1, 'JPMorgan Investment Advisory', 'Michael Brown', 'David Chen', 45000, 100, 'closed-won',
-                 '2024-01-15', 'Successfully closed investment advisory agreement. Client very satisfied.', None),
-                (1, 'Bank of America Wealth Management', 'Emily Davis', 'Jennifer Kim', 85000, 25, 'qualifying',
-                 '2024-03-10', 'Initial consultation completed. Need to assess risk tolerance and investment goals.',
-                 '2024-01-30 09:00:00'),
-                (1, 'Wells Fargo Estate Planning', 'Robert Wilson', 'Alex Rodriguez', 95000, 70, 'proposal',
-                 '2024-02-20', 'Complex estate planning case. Multiple beneficiaries and trust structures involved.',
-                 '2024-01-28 11:00:00'),
-                (1, 'Citigroup Corporate Benefits', 'Jennifer Lee', 'Maria Garcia', 65000, 40, 'prospecting',
-                 '2024-03-15', 'Corporate benefits consultation. Need to prepare comprehensive proposal.',
-                 '2024-02-01 15:00:00'),
-                (1, 'Deutsche Bank Private Wealth', 'David Martinez', 'David Chen', 150000, 0, 'closed-lost',
-                 '2024-01-30', 'Lost to competitor due to pricing concerns.', None),
-                (1, 'UBS Investment Management', 'Lisa Anderson', 'Jennifer Kim', 200000, 85, 'negotiation',
-                 '2024-02-25', 'Large investment management deal in final stages.', '2024-02-05 16:00:00')
-            ]
-
-            for opp in sample_opportunities:
-                db.execute('''INSERT INTO opportunities
-                              (user_id, title, contact, salesperson, amount, probability, stage, close_date, notes, reminder)
-                              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', opp)
-
-            # Add sample contacts with firms if contacts table is empty
-            contact_count = db.execute('SELECT COUNT(*) as count FROM contacts').fetchone()['count']
-            if contact_count == 0:
-                print("Seeding sample contacts data...")
-                sample_contacts = [
-                    (1, 'John Smith', 'john.smith@morganstanley.com', '555-0101', 'Morgan Stanley',
-                     '200 West St, New York, NY', '12345678', 'Senior Financial Advisor'),
-                    (1, 'Sarah Johnson', 'sarah.j@goldmansachs.com', '555-0102', 'Goldman Sachs',
-                     '200 West St, New York, NY', '23456789', 'Vice President'),
-                    (1, 'Michael Brown', 'mbrown@jpmorgan.com', '555-0103', 'JPMorgan Chase',
-                     '383 Madison Ave, New York, NY', '34567890', 'Managing Director'),
-                    (1, 'Emily Davis', 'emily.davis@bofa.com', '555-0104', 'Bank of America',
-                     '100 N Tryon St, Charlotte, NC', '45678901', 'Financial Advisor'),
-                    (1, 'Robert Wilson', 'rwilson@wellsfargo.com', '555-0105', 'Wells Fargo',
-                     '420 Montgomery St, San Francisco, CA', '56789012', 'Senior Advisor'),
-                    (1, 'Jennifer Lee', 'jlee@citi.com', '555-0106', 'Citigroup', '388 Greenwich St, New York, NY',
-                     '67890123', 'Investment Advisor'),
-                    (1, 'David Martinez', 'dmartinez@db.com', '555-0107', 'Deutsche Bank', '60 Wall St, New York, NY',
-                     '78901234', 'Private Wealth Manager'),
-                    (1, 'Lisa Anderson', 'landerson@ubs.com', '555-0108', 'UBS',
-                     '1285 Avenue of the Americas, New York, NY', '89012345', 'Senior Portfolio Manager')
-                ]
-
-                for contact in sample_contacts:
-                    db.execute('''INSERT INTO contacts
-                                  (user_id, name, email, phone, firm, address, crd_number, title)
-                                  VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', contact)
 
-            db.commit()
-            print("Sample data seeding completed.")
+def get_data_version(db, user_id):
+    row = db.execute('SELECT version FROM data_versions WHERE user_id = ?', (user_id,)).fetchone()
+    return row['version'] if row else 0
+
+
+def bump_data_version(db, user_id):
+    """Mark a user's data as changed. Call before committing the write it belongs to."""
+    db.execute('''
+        INSERT INTO data_versions (user_id, version) VALUES (?, 1)
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1
+    ''', (user_id,))
+
+
+def cached_user_result(db, user_id, namespace, params, compute):
+    """Return compute() for this user and params, reusing a result cached at the current data version"""
+    key = f"{namespace}:{user_id}:{get_data_version(db, user_id)}:{json.dumps(params, sort_keys=True)}"
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        cache_stats['hits'] += 1
+        return value
 
+    cache_stats['misses'] += 1
+    value = compute()
+    cache.set(key, value)
+    return value
 
-init_notes_table()
-seed_sample_data()
 
 # --- Flask-Login Setup ---
 login_manager = LoginManager()
@@ -376,30 +1547,80 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'
 
 
-class User(UserMixin):
-    def __init__(self, id, email, name, password):
+# Every authenticated request loads its user, so users are cached in-process for a
+# short time instead of being read from the users table each time. Changes made by
+# this process call forget_user(); changes made elsewhere show up within the TTL.
+app.config['USER_CACHE_MAX_ENTRIES'] = 4096
+app.config['USER_CACHE_TTL'] = 60  # seconds
+
+user_cache = None
+
+
+def get_user_cache():
+    """Return the in-process user cache, creating it on first use"""
+    global user_cache
+    if user_cache is None:
+        user_cache = LocalCache(app.config['USER_CACHE_MAX_ENTRIES'], ttl=app.config['USER_CACHE_TTL'])
+    return user_cache
+
+
+class User:
+    """The logged-in user. Small and immutable so it can be cached; never holds the password."""
+    __slots__ = ('id', 'email', 'name')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id, email, name):
         self.id = id
         self.email = email
         self.name = name
-        self.password = password
+
+    def get_id(self):
+        return str(self.id)
+
+    def __eq__(self, other):
+        return isinstance(other, User) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
 
     @staticmethod
     def get(user_id):
+        user = get_user_cache().get(str(user_id))
+        if user is None:
+            db = get_db()
+            row = db.execute('SELECT id, email, name FROM users WHERE id = ?', (user_id,)).fetchone()
+            if row is None:
+                return None
+            user = User(row['id'], row['email'], row['name'])
+            get_user_cache().set(str(user_id), user)
+        return user
+
+    @staticmethod
+    def get_by_email(email):
         db = get_db()
-        user = db.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+        user = db.execute('SELECT id, email, name FROM users WHERE email = ?', (email,)).fetchone()
         if user:
-            return User(user['id'], user['email'], user['name'], user['password'])
+            return User(user['id'], user['email'], user['name'])
         return None
 
     @staticmethod
-    def get_by_email(email):
+    def authenticate(email, password):
+        """Return the user with this email and password, or None"""
         db = get_db()
-        user = db.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
-        if user:
-            return User(user['id'], user['email'], user['name'], user['password'])
+        user = db.execute('SELECT id, email, name, password FROM users WHERE email = ?', (email,)).fetchone()
+        if user and user['password'] == password:
+            return User(user['id'], user['email'], user['name'])
         return None
 
 
+def forget_user(user_id):
+    """Drop a user from the cache. Call after changing their row in the users table."""
+    get_user_cache().delete(str(user_id))
+
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.get(user_id)
@@ -425,8 +1646,8 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
 
-        user = User.get_by_email(email)
-        if user and user.password == password:
+        user = User.authenticate(email, password)
+        if user:
             login_user(user)
             flash('Login successful!', 'success')
             return redirect(url_for('contacts'))
@@ -452,8 +1673,9 @@ def signup():
             flash('Password must be at least 6 characters', 'error')
         else:
             db = get_db()
-            db.execute('INSERT INTO users (email, password, name) VALUES (?, ?, ?)', (email, password, name))
+            cursor = db.execute('INSERT INTO users (email, password, name) VALUES (?, ?, ?)', (email, password, name))
             db.commit()
+            forget_user(cursor.lastrowid)
 
             user = User.get_by_email(email)
             login_user(user)
@@ -507,35 +1729,10 @@ def calendar_view():
     else:
         end_date = f"{year}-{month + 1:02d}-01"
 
-    calendar_notes = db.execute('''
-        SELECT * FROM calendar_notes 
-        WHERE user_id = ? AND note_date >= ? AND note_date < ?
-        ORDER BY note_date, created_at
-    ''', (current_user.id, start_date, end_date)).fetchall()
-
-    # Get opportunity reminders for this month
-    opportunity_reminders = db.execute('''
-        SELECT id, title, reminder 
-        FROM opportunities 
-        WHERE user_id = ? AND reminder IS NOT NULL 
-        AND DATE(reminder) >= ? AND DATE(reminder) < ?
-        ORDER BY reminder
-    ''', (current_user.id, start_date, end_date)).fetchall()
-
     # Organize notes and reminders by date
-    notes_by_date = {}
-    for note in calendar_notes:
-        date_key = note['note_date']
-        if date_key not in notes_by_date:
-            notes_by_date[date_key] = []
-        notes_by_date[date_key].append(note)
-
-    reminders_by_date = {}
-    for reminder in opportunity_reminders:
-        date_key = reminder['reminder'][:10]  # Extract date part
-        if date_key not in reminders_by_date:
-            reminders_by_date[date_key] = []
-        reminders_by_date[date_key].append(reminder)
+    days = calendar_days(db, current_user.id, start_date, end_date)
+    notes_by_date = {day: items['notes'] for day, items in days.items() if items['notes']}
+    reminders_by_date = {day: items['reminders'] for day, items in days.items() if items['reminders']}
 
     return render_template('calendar.html',
                            year=year,
@@ -548,64 +1745,425 @@ def calendar_view():
                            next_year=next_year,
                            notes_by_date=notes_by_date,
                            reminders_by_date=reminders_by_date,
+                           ics_url=url_for('calendar_feed', token=calendar_feed_token(current_user.id), _external=True),
                            today=now.date())
 
 
-@app.route('/contacts')
+# --- Calendar Range API and ICS Feed ---
+MAX_CALENDAR_RANGE_DAYS = 366
+
+# Notes and reminders for a date range in one pass over the two (user_id, date) indexes
+CALENDAR_ENTRIES_SQL = '''
+    SELECT 'note' AS kind, id, note_date AS day, content AS text, created_at AS at
+    FROM calendar_notes
+    WHERE user_id = ? AND note_date >= ? AND note_date < ?
+    UNION ALL
+    SELECT 'reminder', id, substr(reminder, 1, 10), title, reminder
+    FROM opportunities
+    WHERE user_id = ? AND reminder >= ? AND reminder < ?
+    ORDER BY day, at
+'''
+
+
+def calendar_days(db, user_id, start_date, end_date):
+    """Notes and reminders from start_date up to (not including) end_date, keyed by YYYY-MM-DD"""
+    days = {}
+    for row in db.execute(CALENDAR_ENTRIES_SQL, (user_id, start_date, end_date) * 2):
+        items = days.setdefault(row['day'], {'notes': [], 'reminders': []})
+        if row['kind'] == 'note':
+            items['notes'].append({'id': row['id'], 'content': row['text'], 'created_at': row['at']})
+        else:
+            items['reminders'].append({'id': row['id'], 'title': row['text'], 'reminder': row['at']})
+    return days
+
+
+@app.route('/api/calendar', methods=['GET'])
 @login_required
-def contacts():
+def api_calendar():
+    """Get notes and reminders bucketed by day for ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive)"""
+    try:
+        start = datetime.strptime(request.args.get('from', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('to', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'from and to must be dates in YYYY-MM-DD format'}), 400
+    if end < start:
+        return jsonify({'error': 'to must not be before from'}), 400
+    if (end - start).days >= MAX_CALENDAR_RANGE_DAYS:
+        return jsonify({'error': f'The range can span at most {MAX_CALENDAR_RANGE_DAYS} days'}), 400
+
     db = get_db()
+    params = {'from': start.isoformat(), 'to': end.isoformat()}
+    days = cached_user_result(db, current_user.id, 'calendar', params, lambda: calendar_days(
+        db, current_user.id, start.isoformat(), (end + timedelta(days=1)).isoformat()))
+    return jsonify({**params, 'days': days})
+
+
+def calendar_feed_token(user_id):
+    """Secret token identifying a user's calendar feed, for clients that can't log in"""
+    signature = hmac.new(app.secret_key.encode(), f'calendar-feed:{user_id}'.encode(), hashlib.sha256)
+    return f"{user_id}-{signature.hexdigest()[:32]}"
+
+
+def ics_escape(text):
+    return (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,') \
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def ics_line(name, value):
+    """A content line folded at 75 octets as RFC 5545 requires"""
+    line = f"{name}:{value}"
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, current = [], ''
+    for char in line:
+        limit = 75 if not parts else 74  # continuation lines start with a space
+        if len((current + char).encode('utf-8')) > limit:
+            parts.append(current)
+            current = ''
+        current += char
+    parts.append(current)
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def ics_datetime(value):
+    """DTSTART property for a stored date or datetime: all-day for dates, floating local time otherwise"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if len(value) <= 10:
+        return 'DTSTART;VALUE=DATE', parsed.strftime('%Y%m%d')
+    return 'DTSTART', parsed.strftime('%Y%m%dT%H%M%S')
+
+
+def generate_ics(user_id, host):
+    """Yield the user's calendar notes and opportunity reminders as an iCalendar feed.
+
+    Like generate_csv(), this runs after the request's connection has been closed, so it
+    reads through a connection of its own.
+    """
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    yield ''.join([
+        'BEGIN:VCALENDAR\r\n',
+        'VERSION:2.0\r\n',
+        'PRODID:-//Bluefin CRM//Calendar//EN\r\n',
+        'CALSCALE:GREGORIAN\r\n',
+        ics_line('X-WR-CALNAME', 'Bluefin CRM'),
+    ])
+    with closing(connect_db()) as db:
+        cursor = db.execute('''
+            SELECT 'note' AS kind, id, note_date AS at, content AS text FROM calendar_notes WHERE user_id = ?
+            UNION ALL
+            SELECT 'reminder', id, reminder, title FROM opportunities WHERE user_id = ? AND reminder IS NOT NULL
+        ''', (user_id, user_id))
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            events = []
+            for row in rows:
+                start = ics_datetime(row['at'])
+                if start is None:
+                    continue
+                summary = row['text'] if row['kind'] == 'note' else f"Reminder: {row['text']}"
+                events.append(''.join([
+                    'BEGIN:VEVENT\r\n',
+                    ics_line('UID', f"{row['kind']}-{row['id']}@{host}"),
+                    ics_line('DTSTAMP', stamp),
+                    ics_line(*start),
+                    ics_line('SUMMARY', ics_escape(summary)),
+                    'END:VEVENT\r\n',
+                ]))
+            yield ''.join(events)
+    yield 'END:VCALENDAR\r\n'
+
+
+@app.route('/calendar/<token>.ics', methods=['GET'])
+def calendar_feed(token):
+    """Subscribable iCalendar feed of a user's notes and reminders, authenticated by its token.
+
+    The ETag is the user's data version, so clients polling an unchanged calendar get a
+    304 without the feed being generated.
+    """
+    user_id, _, _ = token.partition('-')
+    if not user_id.isdigit() or not hmac.compare_digest(token, calendar_feed_token(int(user_id))):
+        abort(404)
+    user_id = int(user_id)
+
+    etag = f"calendar-{user_id}-{get_data_version(get_db(), user_id)}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(generate_ics(user_id, request.host), mimetype='text/calendar')
+        response.headers['Content-Disposition'] = 'inline; filename=bluefin.ics'
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+# --- Contact Listing ---
+CONTACTS_PAGE_SIZE = 50
+MAX_CONTACTS_PAGE_SIZE = 200
+
+app.config['CONTACTS_PAGE_SIZE'] = CONTACTS_PAGE_SIZE
+
+# Registered account count per contact, answered from idx_registered_accounts_contact
+ACCOUNT_COUNT_SQL = '''(SELECT COUNT(*) FROM registered_accounts ra
+                         WHERE ra.contact_id = c.id AND ra.user_id = c.user_id)'''
+
+# Values of the "# of Accounts" filter mapped to inclusive (low, high) bounds
+ACCOUNT_COUNT_RANGES = {
+    '0': (0, 0),
+    '1-5': (1, 5),
+    '6-10': (6, 10),
+    '10+': (11, None),
+}
 
-    # Get filter parameters from query string
-    firm_filter = request.args.get('firm', '').strip()
-    accounts_filter = request.args.get('accounts', '').strip()
-    start_date = request.args.get('start_date', '').strip()
-    end_date = request.args.get('end_date', '').strip()
-
-    # Base query with LEFT JOIN to count registered accounts
-    base_query = '''
-        SELECT c.*, 
-               COUNT(ra.id) as account_count
-        FROM contacts c
-        LEFT JOIN registered_accounts ra ON c.id = ra.contact_id AND ra.user_id = c.user_id
-        WHERE c.user_id = ?
-    '''
 
-    query_params = [current_user.id]
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque URL-safe token"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
 
-    # Add firm filter
-    if firm_filter:
-        base_query += ' AND c.firm = ?'
-        query_params.append(firm_filter)
 
-    # Add date range filters
-    if start_date:
-        base_query += ' AND DATE(c.created_at) >= ?'
-        query_params.append(start_date)
-
-    if end_date:
-        base_query += ' AND DATE(c.created_at) <= ?'
-        query_params.append(end_date)
+def decode_cursor(cursor, size=2):
+    """Decode a token from encode_cursor(), raising ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    # Only scalars can be bound as query parameters
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def get_contact_filters(args):
+    """Read the contact list filters (firm, accounts, start_date, end_date) from query args"""
+    return {name: args.get(name, '').strip() for name in ('firm', 'accounts', 'start_date', 'end_date')}
+
+
+def contact_filter_clause(user_id, filters):
+    """Build the WHERE clause and params for the contact list filters on alias `c`"""
+    clause = 'c.user_id = ?'
+    params = [user_id]
+
+    if filters.get('firm'):
+        clause += ' AND c.firm = ?'
+        params.append(filters['firm'])
+
+    # Half-open range on the raw column so idx_contacts_user_created is used
+    if filters.get('start_date'):
+        clause += ' AND c.created_at >= ?'
+        params.append(filters['start_date'])
+
+    if filters.get('end_date'):
+        clause += ' AND c.created_at < ?'
+        params.append(day_after(filters['end_date']))
+
+    if filters.get('accounts') in ACCOUNT_COUNT_RANGES:
+        low, high = ACCOUNT_COUNT_RANGES[filters['accounts']]
+        clause += f' AND {ACCOUNT_COUNT_SQL} >= ?'
+        params.append(low)
+        if high is not None:
+            clause += f' AND {ACCOUNT_COUNT_SQL} <= ?'
+            params.append(high)
+
+    return clause, params
+
+
+def fetch_contacts_page(db, user_id, filters, cursor=None, limit=None):
+    """Return one page of contacts ordered by (name, id) and the cursor for the next page.
+
+    Pages are found by seeking past the last (name, id) seen rather than with OFFSET,
+    so every page costs the same no matter how deep into the list it is.
+    """
+    limit = limit or app.config['CONTACTS_PAGE_SIZE']
+    clause, params = contact_filter_clause(user_id, filters)
+
+    if cursor:
+        last_name, last_id = decode_cursor(cursor)
+        clause += ' AND (c.name, c.id) > (?, ?)'
+        params.extend([last_name, last_id])
+
+    rows = db.execute(f'''
+        SELECT c.*, {ACCOUNT_COUNT_SQL} AS account_count
+        FROM contacts c
+        WHERE {clause}
+        ORDER BY c.name, c.id
+        LIMIT ?
+    ''', params + [limit + 1]).fetchall()
+
+    contacts = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor([contacts[-1]['name'], contacts[-1]['id']])
+    return contacts, next_cursor
+
+
+# Rendered contact cards are cached one per contact under (id, updated_at, account_count),
+# which changes whenever anything shown on the card does, plus a hash of
+# contact_item.html. Lists are stitched together from cached cards and only changed
+# contacts are rendered again. Cards evicted from memory can be kept in files under
+# CONTACT_FRAGMENT_SPILL_DIR, which also survive restarts.
+app.config['CONTACT_FRAGMENT_CACHE_BYTES'] = 16 * 1024 * 1024
+app.config['CONTACT_FRAGMENT_SPILL_DIR'] = None  # e.g. 'cache/contact_cards'
+app.config['CONTACT_FRAGMENT_SPILL_MAX_FILES'] = 100000
+
+# Spilled files are pruned back to the limit after this many new ones are written
+FRAGMENT_SPILL_PRUNE_INTERVAL = 1000
+
+
+class FragmentCache:
+    """LRU cache of rendered HTML bounded by total size, optionally spilling evictions to disk"""
+
+    def __init__(self, max_bytes, spill_dir=None, max_spill_files=100000):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_files = max_spill_files
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+        self._entries = OrderedDict()
+        self._size = 0
+        self._spilled = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return html
+
+        html = self._read_spilled(key) if self.spill_dir else None
+        if html is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['disk_hits'] += 1
+        self.set(key, html)
+        return html
+
+    def set(self, key, html):
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = html
+            self._size += len(html)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                old_key, old_html = self._entries.popitem(last=False)
+                self._size -= len(old_html)
+                evicted.append((old_key, old_html))
+        if self.spill_dir:
+            for old_key, old_html in evicted:
+                self._spill(old_key, old_html)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        return self._size
+
+    def _spill_path(self, key):
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.spill_dir, name[:2], name + '.html')
+
+    def _read_spilled(self, key):
+        path = self._spill_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                html = f.read()
+            os.utime(path)  # pruning removes the least recently used files first
+            return html
+        except OSError:
+            return None
+
+    def _spill(self, key, html):
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Could not spill contact card to {path}: {e}")
+            return
+        self._spilled += 1
+        if self._spilled % FRAGMENT_SPILL_PRUNE_INTERVAL == 0:
+            self._prune()
+
+    def _prune(self):
+        """Delete the least recently used spilled files beyond max_spill_files"""
+        files = []
+        for folder, _, filenames in os.walk(self.spill_dir):
+            for filename in filenames:
+                path = os.path.join(folder, filename)
+                try:
+                    files.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass
+        if len(files) <= self.max_spill_files:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.max_spill_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+fragment_cache = None
+
+
+def get_fragment_cache():
+    """Return the contact card fragment cache, creating it on first use"""
+    global fragment_cache
+    if fragment_cache is None:
+        fragment_cache = FragmentCache(app.config['CONTACT_FRAGMENT_CACHE_BYTES'],
+                                       spill_dir=app.config['CONTACT_FRAGMENT_SPILL_DIR'],
+                                       max_spill_files=app.config['CONTACT_FRAGMENT_SPILL_MAX_FILES'])
+    return fragment_cache
+
+
+def render_contact_items(contacts):
+    """Render contact cards for a list of contacts (with account_count), reusing cached cards"""
+    template = app.jinja_env.get_template('contact_item.html')
+    template_version = asset_hash(template.filename)
+    cache = get_fragment_cache()
+    parts = []
+    for contact in contacts:
+        key = f"{template_version}:{contact['id']}:{contact['updated_at']}:{contact['account_count']}"
+        html = cache.get(key)
+        if html is None:
+            html = template.render(contacts=[contact])
+            cache.set(key, html)
+        parts.append(html)
+    return Markup(''.join(parts))
 
-    # Group by contact to get proper count
-    base_query += ' GROUP BY c.id'
 
-    # Add account count filter (applied after grouping)
-    if accounts_filter:
-        if accounts_filter == '0':
-            base_query += ' HAVING account_count = 0'
-        elif accounts_filter == '1-5':
-            base_query += ' HAVING account_count BETWEEN 1 AND 5'
-        elif accounts_filter == '6-10':
-            base_query += ' HAVING account_count BETWEEN 6 AND 10'
-        elif accounts_filter == '10+':
-            base_query += ' HAVING account_count > 10'
+@app.route('/contacts')
+@login_required
+def contacts():
+    db = get_db()
 
-    # Add final ordering
-    base_query += ' ORDER BY c.name'
+    # Get filter parameters from query string
+    filters = get_contact_filters(request.args)
 
-    # Execute the main query
-    contacts = db.execute(base_query, query_params).fetchall()
+    # Only the first page is rendered, the rest is fetched from /api/contacts on scroll
+    contacts_list, next_cursor = fetch_contacts_page(db, current_user.id, filters)
 
     # Get distinct firms for the dropdown (only firms that have contacts)
     firms_query = '''
@@ -617,18 +2175,213 @@ def contacts():
     firms_result = db.execute(firms_query, (current_user.id,)).fetchall()
     firms = [row['firm'] for row in firms_result]
 
-    # Convert contacts to list of dicts to make them easier to work with in template
-    contacts_list = []
-    for contact in contacts:
-        contact_dict = dict(contact)
-        contacts_list.append(contact_dict)
-
     return render_template('card.html',
                            contacts=contacts_list,
+                           contact_items=render_contact_items(contacts_list),
+                           next_cursor=next_cursor,
                            firms=firms,
                            request=request)  # Pass request object for template access to args
 
 
+@app.route('/api/contacts', methods=['GET'])
+@login_required
+def api_get_contacts():
+    """Get a page of contacts, accepting the same filters as /contacts plus a cursor"""
+    try:
+        limit = min(max(int(request.args.get('limit', app.config['CONTACTS_PAGE_SIZE'])), 1),
+                    MAX_CONTACTS_PAGE_SIZE)
+        contacts_list, next_cursor = fetch_contacts_page(get_db(), current_user.id,
+                                                         get_contact_filters(request.args),
+                                                         cursor=request.args.get('cursor'), limit=limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'contacts': contacts_list,
+        'html': render_contact_items(contacts_list),
+        'next_cursor': next_cursor,
+    })
+
+
+# --- Search ---
+SEARCH_RESULT_LIMIT = 20
+MAX_SEARCH_RESULT_LIMIT = 100
+
+
+def fts_query(text):
+    """Turn free text typed by a user into an FTS5 query matching every word as a prefix.
+
+    Each word is quoted so characters like '-', ':' or '"' are searched for rather than
+    parsed as FTS5 query syntax.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join('"{}"*'.format(word) for word in words)
+
+
+def search_records(db, user_id, text, limit=SEARCH_RESULT_LIMIT):
+    """Search a user's contacts, contact notes and registered accounts, best matches first"""
+    query = fts_query(text)
+    if not query:
+        return {'contacts': [], 'notes': [], 'accounts': []}
+
+    # bm25() weights follow the FTS column order; a name or CRD hit outranks a title hit
+    contacts_found = db.execute(f'''
+        SELECT c.*, {ACCOUNT_COUNT_SQL} AS account_count,
+               bm25(contacts_fts, 10.0, 5.0, 2.0, 1.0, 5.0) AS rank
+        FROM contacts_fts
+        JOIN contacts c ON c.id = contacts_fts.rowid
+        WHERE contacts_fts MATCH ? AND c.user_id = ?
+        ORDER BY rank
+        LIMIT ?
+    ''', (query, user_id, limit)).fetchall()
+
+    notes_found = db.execute('''
+        SELECT cn.id, cn.contact_id, c.name AS contact_name, cn.created_at,
+               snippet(contact_notes_fts, 0, '', '', '…', 12) AS snippet,
+               bm25(contact_notes_fts) AS rank
+        FROM contact_notes_fts
+        JOIN contact_notes cn ON cn.id = contact_notes_fts.rowid
+        JOIN contacts c ON c.id = cn.contact_id
+        WHERE contact_notes_fts MATCH ? AND cn.user_id = ?
+        ORDER BY rank
+        LIMIT ?
+    ''', (query, user_id, limit)).fetchall()
+
+    accounts_found = db.execute('''
+        SELECT ra.id, ra.contact_id, c.name AS contact_name, ra.account_number, ra.client_name,
+               ra.strategy, ra.status, bm25(registered_accounts_fts, 5.0, 2.0, 1.0) AS rank
+        FROM registered_accounts_fts
+        JOIN registered_accounts ra ON ra.id = registered_accounts_fts.rowid
+        JOIN contacts c ON c.id = ra.contact_id
+        WHERE registered_accounts_fts MATCH ? AND ra.user_id = ?
+        ORDER BY rank
+        LIMIT ?
+    ''', (query, user_id, limit)).fetchall()
+
+    return {
+        'contacts': [dict(row) for row in contacts_found],
+        'notes': [dict(row) for row in notes_found],
+        'accounts': [dict(row) for row in accounts_found],
+    }
+
+
+@app.route('/api/search', methods=['GET'])
+@login_required
+def api_search():
+    """Full-text search across the current user's contacts, notes and registered accounts"""
+    text = request.args.get('q', '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit', SEARCH_RESULT_LIMIT)), 1), MAX_SEARCH_RESULT_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    results = search_records(get_db(), current_user.id, text, limit)
+    results['query'] = text
+    results['html'] = render_contact_items(results['contacts'])
+    return jsonify(results)
+
+
+# --- CSV Export ---
+EXPORT_BATCH_SIZE = 500
+
+# Export name -> query. {where} is filled in with the contact list filters on alias `c`
+# (the exported rows' contact), except for opportunities which only filter by user.
+EXPORT_QUERIES = {
+    'contacts': f'''
+        SELECT c.id, c.name, c.email, c.phone, c.firm, c.address, c.title, c.crd_number,
+               {ACCOUNT_COUNT_SQL} AS account_count, c.created_at, c.updated_at
+        FROM contacts c
+        WHERE {{where}}
+        ORDER BY c.name, c.id
+    ''',
+    'registered_accounts': '''
+        SELECT ra.id, ra.contact_id, c.name AS contact_name, ra.account_number, ra.client_name, ra.strategy,
+               ra.inception_value, ra.fee_percent, ra.open_date, ra.status, ra.created_at, ra.updated_at
+        FROM contacts c
+        JOIN registered_accounts ra ON ra.contact_id = c.id AND ra.user_id = c.user_id
+        WHERE {where}
+        ORDER BY c.name, c.id, ra.id
+    ''',
+    'contact_notes': '''
+        SELECT cn.id, cn.contact_id, c.name AS contact_name, cn.content, cn.created_at, cn.updated_at
+        FROM contacts c
+        JOIN contact_notes cn ON cn.contact_id = c.id AND cn.user_id = c.user_id
+        WHERE {where}
+        ORDER BY c.name, c.id, cn.id
+    ''',
+    'opportunities': '''
+        SELECT o.id, o.title, o.contact, o.salesperson, o.amount, o.probability, o.stage, o.close_date,
+               o.notes, o.reminder, o.created_at, o.updated_at
+        FROM opportunities o
+        WHERE o.user_id = ?
+        ORDER BY o.id
+    ''',
+}
+
+
+class CSVLineBuffer:
+    """File-like object that hands back what csv.writer writes instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def generate_csv(query, params):
+    """Yield a query's rows as CSV text, a batch of EXPORT_BATCH_SIZE rows per chunk.
+
+    The generator runs after the view has returned and the request's connection has
+    been closed, so it reads through a connection of its own.
+    """
+    writer = csv.writer(CSVLineBuffer())
+    with closing(connect_db()) as db:
+        cursor = db.execute(query, params)
+        yield writer.writerow([column[0] for column in cursor.description])
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield ''.join(writer.writerow(row) for row in rows)
+
+
+def gzip_chunks(chunks):
+    """Gzip-compress a stream of text chunks as it is produced"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@app.route('/export/<entity>.csv', methods=['GET'])
+@login_required
+def export_csv(entity):
+    """Stream one of the user's tables as CSV, with the same filters as /contacts.
+
+    Rows are read from the cursor in batches while the response is being sent, so
+    memory use stays flat however large the export is. Pass gzip=1 for a .csv.gz file.
+    """
+    if entity not in EXPORT_QUERIES:
+        return jsonify({'error': f'Unknown export: {entity}'}), 404
+
+    if entity == 'opportunities':
+        query, params = EXPORT_QUERIES[entity], [current_user.id]
+    else:
+        clause, params = contact_filter_clause(current_user.id, get_contact_filters(request.args))
+        query = EXPORT_QUERIES[entity].format(where=clause)
+
+    filename = f"{entity}-{datetime.now().strftime('%Y%m%d')}.csv"
+
+    if request.args.get('gzip') in ('1', 'true'):
+        body, mimetype, filename = gzip_chunks(generate_csv(query, params)), 'application/gzip', filename + '.gz'
+    else:
+        body, mimetype = generate_csv(query, params), 'text/csv'
+
+    response = Response(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @app.route('/spreadsheet')
 @login_required
 def spreadsheet():
@@ -637,6 +2390,131 @@ def spreadsheet():
     return render_template('spreadsheet.html', contacts=contacts)
 
 
+# --- Analytics ---
+def month_bounds(start_date, end_date):
+    """Split an inclusive date range into whole months and the partial days at either end.
+
+    Returns (first_month, last_month) as 'YYYY-MM' strings, either of which is None when
+    that side is unbounded, plus a list of inclusive (start, end) day ranges that fall
+    outside the whole months. Raises ValueError for dates that aren't YYYY-MM-DD.
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+    end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    partial_ranges = []
+
+    first_month = None
+    if start:
+        first_month = start.replace(day=1)
+        if start.day != 1:
+            first_month = (first_month + timedelta(days=32)).replace(day=1)
+            partial_ranges.append((start, first_month - timedelta(days=1)))
+
+    last_month = None
+    if end:
+        last_month = end.replace(day=1)
+        if end.day != calendar.monthrange(end.year, end.month)[1]:
+            partial_ranges.append((last_month, end))
+            last_month = (last_month - timedelta(days=1)).replace(day=1)
+
+    if first_month and last_month and first_month > last_month:
+        # The range doesn't cover a whole month, so it is answered from the days alone
+        return first_month.strftime('%Y-%m'), last_month.strftime('%Y-%m'), [(str(start), str(end))]
+
+    return (first_month.strftime('%Y-%m') if first_month else None,
+            last_month.strftime('%Y-%m') if last_month else None,
+            [(str(low), str(high)) for low, high in partial_ranges])
+
+
+def opportunity_stage_totals(db, user_id, start_date=None, end_date=None):
+    """Count and sum a user's opportunities by stage, optionally by close date range.
+
+    Whole months are read from the opportunity_stats summary rows. Days at the edges of
+    the range that don't make up a whole month are counted from the opportunities table
+    through idx_opportunities_forecast.
+    """
+    totals = {}
+
+    def add(rows):
+        for row in rows:
+            count, amount = totals.get(row['stage'], (0, 0))
+            totals[row['stage']] = (count + row['count'], amount + (row['amount'] or 0))
+
+    if not start_date and not end_date:
+        add(db.execute('''
+            SELECT stage, SUM(opportunity_count) AS count, SUM(amount_total) AS amount
+            FROM opportunity_stats WHERE user_id = ? GROUP BY stage
+        ''', (user_id,)))
+        return totals
+
+    try:
+        first_month, last_month, partial_ranges = month_bounds(start_date, end_date)
+    except ValueError:
+        # Not a date we can bucket, compare against the raw column as before
+        first_month, last_month, partial_ranges = None, None, None
+
+    if partial_ranges is None:
+        query = 'SELECT stage, COUNT(*) AS count, SUM(amount) AS amount FROM opportunities WHERE user_id = ?'
+        params = [user_id]
+        if start_date:
+            query += ' AND close_date >= ?'
+            params.append(start_date)
+        if end_date:
+            query += ' AND close_date <= ?'
+            params.append(end_date)
+        add(db.execute(query + ' GROUP BY stage', params))
+        return totals
+
+    if not (first_month and last_month and first_month > last_month):
+        query = '''
+            SELECT stage, SUM(opportunity_count) AS count, SUM(amount_total) AS amount
+            FROM opportunity_stats WHERE user_id = ? AND close_month != ''
+        '''
+        params = [user_id]
+        if first_month:
+            query += ' AND close_month >= ?'
+            params.append(first_month)
+        if last_month:
+            query += ' AND close_month <= ?'
+            params.append(last_month)
+        add(db.execute(query + ' GROUP BY stage', params))
+
+    for low, high in partial_ranges:
+        query = '''
+            SELECT stage, COUNT(*) AS count, SUM(amount) AS amount
+            FROM opportunities WHERE user_id = ? AND close_date >= ? AND close_date < ?
+            GROUP BY stage
+        '''
+        add(db.execute(query, (user_id, low, day_after(high))))
+
+    return totals
+
+
+def build_analytics(db, user_id, start_date, end_date):
+    """Compute the figures shown on the analytics page"""
+    # Opportunities by stage, read from the trigger-maintained summary rows
+    stage_totals = opportunity_stage_totals(db, user_id, start_date, end_date)
+    opp_by_stage_data = [{'stage': stage, 'count': count, 'amount': amount}
+                         for stage, (count, amount) in sorted(stage_totals.items()) if count]
+    total_opportunities = sum(item['count'] for item in opp_by_stage_data)
+
+    # Contacts by firm, '' holds the contacts without a firm
+    firm_rows = db.execute('''
+        SELECT firm, contact_count AS count
+        FROM contact_firm_stats
+        WHERE user_id = ?
+        ORDER BY firm
+    ''', (user_id,)).fetchall()
+    contacts_by_firm_data = [{'firm': row['firm'], 'count': row['count']} for row in firm_rows if row['firm']]
+    total_contacts = sum(row['count'] for row in firm_rows)
+
+    return {
+        'opp_by_stage': opp_by_stage_data,
+        'contacts_by_firm': contacts_by_firm_data,
+        'total_opportunities': total_opportunities,
+        'total_contacts': total_contacts,
+    }
+
+
 @app.route('/analytics&reports')
 @login_required
 def analytics_reports():
@@ -646,74 +2524,18 @@ def analytics_reports():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
 
-    # Base query for opportunities by stage
-    opp_stage_query = '''
-        SELECT stage, COUNT(*) AS count 
-        FROM opportunities 
-        WHERE user_id = ?
-    '''
-    opp_stage_params = [current_user.id]
-
-    # Add date filtering if provided
-    if start_date and end_date:
-        opp_stage_query += ' AND close_date BETWEEN ? AND ?'
-        opp_stage_params.extend([start_date, end_date])
-    elif start_date:
-        opp_stage_query += ' AND close_date >= ?'
-        opp_stage_params.append(start_date)
-    elif end_date:
-        opp_stage_query += ' AND close_date <= ?'
-        opp_stage_params.append(end_date)
-
-    opp_stage_query += ' GROUP BY stage'
-
-    # Execute queries
-    opp_by_stage = db.execute(opp_stage_query, opp_stage_params).fetchall()
-
-    # Contacts by firm query
-    contacts_by_firm = db.execute('''
-        SELECT firm, COUNT(*) AS count 
-        FROM contacts 
-        WHERE user_id = ? AND firm IS NOT NULL AND firm != ''
-        GROUP BY firm
-    ''', (current_user.id,)).fetchall()
-
-    # Get total counts
-    total_opportunities_query = '''
-        SELECT COUNT(*) AS count 
-        FROM opportunities 
-        WHERE user_id = ?
-    '''
-    total_opp_params = [current_user.id]
-
-    if start_date and end_date:
-        total_opportunities_query += ' AND close_date BETWEEN ? AND ?'
-        total_opp_params.extend([start_date, end_date])
-    elif start_date:
-        total_opportunities_query += ' AND close_date >= ?'
-        total_opp_params.append(start_date)
-    elif end_date:
-        total_opportunities_query += ' AND close_date <= ?'
-        total_opp_params.append(end_date)
-
-    total_opportunities = db.execute(total_opportunities_query, total_opp_params).fetchone()['count']
-    total_contacts = \
-        db.execute('SELECT COUNT(*) AS count FROM contacts WHERE user_id = ?', (current_user.id,)).fetchone()['count']
-
-    # Convert to list of dictionaries for JSON serialization
-    opp_by_stage_data = [{'stage': row['stage'], 'count': row['count']} for row in opp_by_stage]
-    contacts_by_firm_data = [{'firm': row['firm'], 'count': row['count']} for row in contacts_by_firm]
+    analytics = cached_user_result(db, current_user.id, 'analytics',
+                                   {'start_date': start_date, 'end_date': end_date},
+                                   lambda: build_analytics(db, current_user.id, start_date, end_date))
 
     return render_template('analytics&reports.html',
-                           opp_by_stage=opp_by_stage_data,
-                           contacts_by_firm=contacts_by_firm_data,
-                           total_opportunities=total_opportunities,
-                           total_contacts=total_contacts,
                            start_date=start_date,
-                           end_date=end_date)
+                           end_date=end_date,
+                           **analytics)
 
 
 @app.route('/upload')
+@login_required
 def upload():
     return render_template('upload.html')
 
@@ -726,10 +2548,22 @@ def contact_card():
         return redirect(url_for('contacts'))
 
     db = get_db()
-    contact = db.execute('''
-        SELECT * FROM contacts 
-        WHERE id = ? AND user_id = ?
-    ''', (contact_id, current_user.id)).fetchone()
+    # The contact with its pipeline rollup, joined through idx_opportunities_contact
+    closed = ', '.join('?' for _ in CLOSED_STAGES)
+    contact = db.execute(f'''
+        SELECT c.*,
+               COUNT(o.id) AS opportunity_count,
+               COUNT(CASE WHEN o.stage NOT IN ({closed}) THEN 1 END) AS open_count,
+               TOTAL(CASE WHEN o.stage NOT IN ({closed}) THEN o.amount END) AS open_amount,
+               TOTAL(CASE WHEN o.stage NOT IN ({closed}) THEN o.amount * o.probability / 100.0 END)
+                   AS weighted_amount,
+               COUNT(CASE WHEN o.stage = 'closed-won' THEN 1 END) AS won_count,
+               TOTAL(CASE WHEN o.stage = 'closed-won' THEN o.amount END) AS won_amount
+        FROM contacts c
+        LEFT JOIN opportunities o ON o.contact_id = c.id
+        WHERE c.id = ? AND c.user_id = ?
+        GROUP BY c.id
+    ''', (*CLOSED_STAGES, *CLOSED_STAGES, *CLOSED_STAGES, contact_id, current_user.id)).fetchone()
 
     if not contact:
         flash('Contact not found', 'error')
@@ -773,6 +2607,7 @@ def add_calendar_note():
               datetime.now().isoformat(), datetime.now().isoformat()))
 
         note_id = cursor.lastrowid
+        bump_data_version(db, current_user.id)
         db.commit()
 
         # Return the created note
@@ -802,6 +2637,7 @@ def delete_calendar_note(note_id):
         # Delete the note
         db.execute('DELETE FROM calendar_notes WHERE id = ? AND user_id = ?',
                    (note_id, current_user.id))
+        bump_data_version(db, current_user.id)
         db.commit()
 
         return jsonify({'message': 'Note deleted successfully'})
@@ -832,7 +2668,9 @@ def delete_opportunity_reminder(opportunity_id):
             SET reminder = NULL, updated_at = ?
             WHERE id = ? AND user_id = ?
         ''', (datetime.now().isoformat(), opportunity_id, current_user.id))
+        bump_data_version(db, current_user.id)
         db.commit()
+        notify_reminder_changed(opportunity_id, None)
 
         return jsonify({'message': 'Reminder deleted successfully'})
 
@@ -840,10 +2678,66 @@ def delete_opportunity_reminder(opportunity_id):
         return jsonify({'error': str(e)}), 500
 
 
+# --- Profile Picture Processing ---
+# Resizing and encoding run in a small process pool so request threads only save the
+# upload. The contact row is updated when the variants have been written.
+app.config['IMAGE_WORKERS'] = 2
+app.config['IMAGE_MAX_PENDING'] = 16
+
+image_pool = None
+pending_image_jobs = 0
+image_jobs_lock = threading.Lock()
+
+
+def get_image_pool():
+    """Return the image worker pool, starting it on first use"""
+    global image_pool
+    if image_pool is None:
+        image_pool = ProcessPoolExecutor(max_workers=app.config['IMAGE_WORKERS'])
+    return image_pool
+
+
+def finish_profile_picture(future, contact_id, user_id, stem, source_path):
+    """Point the contact at its new picture once the worker has written the variants"""
+    global pending_image_jobs
+    with image_jobs_lock:
+        pending_image_jobs -= 1
+    try:
+        os.remove(source_path)
+    except OSError:
+        pass
+
+    picture_url = f"/static/uploads/profile_pictures/{stem}_{PROFILE_PICTURE_SIZES['detail']}.jpg"
+    try:
+        future.result()
+    except Exception as e:
+        print(f"Error processing profile picture: {e}")
+        remove_profile_picture_files(picture_url)
+        return
+
+    with closing(connect_db()) as conn, conn as db:
+        contact = db.execute('SELECT profile_picture FROM contacts WHERE id = ? AND user_id = ?',
+                             (contact_id, user_id)).fetchone()
+        if not contact:
+            remove_profile_picture_files(picture_url)
+            return
+        db.execute('''
+            UPDATE contacts 
+            SET profile_picture = ?, updated_at = ?
+            WHERE id = ? AND user_id = ?
+        ''', (picture_url, datetime.now().isoformat(), contact_id, user_id))
+        bump_data_version(db, user_id)
+
+    # Delete old profile picture if it exists
+    if contact['profile_picture'] and contact['profile_picture'] != picture_url:
+        remove_profile_picture_files(contact['profile_picture'])
+
+
 @app.route('/upload_profile_picture', methods=['POST'])
 @login_required
 def upload_profile_picture():
-    """Upload and save profile picture for a contact"""
+    """Upload a profile picture for a contact and queue it for resizing"""
+    global pending_image_jobs
     try:
         contact_id = request.form.get('contact_id')
         if not contact_id:
@@ -872,40 +2766,29 @@ def upload_profile_picture():
             return redirect(url_for('contact_card', id=contact_id))
 
         if file and allowed_file(file.filename):
-            # Generate unique filename
+            with image_jobs_lock:
+                if pending_image_jobs >= app.config['IMAGE_MAX_PENDING']:
+                    flash('Image processing is busy, please try again in a moment.', 'error')
+                    return redirect(url_for('contact_card', id=contact_id))
+                pending_image_jobs += 1
+
+            # Save the upload under a unique name, the worker writes the variants beside it
+            stem = uuid.uuid4().hex
             file_extension = file.filename.rsplit('.', 1)[1].lower()
-            unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-
-            # Save file
-            file.save(file_path)
-
-            # Resize image
-            if resize_image(file_path):
-                # Delete old profile picture if it exists
-                if contact['profile_picture']:
-                    old_file_path = os.path.join('static', contact['profile_picture'].lstrip('/'))
-                    if os.path.exists(old_file_path):
-                        try:
-                            os.remove(old_file_path)
-                        except OSError:
-                            pass  # File might be in use or already deleted
-
-                # Update database with new profile picture path
-                profile_picture_url = f"/static/uploads/profile_pictures/{unique_filename}"
-                db.execute('''
-                    UPDATE contacts 
-                    SET profile_picture = ?, updated_at = ?
-                    WHERE id = ? AND user_id = ?
-                ''', (profile_picture_url, datetime.now().isoformat(), contact_id, current_user.id))
-                db.commit()
-
-                flash('Profile picture updated successfully!', 'success')
-            else:
-                # Remove file if resize failed
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                flash('Error processing image. Please try a different file.', 'error')
+            source_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{stem}.upload.{file_extension}")
+            try:
+                file.save(source_path)
+                future = get_image_pool().submit(create_image_variants, source_path,
+                                                 app.config['UPLOAD_FOLDER'], stem)
+            except Exception:
+                with image_jobs_lock:
+                    pending_image_jobs -= 1
+                raise
+            future.add_done_callback(functools.partial(finish_profile_picture, contact_id=int(contact_id),
+                                                       user_id=current_user.id, stem=stem,
+                                                       source_path=source_path))
+
+            flash('Profile picture uploaded, it will appear in a moment.', 'success')
         else:
             flash('Invalid file type. Please upload a PNG, JPG, JPEG, GIF, or WebP image.', 'error')
 
@@ -939,12 +2822,188 @@ def add_contact():
                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
                (current_user.id, name, email, phone, firm, address, crd_number, title,
                 current_time, current_time))
+    bump_data_version(db, current_user.id)
     db.commit()
 
     flash('Contact added successfully!', 'success')
     return redirect(url_for('contacts'))
 
 
+# --- Contact Import ---
+IMPORT_FOLDER = None  # uploads are spooled to the system temp dir, outside of static/
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_SIZE = 200 * 1024 * 1024  # 200MB
+MAX_REPORTED_IMPORT_ERRORS = 500
+
+app.config['IMPORT_FOLDER'] = IMPORT_FOLDER
+app.config['MAX_IMPORT_SIZE'] = MAX_IMPORT_SIZE
+
+# CSV header (lowercased, stripped) -> contacts column
+IMPORT_COLUMNS = {
+    'name': 'name',
+    'email': 'email',
+    'phone': 'phone',
+    'firm': 'firm',
+    'address': 'address',
+    'title': 'title',
+    'crd': 'crd_number',
+    'crd number': 'crd_number',
+    'crd_number': 'crd_number',
+}
+IMPORT_FIELDS = ('name', 'email', 'phone', 'firm', 'address', 'title', 'crd_number')
+
+
+def validate_import_row(row):
+    """Return an error message for a contact row that can't be imported, or None"""
+    if not row['name']:
+        return 'Name is required'
+    if row['email'] and '@' not in row['email']:
+        return 'Email address is not valid'
+    return None
+
+
+def run_contact_import(job_id, user_id, file_path):
+    """Stream a CSV file into the contacts table, committing it and its progress chunk by chunk.
+
+    Rows are read one at a time with the csv module and inserted with executemany in
+    chunks of IMPORT_CHUNK_SIZE, so memory use doesn't depend on the size of the file.
+    Each chunk is committed in its own short transaction together with the job's
+    progress, so other writers only wait for one chunk and every worker polling the job
+    sees it advance. A failed import keeps the chunks committed before the failure.
+    """
+    progress = {'processed_rows': 0, 'imported_rows': 0, 'error_count': 0, 'processed_bytes': 0}
+    errors = []
+    status = 'completed'
+
+    try:
+        with closing(connect_db()) as db, open(file_path, 'rb') as raw:
+            db.isolation_level = None  # manage the transactions explicitly
+            reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline=''))
+            header = next(reader, [])
+            columns = {IMPORT_COLUMNS[name.strip().lower()]: index for index, name in enumerate(header)
+                       if name.strip().lower() in IMPORT_COLUMNS}
+
+            if 'name' not in columns:
+                raise ValueError('CSV file must contain a "Name" column in the first row')
+
+            current_time = datetime.now().isoformat()
+            insert_sql = '''INSERT INTO contacts
+                            (user_id, name, email, phone, firm, address, title, crd_number, created_at, updated_at)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+            def commit_chunk(chunk):
+                db.execute('BEGIN IMMEDIATE')
+                try:
+                    if chunk:
+                        db.executemany(insert_sql, chunk)
+                        bump_data_version(db, user_id)
+                    db.execute('''
+                        UPDATE import_jobs
+                        SET processed_rows = ?, imported_rows = ?, error_count = ?, processed_bytes = ?
+                        WHERE id = ?
+                    ''', (progress['processed_rows'], progress['imported_rows'] + len(chunk),
+                          progress['error_count'], raw.tell(), job_id))
+                    db.execute('COMMIT')
+                except Exception:
+                    db.execute('ROLLBACK')
+                    raise
+                progress['imported_rows'] += len(chunk)
+
+            chunk = []
+            for row_number, values in enumerate(reader, start=2):
+                if not any(value.strip() for value in values):
+                    continue  # skip blank lines
+
+                row = {field: values[columns[field]].strip()
+                       if field in columns and columns[field] < len(values) else ''
+                       for field in IMPORT_FIELDS}
+                error = validate_import_row(row)
+                if error:
+                    progress['error_count'] += 1
+                    if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+                        errors.append({'row': row_number, 'error': error})
+                else:
+                    chunk.append((user_id,) + tuple(row[field] or None for field in IMPORT_FIELDS)
+                                 + (current_time, current_time))
+                progress['processed_rows'] += 1
+
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    commit_chunk(chunk)
+                    chunk = []
+
+            if chunk:
+                commit_chunk(chunk)
+    except Exception as e:
+        status = 'failed'
+        errors.insert(0, {'row': None, 'error': str(e)})
+    finally:
+        with closing(connect_db()) as conn, conn as db:
+            db.execute('''
+                UPDATE import_jobs
+                SET status = ?, processed_rows = ?, imported_rows = ?, error_count = ?, processed_bytes = total_bytes,
+                    errors = ?, finished_at = ?
+                WHERE id = ?
+            ''', (status, progress['processed_rows'], progress['imported_rows'], progress['error_count'],
+                  json.dumps(errors), datetime.now().isoformat(), job_id))
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+@app.route('/api/contacts/import', methods=['POST'])
+@login_required
+def api_import_contacts():
+    """Start importing an uploaded CSV of contacts and return the job to poll"""
+    try:
+        request.max_content_length = app.config['MAX_IMPORT_SIZE']
+        file = request.files.get('file')
+        if not file or not file.filename:
+            return jsonify({'error': 'No file selected'}), 400
+        if not file.filename.lower().endswith('.csv'):
+            return jsonify({'error': 'Please upload a CSV file'}), 400
+
+        fd, file_path = tempfile.mkstemp(suffix='.csv', dir=app.config['IMPORT_FOLDER'])
+        with os.fdopen(fd, 'wb') as destination:
+            file.save(destination)
+        total_bytes = os.path.getsize(file_path)
+
+        db = get_db()
+        cursor = db.execute('''
+            INSERT INTO import_jobs (user_id, filename, status, total_bytes, created_at)
+            VALUES (?, ?, 'running', ?, ?)
+        ''', (current_user.id, secure_filename(file.filename), total_bytes, datetime.now().isoformat()))
+        job_id = cursor.lastrowid
+        db.commit()
+
+        threading.Thread(target=run_contact_import, args=(job_id, current_user.id, file_path),
+                         daemon=True).start()
+
+        return jsonify({'id': job_id, 'status': 'running', 'url': url_for('api_get_import_job', job_id=job_id)}), 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/contacts/import/<int:job_id>', methods=['GET'])
+@login_required
+def api_get_import_job(job_id):
+    """Get the status and progress of a contact import"""
+    db = get_db()
+    job = db.execute('SELECT * FROM import_jobs WHERE id = ? AND user_id = ?',
+                     (job_id, current_user.id)).fetchone()
+    if not job:
+        return jsonify({'error': 'Import not found'}), 404
+
+    result = dict(job)
+    result['errors'] = json.loads(job['errors']) if job['errors'] else []
+    if job['status'] != 'running':
+        result['percent'] = 100
+    elif job['total_bytes']:
+        result['percent'] = round(100 * job['processed_bytes'] / job['total_bytes'], 1)
+    return jsonify(result)
+
+
 @app.route('/update_contact', methods=['POST'])
 @login_required
 def update_contact():
@@ -981,6 +3040,14 @@ def update_contact():
             contact_id,
             current_user.id
         ))
+        # Keep the display name on linked opportunities in step with the contact
+        name = request.form.get('name', existing['name'])
+        if name != existing['name']:
+            db.execute('''
+                UPDATE opportunities SET contact = ?, updated_at = ?
+                WHERE contact_id = ? AND user_id = ?
+            ''', (name, datetime.now().isoformat(), contact_id, current_user.id))
+        bump_data_version(db, current_user.id)
         db.commit()
 
         flash('Contact updated successfully!', 'success')
@@ -1019,6 +3086,7 @@ def add_contact_note():
             INSERT INTO contact_notes (contact_id, user_id, content, created_at, updated_at)
             VALUES (?, ?, ?, ?, ?)
         ''', (contact_id, current_user.id, content, datetime.now().isoformat(), datetime.now().isoformat()))
+        bump_data_version(db, current_user.id)
         db.commit()
 
         flash('Note added successfully!', 'success')
@@ -1072,6 +3140,7 @@ def add_registered_account():
         ''', (contact_id, current_user.id, account_number, client_name, strategy,
               inception_value, fee_percent, open_date, status,
               datetime.now().isoformat(), datetime.now().isoformat()))
+        bump_data_version(db, current_user.id)
         db.commit()
 
         flash('Registered account added successfully!', 'success')
@@ -1146,6 +3215,7 @@ def update_registered_account(account_id):
             WHERE id = ? AND user_id = ?
         ''', (account_number, client_name, strategy, inception_value, fee_percent,
               open_date, status, datetime.now().isoformat(), account_id, current_user.id))
+        bump_data_version(db, current_user.id)
         db.commit()
 
         flash('Account updated successfully!', 'success')
@@ -1178,6 +3248,7 @@ def delete_contact_note(note_id):
         # Delete note
         db.execute('DELETE FROM contact_notes WHERE id = ? AND user_id = ?',
                    (note_id, current_user.id))
+        bump_data_version(db, current_user.id)
         db.commit()
 
         return jsonify({'message': 'Note deleted successfully'})
@@ -1206,6 +3277,7 @@ def delete_registered_account(account_id):
         # Delete account
         db.execute('DELETE FROM registered_accounts WHERE id = ? AND user_id = ?',
                    (account_id, current_user.id))
+        bump_data_version(db, current_user.id)
         db.commit()
 
         return jsonify({'message': 'Account deleted successfully'})
@@ -1220,6 +3292,57 @@ def seminars():
     return render_template('seminars.html')
 
 
+# --- Notes Feed ---
+NOTES_PAGE_SIZE = 20
+MAX_NOTES_PAGE_SIZE = 100
+
+app.config['NOTES_PAGE_SIZE'] = NOTES_PAGE_SIZE
+
+
+def fetch_notes_page(db, user_id, cursor=None, limit=None):
+    """Return one page of the user's notes, newest first, and the cursor for the next page.
+
+    Pages seek below the last id seen through idx_notes_user_id, like fetch_contacts_page.
+    """
+    limit = limit or app.config['NOTES_PAGE_SIZE']
+    clause, params = 'user_id = ?', [user_id]
+
+    if cursor:
+        last_id, = decode_cursor(cursor, size=1)
+        if not isinstance(last_id, int):
+            raise ValueError('Invalid cursor')
+        clause += ' AND id < ?'
+        params.append(last_id)
+
+    rows = db.execute(f'''
+        SELECT id, user, content, timestamp FROM notes
+        WHERE {clause}
+        ORDER BY id DESC
+        LIMIT ?
+    ''', params + [limit + 1]).fetchall()
+
+    notes = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor([notes[-1]['id']])
+    return notes, next_cursor
+
+
+@app.route('/api/notes', methods=['GET'])
+@login_required
+def api_get_notes():
+    """Get a page of the current user's notes, newest first, starting after an optional cursor"""
+    try:
+        limit = min(max(int(request.args.get('limit', app.config['NOTES_PAGE_SIZE'])), 1),
+                    MAX_NOTES_PAGE_SIZE)
+        notes, next_cursor = fetch_notes_page(get_db(), current_user.id,
+                                              cursor=request.args.get('cursor'), limit=limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'notes': notes, 'next_cursor': next_cursor})
+
+
 @app.route('/opportunities', methods=['GET', 'POST'])
 @login_required
 def opportunities():
@@ -1228,9 +3351,8 @@ def opportunities():
     if request.method == 'POST':
         content = request.form.get('content')
         if content:
-            from datetime import datetime
-            db.execute('INSERT INTO notes (user, content, timestamp) VALUES (?, ?, ?)',
-                       (current_user.name, content, datetime.now().strftime('%Y-%m-%d %H:%M')))
+            db.execute('INSERT INTO notes (user_id, user, content, timestamp) VALUES (?, ?, ?, ?)',
+                       (current_user.id, current_user.name, content, datetime.now().strftime('%Y-%m-%d %H:%M')))
             db.commit()
         return redirect(url_for('opportunities'))
 
@@ -1242,30 +3364,203 @@ def opportunities():
     ''', (current_user.id,)).fetchall()
 
     # Get contacts for dropdown
-    contacts = db.execute('SELECT name FROM contacts WHERE user_id = ? ORDER BY name', (current_user.id,)).fetchall()
-    contact_names = [contact['name'] for contact in contacts]
+    contacts = db.execute('SELECT id, name FROM contacts WHERE user_id = ? ORDER BY name',
+                          (current_user.id,)).fetchall()
 
-    notes = db.execute('SELECT * FROM notes ORDER BY id DESC').fetchall()
+    # Only the newest notes are rendered, older ones are fetched from /api/notes
+    notes, notes_next_cursor = fetch_notes_page(db, current_user.id)
 
     return render_template('opportunities.html',
                            opportunities=opportunities,
-                           contacts=contact_names,
-                           notes=notes)
+                           contacts=contacts,
+                           notes=notes,
+                           notes_next_cursor=notes_next_cursor)
 
 
 # --- API Endpoints for Opportunities CRUD ---
+def contact_id_for_name(db, user_id, name):
+    """The id of the user's contact with this exact name, or None if there isn't exactly one"""
+    row = db.execute('''
+        SELECT MIN(id) FROM contacts WHERE user_id = ? AND name = ? HAVING COUNT(*) = 1
+    ''', (user_id, name)).fetchone()
+    return row[0] if row else None
+
+
+def resolve_opportunity_contact(db, user_id, data):
+    """Fill in contact/contact_id for an opportunity payload.
+
+    A contact_id must be one of the user's contacts and sets the display name from it.
+    A contact name alone is linked when it matches exactly one contact. A payload with
+    neither leaves both as they are.
+    """
+    if data.get('contact_id') is not None:
+        contact = db.execute('SELECT id, name FROM contacts WHERE id = ? AND user_id = ?',
+                             (data['contact_id'], user_id)).fetchone()
+        if not contact:
+            raise ValueError('Contact not found')
+        return dict(data, contact=contact['name'], contact_id=contact['id'])
+    if 'contact' in data:
+        return dict(data, contact_id=contact_id_for_name(db, user_id, data['contact']))
+    return data
+
+
+def opportunity_values(data, existing=None):
+    """Column values for an opportunity INSERT/UPDATE, falling back to the existing row's values"""
+    def field(name, default=None):
+        return data.get(name, existing[name] if existing else default)
+
+    return (
+        field('title'),
+        field('contact'),
+        field('contact_id'),
+        field('salesperson'),
+        float(field('amount', 0)),
+        int(field('probability', 50)),
+        field('stage', 'prospecting'),
+        field('close_date'),
+        field('notes'),
+        field('reminder'),
+    )
+
+
+def insert_opportunity(db, user_id, data):
+    """Insert an opportunity and return its id"""
+    now = datetime.now().isoformat()
+    data = resolve_opportunity_contact(db, user_id, data)
+    cursor = db.execute('''
+        INSERT INTO opportunities
+        (user_id, title, contact, contact_id, salesperson, amount, probability, stage, close_date, notes, reminder,
+         created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (user_id, *opportunity_values(data), now, now))
+    return cursor.lastrowid
+
+
+def update_opportunity(db, user_id, existing, data):
+    """Update an opportunity from a partial payload and return the payload as applied"""
+    data = resolve_opportunity_contact(db, user_id, data)
+    db.execute('''
+        UPDATE opportunities
+        SET title = ?, contact = ?, contact_id = ?, salesperson = ?, amount = ?, probability = ?,
+            stage = ?, close_date = ?, notes = ?, reminder = ?, updated_at = ?
+        WHERE id = ? AND user_id = ?
+    ''', (*opportunity_values(data, existing), datetime.now().isoformat(), existing['id'], user_id))
+    return data
+
+
 @app.route('/api/opportunities', methods=['GET'])
 @login_required
 def api_get_opportunities():
-    """Get all opportunities for the current user"""
+    """Get all opportunities for the current user, or only the changes since a cursor.
+
+    Without parameters this returns the full list, with the sync cursor in the
+    X-Sync-Cursor header. With ?since=<cursor> it returns
+    {"opportunities": [changed rows], "deleted": [ids], "cursor": ...}. The cursor trails
+    the clock by SYNC_CURSOR_MARGIN, so recent rows are sent again and clients should
+    upsert by id. Both forms send an
+    ETag derived from the user's data version and answer If-None-Match with a 304.
+    """
     db = get_db()
-    opportunities = db.execute('''
-        SELECT * FROM opportunities 
-        WHERE user_id = ? 
-        ORDER BY created_at DESC
-    ''', (current_user.id,)).fetchall()
+    since = request.args.get('since')
+    if since:
+        try:
+            since = parse_sync_cursor(since)
+        except ValueError:
+            return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+
+    etag = f"opportunities-{current_user.id}-{get_data_version(db, current_user.id)}"
+    if since:
+        etag += '-' + hashlib.sha1(since.encode()).hexdigest()[:12]
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    elif since:
+        response = jsonify(opportunity_changes(db, current_user.id, since))
+    else:
+        def load_opportunities():
+            opportunities = db.execute('''
+                SELECT * FROM opportunities
+                WHERE user_id = ?
+                ORDER BY created_at DESC
+            ''', (current_user.id,)).fetchall()
+            return [dict(opp) for opp in opportunities]
+
+        opportunities = cached_user_result(db, current_user.id, 'opportunities', {}, load_opportunities)
+        response = jsonify(opportunities)
+        response.headers['X-Sync-Cursor'] = sync_cursor()
+
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+# Tombstones are kept this long (see migrate_008_opportunity_sync); older cursors get a full list
+SYNC_TOMBSTONE_DAYS = 30
+# updated_at is stamped before commit, so a write can become visible slightly after its
+# timestamp. Cursors never move past now minus this margin, so such writes aren't skipped.
+SYNC_CURSOR_MARGIN = timedelta(seconds=60)
+
+
+def sync_cursor():
+    """Cursor for the next ?since= request. Rows changed after it may be sent again."""
+    return (datetime.now() - SYNC_CURSOR_MARGIN).isoformat()
+
+
+def parse_sync_cursor(value):
+    """Normalise a ?since= cursor to the local-time isoformat() used by updated_at.
+
+    Raises ValueError if it isn't an ISO 8601 timestamp. Timestamps with an offset are
+    converted to local time.
+    """
+    since = datetime.fromisoformat(value)
+    if since.tzinfo is not None:
+        since = since.astimezone().replace(tzinfo=None)
+    return since.isoformat()
+
+
+def opportunity_changes(db, user_id, since):
+    """Opportunities updated and ids deleted at or after the since cursor"""
+    if since < (datetime.now() - timedelta(days=SYNC_TOMBSTONE_DAYS)).isoformat():
+        # Deletions this old may have been pruned, so the client has to start over
+        rows = db.execute('SELECT * FROM opportunities WHERE user_id = ?', (user_id,)).fetchall()
+        return {
+            'opportunities': [dict(row) for row in rows],
+            'deleted': [],
+            'full': True,
+            'cursor': sync_cursor(),
+        }
+
+    rows = db.execute('''
+        SELECT * FROM opportunities
+        WHERE user_id = ? AND updated_at >= ?
+        ORDER BY updated_at
+    ''', (user_id, since)).fetchall()
+    deleted = db.execute('''
+        SELECT opportunity_id, deleted_at FROM opportunity_tombstones
+        WHERE user_id = ? AND deleted_at >= ?
+    ''', (user_id, since)).fetchall()
+    return {
+        'opportunities': [dict(row) for row in rows],
+        'deleted': [row['opportunity_id'] for row in deleted],
+        'full': False,
+        'cursor': sync_cursor(),
+    }
 
-    return jsonify([dict(opp) for opp in opportunities])
+
+@app.route('/api/cache/stats', methods=['GET'])
+@login_required
+def api_cache_stats():
+    """Get result cache and contact card fragment cache hit and miss counters"""
+    lookups = cache_stats['hits'] + cache_stats['misses']
+    fragments = get_fragment_cache()
+    return jsonify({
+        'backend': app.config['CACHE_BACKEND'],
+        'entries': len(get_cache()),
+        'hits': cache_stats['hits'],
+        'misses': cache_stats['misses'],
+        'hit_ratio': round(cache_stats['hits'] / lookups, 3) if lookups else None,
+        'contact_fragments': dict(fragments.stats, entries=len(fragments), bytes=fragments.size),
+    })
 
 
 @app.route('/api/opportunities', methods=['POST'])
@@ -1276,36 +3571,21 @@ def api_create_opportunity():
         data = request.get_json()
 
         # Validate required fields
-        if not data.get('title') or not data.get('contact'):
+        if not data.get('title') or not (data.get('contact') or data.get('contact_id')):
             return jsonify({'error': 'Title and contact are required'}), 400
 
         db = get_db()
-        cursor = db.execute('''
-            INSERT INTO opportunities 
-            (user_id, title, contact, salesperson, amount, probability, stage, close_date, notes, reminder, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            current_user.id,
-            data.get('title'),
-            data.get('contact'),
-            data.get('salesperson'),
-            float(data.get('amount', 0)),
-            int(data.get('probability', 50)),
-            data.get('stage', 'prospecting'),
-            data.get('close_date'),
-            data.get('notes'),
-            data.get('reminder'),
-            datetime.now().isoformat(),
-            datetime.now().isoformat()
-        ))
-
-        opportunity_id = cursor.lastrowid
+        opportunity_id = insert_opportunity(db, current_user.id, data)
+        bump_data_version(db, current_user.id)
         db.commit()
+        notify_reminder_changed(opportunity_id, data.get('reminder'))
 
         # Return the created opportunity
         opportunity = db.execute('SELECT * FROM opportunities WHERE id = ?', (opportunity_id,)).fetchone()
         return jsonify(dict(opportunity)), 201
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1328,31 +3608,17 @@ def api_update_opportunity(opportunity_id):
             return jsonify({'error': 'Opportunity not found'}), 404
 
         # Update the opportunity
-        db.execute('''
-            UPDATE opportunities 
-            SET title = ?, contact = ?, salesperson = ?, amount = ?, probability = ?, 
-                stage = ?, close_date = ?, notes = ?, reminder = ?, updated_at = ?
-            WHERE id = ? AND user_id = ?
-        ''', (
-            data.get('title', existing['title']),
-            data.get('contact', existing['contact']),
-            data.get('salesperson', existing['salesperson']),
-            float(data.get('amount', existing['amount'])),
-            int(data.get('probability', existing['probability'])),
-            data.get('stage', existing['stage']),
-            data.get('close_date', existing['close_date']),
-            data.get('notes', existing['notes']),
-            data.get('reminder', existing['reminder']),
-            datetime.now().isoformat(),
-            opportunity_id,
-            current_user.id
-        ))
+        update_opportunity(db, current_user.id, existing, data)
+        bump_data_version(db, current_user.id)
         db.commit()
+        notify_reminder_changed(opportunity_id, data.get('reminder', existing['reminder']))
 
         # Return the updated opportunity
         opportunity = db.execute('SELECT * FROM opportunities WHERE id = ?', (opportunity_id,)).fetchone()
         return jsonify(dict(opportunity))
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1376,6 +3642,7 @@ def api_delete_opportunity(opportunity_id):
         # Delete the opportunity
         db.execute('DELETE FROM opportunities WHERE id = ? AND user_id = ?',
                    (opportunity_id, current_user.id))
+        bump_data_version(db, current_user.id)
         db.commit()
 
         return jsonify({'message': 'Opportunity deleted successfully'})
@@ -1412,6 +3679,7 @@ def api_update_opportunity_stage(opportunity_id):
             SET stage = ?, updated_at = ?
             WHERE id = ? AND user_id = ?
         ''', (new_stage, datetime.now().isoformat(), opportunity_id, current_user.id))
+        bump_data_version(db, current_user.id)
         db.commit()
 
         return jsonify({'message': 'Stage updated successfully', 'stage': new_stage})
@@ -1420,13 +3688,730 @@ def api_update_opportunity_stage(opportunity_id):
         return jsonify({'error': str(e)}), 500
 
 
-# Serve static files
-@app.route('/static/<path:filename>')
+# --- Batch Opportunity Changes ---
+# The board buffers drag-and-drop moves and flushes them here, so N moves cost one
+# request, one ownership query and one commit instead of N of each.
+MAX_BATCH_OPERATIONS = 500
+BATCH_OPERATIONS = ('create', 'update', 'stage', 'delete')
+
+
+@app.route('/api/opportunities/batch', methods=['POST'])
+@login_required
+def api_batch_opportunities():
+    """Apply a list of creates, updates, stage moves and deletes in one transaction.
+
+    Body: {"operations": [{"op": "stage", "id": 7, "stage": "proposal"},
+                          {"op": "update", "id": 8, "data": {...}},
+                          {"op": "create", "data": {...}}, {"op": "delete", "id": 9}]}
+    Each operation gets a result with the status the single-item endpoint would have
+    returned. Operations that fail validation or ownership are skipped; the rest are
+    committed together, and nothing is committed if the database raises.
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+
+    db = get_db()
+
+    # One set-based ownership check for every id referenced by the batch
+    ids = {op.get('id') for op in operations
+           if isinstance(op, dict) and op.get('op') != 'create' and isinstance(op.get('id'), int)}
+    owned = {}
+    if ids:
+        placeholders = ','.join('?' * len(ids))
+        rows = db.execute(f'''
+            SELECT * FROM opportunities
+            WHERE user_id = ? AND id IN ({placeholders})
+        ''', (current_user.id, *ids)).fetchall()
+        owned = {row['id']: row for row in rows}
+
+    results = []
+    changed_ids = []
+    deleted = set()
+    try:
+        for op in operations:
+            if not isinstance(op, dict) or op.get('op') not in BATCH_OPERATIONS:
+                results.append({'status': 400, 'error': f'op must be one of {", ".join(BATCH_OPERATIONS)}'})
+                continue
+            kind = op['op']
+            payload = op.get('data') or {}
+            if not isinstance(payload, dict):
+                results.append({'op': kind, 'id': op.get('id'), 'status': 400, 'error': 'data must be an object'})
+                continue
+
+            if kind == 'create':
+                if not payload.get('title') or not (payload.get('contact') or payload.get('contact_id')):
+                    results.append({'op': kind, 'status': 400, 'error': 'Title and contact are required'})
+                    continue
+                try:
+                    opportunity_id = insert_opportunity(db, current_user.id, payload)
+                except (TypeError, ValueError) as e:
+                    results.append({'op': kind, 'status': 400, 'error': str(e)})
+                    continue
+                changed_ids.append(opportunity_id)
+                results.append({'op': kind, 'id': opportunity_id, 'status': 201})
+                continue
+
+            opportunity_id = op.get('id')
+            existing = owned.get(opportunity_id) if isinstance(opportunity_id, int) else None
+            if existing is None or opportunity_id in deleted:
+                results.append({'op': kind, 'id': opportunity_id, 'status': 404, 'error': 'Opportunity not found'})
+                continue
+
+            if kind == 'delete':
+                db.execute('DELETE FROM opportunities WHERE id = ? AND user_id = ?',
+                           (opportunity_id, current_user.id))
+                deleted.add(opportunity_id)
+                results.append({'op': kind, 'id': opportunity_id, 'status': 200})
+                continue
+
+            if kind == 'stage':
+                if not op.get('stage') or not isinstance(op['stage'], str):
+                    results.append({'op': kind, 'id': opportunity_id, 'status': 400, 'error': 'Stage is required'})
+                    continue
+                payload = {'stage': op['stage']}
+                db.execute('''
+                    UPDATE opportunities 
+                    SET stage = ?, updated_at = ?
+                    WHERE id = ? AND user_id = ?
+                ''', (op['stage'], datetime.now().isoformat(), opportunity_id, current_user.id))
+            else:
+                try:
+                    payload = update_opportunity(db, current_user.id, existing, payload)
+                except (TypeError, ValueError) as e:
+                    results.append({'op': kind, 'id': opportunity_id, 'status': 400, 'error': str(e)})
+                    continue
+            # Later operations on the same id build on this one
+            owned[opportunity_id] = dict(existing, **{k: v for k, v in payload.items() if k in existing.keys()})
+            changed_ids.append(opportunity_id)
+            results.append({'op': kind, 'id': opportunity_id, 'status': 200})
+
+        if changed_ids or deleted:
+            bump_data_version(db, current_user.id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    # Return the saved rows so the client can refresh its copies
+    changed_ids = [i for i in dict.fromkeys(changed_ids) if i not in deleted]
+    if changed_ids:
+        placeholders = ','.join('?' * len(changed_ids))
+        rows = db.execute(f'SELECT * FROM opportunities WHERE id IN ({placeholders})', changed_ids).fetchall()
+        saved = {row['id']: dict(row) for row in rows}
+        for result in results:
+            if result['status'] in (200, 201) and result.get('id') in saved:
+                result['opportunity'] = saved[result['id']]
+        for opportunity in saved.values():
+            notify_reminder_changed(opportunity['id'], opportunity['reminder'])
+
+    return jsonify({
+        'results': results,
+        'applied': sum(1 for result in results if result['status'] in (200, 201)),
+        'failed': sum(1 for result in results if result['status'] not in (200, 201)),
+    })
+
+
+# --- Reminder Scheduler ---
+# A background thread delivers opportunity reminders when they come due. It keeps the
+# reminders due in the next REMINDER_WINDOW in a min-heap, loaded with a range scan of
+# idx_opportunities_reminder, and sleeps until the earliest one instead of polling.
+# Writes in this process push changed reminders onto the heap right away; the window
+# is reloaded when it runs out, which also picks up changes made by other processes.
+# A heap entry is checked against the opportunity row before delivery, so entries for
+# reminders that were changed or cleared since they were queued are simply dropped.
+app.config['REMINDER_SINK'] = 'log'  # 'log', 'smtp' or 'queue'
+app.config['REMINDER_SMTP_HOST'] = 'localhost'
+app.config['REMINDER_SMTP_PORT'] = 1025
+app.config['REMINDER_SMTP_SENDER'] = 'reminders@bluefin.local'
+REMINDER_WINDOW = timedelta(minutes=5)
+# Reminders that came due while nothing was running are still delivered if this recent
+REMINDER_CATCHUP = timedelta(days=1)
+REMINDER_BATCH_SIZE = 10000
+
+
+class LogReminderSink:
+    """Print due reminders to the server log"""
+
+    def deliver(self, db, reminder):
+        print(f"Reminder for {reminder['email']}: {reminder['title']} ({reminder['contact']}) "
+              f"at {reminder['reminder']}")
+
+
+class SmtpReminderSink:
+    """Email due reminders through an SMTP server, e.g. a local debugging server on port 1025"""
+
+    def __init__(self, host, port, sender):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def deliver(self, db, reminder):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = reminder['email']
+        message['Subject'] = f"Reminder: {reminder['title']}"
+        message.set_content(f"{reminder['title']} with {reminder['contact']} is due at {reminder['reminder']}.")
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(message)
+
+
+class QueueReminderSink:
+    """Add due reminders to the reminder_queue table, in the delivery's transaction"""
+
+    transactional = True
+
+    def deliver(self, db, reminder):
+        db.execute('''
+            INSERT INTO reminder_queue (user_id, opportunity_id, email, title, reminder, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (reminder['user_id'], reminder['id'], reminder['email'], reminder['title'],
+              reminder['reminder'], datetime.now().isoformat()))
+
+
+def create_reminder_sink():
+    sink = app.config['REMINDER_SINK']
+    if sink == 'smtp':
+        return SmtpReminderSink(app.config['REMINDER_SMTP_HOST'], app.config['REMINDER_SMTP_PORT'],
+                                app.config['REMINDER_SMTP_SENDER'])
+    if sink == 'queue':
+        return QueueReminderSink()
+    return LogReminderSink()
+
+
+def parse_reminder(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReminderScheduler:
+    """Deliver opportunity reminders to a sink as they come due"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self._heap = []  # (due, opportunity_id, reminder)
+        self._queued = set()  # (opportunity_id, reminder) pairs on the heap
+        self._window_end = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def join(self):
+        self._thread.join()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def notify(self, opportunity_id, reminder):
+        """Tell the scheduler an opportunity's reminder was set or changed (None when cleared)"""
+        due = parse_reminder(reminder)
+        with self._condition:
+            if due is None or self._window_end is None or due >= self._window_end:
+                return  # a cleared reminder's old entry is dropped when it comes up
+            self._push(due, opportunity_id, reminder)
+            self._condition.notify()
+
+    def _push(self, due, opportunity_id, reminder):
+        if (opportunity_id, reminder) not in self._queued:
+            self._queued.add((opportunity_id, reminder))
+            heapq.heappush(self._heap, (due, opportunity_id, reminder))
+
+    def _load_window(self, db):
+        """Queue undelivered reminders from the catch-up period up to the end of the next window"""
+        now = datetime.now()
+        window_end = now + REMINDER_WINDOW
+        rows = db.execute('''
+            SELECT o.id, o.reminder FROM opportunities o
+            WHERE o.reminder IS NOT NULL AND o.reminder >= ? AND o.reminder < ?
+              AND NOT EXISTS (SELECT 1 FROM reminder_deliveries d
+                              WHERE d.opportunity_id = o.id AND d.reminder = o.reminder)
+            ORDER BY o.reminder
+            LIMIT ?
+        ''', ((now - REMINDER_CATCHUP).isoformat(), window_end.isoformat(), REMINDER_BATCH_SIZE)).fetchall()
+        db.execute('DELETE FROM reminder_deliveries WHERE reminder < ?', ((now - 2 * REMINDER_CATCHUP).isoformat(),))
+        db.commit()
+
+        with self._condition:
+            for row in rows:
+                due = parse_reminder(row['reminder'])
+                if due is not None:
+                    self._push(due, row['id'], row['reminder'])
+            # A full batch means more are due in this window; continue from the last one loaded
+            if len(rows) == REMINDER_BATCH_SIZE:
+                window_end = parse_reminder(rows[-1]['reminder']) or window_end
+            self._window_end = window_end
+
+    def _deliver(self, db, opportunity_id, reminder):
+        row = db.execute('''
+            SELECT o.id, o.user_id, o.title, o.contact, o.reminder, u.email
+            FROM opportunities o JOIN users u ON u.id = o.user_id
+            WHERE o.id = ?
+        ''', (opportunity_id,)).fetchone()
+        if row is None or row['reminder'] != reminder:
+            return  # deleted, cleared or rescheduled since it was queued
+        transactional = getattr(self.sink, 'transactional', False)
+        try:
+            claimed = db.execute('''
+                INSERT OR IGNORE INTO reminder_deliveries (opportunity_id, reminder, delivered_at)
+                VALUES (?, ?, ?)
+            ''', (opportunity_id, reminder, datetime.now().isoformat())).rowcount
+            if claimed and transactional:
+                self.sink.deliver(db, row)
+            db.commit()
+        except Exception as e:
+            # Not recorded as delivered, so the next window load retries it
+            db.rollback()
+            print(f"Could not deliver reminder for opportunity {opportunity_id}: {e}")
+            return
+        if not claimed or transactional:
+            return
+
+        # Other sinks talk to the outside world, so the claim is committed first and the
+        # write lock isn't held while they do
+        try:
+            self.sink.deliver(db, row)
+        except Exception as e:
+            # Release the claim so the next window load retries it
+            print(f"Could not deliver reminder for opportunity {opportunity_id}: {e}")
+            try:
+                db.execute('DELETE FROM reminder_deliveries WHERE opportunity_id = ? AND reminder = ?',
+                           (opportunity_id, reminder))
+                db.commit()
+            except sqlite3.Error as e:
+                db.rollback()
+                print(f"Could not release reminder for opportunity {opportunity_id}: {e}")
+
+    def _run(self):
+        with closing(connect_db()) as db:
+            while True:
+                with self._condition:
+                    if self._stopped:
+                        return
+                    window_end = self._window_end
+                if window_end is None or datetime.now() >= window_end:
+                    try:
+                        self._load_window(db)
+                    except sqlite3.Error as e:
+                        print(f"Could not load reminders: {e}")
+                        time.sleep(REMINDER_WINDOW.total_seconds())
+                        continue
+
+                due = []
+                with self._condition:
+                    now = datetime.now()
+                    while self._heap and self._heap[0][0] <= now:
+                        _, opportunity_id, reminder = heapq.heappop(self._heap)
+                        self._queued.discard((opportunity_id, reminder))
+                        due.append((opportunity_id, reminder))
+                    if not due:
+                        wake_at = min(self._heap[0][0], self._window_end) if self._heap else self._window_end
+                        self._condition.wait(max((wake_at - now).total_seconds(), 0))
+                for opportunity_id, reminder in due:
+                    self._deliver(db, opportunity_id, reminder)
+
+
+reminder_scheduler = None
+
+
+def start_reminder_scheduler():
+    """Start this process's reminder scheduler"""
+    global reminder_scheduler
+    if reminder_scheduler is None:
+        reminder_scheduler = ReminderScheduler(create_reminder_sink()).start()
+    return reminder_scheduler
+
+
+def notify_reminder_changed(opportunity_id, reminder):
+    """Let a running scheduler know about a reminder written by this process. Call after commit."""
+    if reminder_scheduler is not None:
+        reminder_scheduler.notify(opportunity_id, reminder)
+
+
+reminders_cli = AppGroup('reminders', help='Deliver opportunity reminders.')
+
+
+@reminders_cli.command('run')
+def reminders_run_command():
+    """Run the reminder scheduler in the foreground, for a dedicated worker process."""
+    scheduler = start_reminder_scheduler()
+    click.echo(f"Delivering reminders to the '{app.config['REMINDER_SINK']}' sink. Press Ctrl+C to stop.")
+    try:
+        scheduler.join()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+app.cli.add_command(reminders_cli)
+
+
+# --- Pipeline Forecast ---
+CLOSED_STAGES = ('closed-won', 'closed-lost')
+# Half-width of the best/worst band in standard deviations, 1.2816 gives an 80% interval
+FORECAST_BAND_Z = 1.2816
+
+
+def forecast_bucket(count, pipeline, expected, variance):
+    """Summarize a group of open opportunities as pipeline value and scenario bands.
+
+    Each deal is treated as closing for its full amount with its own probability, so the
+    group's expected revenue is sum(amount * p) and its variance sum(amount^2 * p * (1 - p)).
+    """
+    spread = FORECAST_BAND_Z * math.sqrt(max(variance, 0))
+    return {
+        'count': count,
+        'pipeline': round(pipeline, 2),
+        'likely': round(expected, 2),
+        'best': round(min(expected + spread, pipeline), 2),
+        'worst': round(max(expected - spread, 0), 2),
+    }
+
+
+def build_forecast(db, user_id, salesperson=None, start_date=None, end_date=None):
+    """Forecast revenue from a user's open opportunities by week and month of close date.
+
+    The per-row math runs inside SQLite in a single pass over idx_opportunities_forecast,
+    which covers every column used, grouped by close date. Only one row per distinct
+    close date comes back to Python, where the days are rolled up into weeks (starting
+    Monday) and months.
+    """
+    query = f'''
+        SELECT close_date,
+               COUNT(*) AS count,
+               SUM(amount) AS pipeline,
+               SUM(amount * p) AS expected,
+               SUM(amount * amount * p * (1 - p)) AS variance
+        FROM (
+            SELECT close_date, COALESCE(amount, 0) AS amount,
+                   MIN(MAX(COALESCE(probability, 0), 0), 100) / 100.0 AS p
+            FROM opportunities
+            WHERE user_id = ? AND stage NOT IN ({', '.join('?' for _ in CLOSED_STAGES)})
+    '''
+    params = [user_id, *CLOSED_STAGES]
+    if salesperson:
+        query += ' AND salesperson = ?'
+        params.append(salesperson)
+    if start_date:
+        query += ' AND close_date >= ?'
+        params.append(start_date)
+    if end_date:
+        query += ' AND close_date < ?'
+        params.append(day_after(end_date))
+    query += '''
+        )
+        GROUP BY close_date
+        ORDER BY close_date
+    '''
+
+    weekly, monthly = {}, {}
+    totals = [0, 0.0, 0.0, 0.0]
+    unscheduled = [0, 0.0, 0.0, 0.0]
+
+    for row in db.execute(query, params):
+        sums = (row['count'], row['pipeline'] or 0, row['expected'] or 0, row['variance'] or 0)
+        try:
+            close_date = datetime.strptime(row['close_date'][:10], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            targets = [unscheduled, totals]
+        else:
+            week = str(close_date - timedelta(days=close_date.weekday()))
+            targets = [weekly.setdefault(week, [0, 0.0, 0.0, 0.0]),
+                       monthly.setdefault(str(close_date)[:7], [0, 0.0, 0.0, 0.0]),
+                       totals]
+        for target in targets:
+            for index, value in enumerate(sums):
+                target[index] += value
+
+    return {
+        'salesperson': salesperson,
+        'totals': forecast_bucket(*totals),
+        'unscheduled': forecast_bucket(*unscheduled),
+        'weekly': [{'period': period, **forecast_bucket(*sums)} for period, sums in sorted(weekly.items())],
+        'monthly': [{'period': period, **forecast_bucket(*sums)} for period, sums in sorted(monthly.items())],
+    }
+
+
+@app.route('/api/forecast', methods=['GET'])
+@login_required
+def api_forecast():
+    """Get expected revenue by week and month for the current user's open opportunities.
+
+    Optional query args: salesperson, start_date and end_date (inclusive close dates).
+    """
+    salesperson = request.args.get('salesperson', '').strip() or None
+    start_date = request.args.get('start_date', '').strip() or None
+    end_date = request.args.get('end_date', '').strip() or None
+
+    db = get_db()
+    forecast = cached_user_result(db, current_user.id, 'forecast',
+                                  {'salesperson': salesperson, 'start_date': start_date, 'end_date': end_date},
+                                  lambda: build_forecast(db, current_user.id, salesperson, start_date, end_date))
+    return jsonify(forecast)
+
+
+# --- Static Files ---
+# Templates link assets through static_url(), which adds a hash of the file's content
+# (?v=...). A URL with the current hash always names the same bytes, so it is served
+# as immutable and cached for a year; changing the file changes the URL. Responses
+# carry the content hash as a strong ETag, so everything else revalidates with a 304.
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+# Uploaded pictures get a new random name for every upload, so they never change either
+IMMUTABLE_STATIC_FOLDERS = ('uploads/profile_pictures/',)
+COMPRESSIBLE_STATIC_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map'}
+# Precompressed siblings (file.css.br, file.css.gz) in order of preference
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+asset_hashes = {}
+
+
+def asset_hash(path):
+    """Return a hex digest of a file's content, recomputed only when the file changes"""
+    stat = os.stat(path)
+    cached = asset_hashes.get(path)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    asset_hashes[path] = ((stat.st_mtime_ns, stat.st_size), digest.hexdigest()[:16])
+    return asset_hashes[path][1]
+
+
+def static_url(filename):
+    """URL of a static file fingerprinted with its content hash"""
+    path = safe_join(app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        return url_for('static', filename=filename)
+    return url_for('static', filename=filename, v=asset_hash(path))
+
+
+app.jinja_env.globals['static_url'] = static_url
+
+
+@app.route('/static/<path:filename>', endpoint='static')
 def static_files(filename):
-    return send_from_directory('static', filename)
+    """Serve a static file with a strong ETag, long-lived caching for fingerprinted URLs,
+    and a precompressed .br/.gz copy of text assets when the client accepts one"""
+    path = safe_join(app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    digest = asset_hash(path)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    send_path, content_encoding = path, None
+
+    if os.path.splitext(filename)[1].lower() in COMPRESSIBLE_STATIC_EXTENSIONS:
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            compressed_path = path + suffix
+            if (request.accept_encodings[encoding] and os.path.isfile(compressed_path)
+                    and os.path.getmtime(compressed_path) >= os.path.getmtime(path)):
+                send_path, content_encoding = compressed_path, encoding
+                break
+
+    etag = f"{digest}-{content_encoding}" if content_encoding else digest
+    response = send_file(send_path, mimetype=mimetype, etag=etag, conditional=True, max_age=0)
+
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    if os.path.splitext(filename)[1].lower() in COMPRESSIBLE_STATIC_EXTENSIONS:
+        response.vary.add('Accept-Encoding')
+
+    if request.args.get('v') == digest or filename.startswith(IMMUTABLE_STATIC_FOLDERS):
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+assets_cli = AppGroup('assets', help='Manage static assets.')
+
+
+@assets_cli.command('compress')
+def assets_compress_command():
+    """Write .gz (and .br, if brotli is installed) copies of text assets under static/."""
+    try:
+        import brotli  # optional, only needed to produce .br files
+    except ImportError:
+        brotli = None
+        click.echo('brotli is not installed, only writing .gz files.')
+
+    written = 0
+    for folder, _, filenames in os.walk(app.static_folder):
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_STATIC_EXTENSIONS:
+                continue
+            path = os.path.join(folder, filename)
+            with open(path, 'rb') as f:
+                data = f.read()
+            outputs = [('.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                outputs.append(('.br', lambda: brotli.compress(data, quality=11)))
+            for suffix, compress in outputs:
+                if not os.path.exists(path + suffix) or os.path.getmtime(path + suffix) < os.path.getmtime(path):
+                    with open(path + suffix, 'wb') as f:
+                        f.write(compress())
+                    written += 1
+    click.echo(f'Wrote {written} compressed file(s).')
+
+
+app.cli.add_command(assets_cli)
+
+
+# --- Response Compression ---
+# Pages inline a lot of CSS/JS and the APIs return large JSON arrays, so text responses
+# above COMPRESSION_MIN_SIZE are compressed on the way out with brotli (if installed) or
+# gzip, whichever the client prefers. Streamed responses are compressed as they are
+# produced. Responses that already have a Content-Encoding (precompressed static files)
+# and everything under COMPRESSION_EXCLUDED_PATHS are passed through untouched.
+app.config['COMPRESSION_MIN_SIZE'] = 1024
+app.config['COMPRESSION_GZIP_LEVEL'] = 6
+app.config['COMPRESSION_BROTLI_QUALITY'] = 5
+app.config['COMPRESSION_EXCLUDED_PATHS'] = ('/static/uploads/',)
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/calendar', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+
+
+class CompressionMiddleware:
+    """WSGI middleware that compresses text responses for clients that accept gzip or br"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        try:
+            import brotli  # optional, gzip is used without it
+        except ImportError:
+            brotli = None
+        self.brotli = brotli
+
+    def negotiate(self, environ):
+        """Pick 'br' or 'gzip' from Accept-Encoding, or None to send the response as is"""
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        encodings = [('gzip', accept['gzip'])]
+        if self.brotli is not None:
+            encodings.insert(0, ('br', accept['br']))
+        encoding, quality = max(encodings, key=lambda item: item[1])
+        return encoding if quality > 0 else None
+
+    def compressor(self, encoding):
+        """Return (compress, finish) functions of a streaming compressor"""
+        if encoding == 'br':
+            compressor = self.brotli.Compressor(quality=app.config['COMPRESSION_BROTLI_QUALITY'])
+            return compressor.process, compressor.finish
+        compressor = zlib.compressobj(app.config['COMPRESSION_GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, compressor.flush
+
+    def compressible(self, environ, status, headers):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return False
+        if environ.get('PATH_INFO', '').startswith(tuple(app.config['COMPRESSION_EXCLUDED_PATHS'])):
+            return False
+        code = int(status.split(None, 1)[0])
+        if code < 200 or code >= 300 or code in (204, 206):
+            return False
+        if 'Content-Encoding' in headers or 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        mimetype = headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if mimetype not in COMPRESSIBLE_MIMETYPES:
+            return False
+        length = headers.get('Content-Length')
+        return length is None or int(length) >= app.config['COMPRESSION_MIN_SIZE']
+
+    def __call__(self, environ, start_response):
+        captured = []
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        app_iter = self.wsgi_app(environ, capture)
+        status, headers, exc_info = captured
+        headers = Headers(headers)
+        if not self.compressible(environ, status, headers):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            if written:
+                return itertools.chain(written, app_iter)
+            return app_iter
+
+        vary = headers.get('Vary')
+        if not vary:
+            headers['Vary'] = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower() and vary != '*':
+            headers['Vary'] = vary + ', Accept-Encoding'
+        return self.compressed(app_iter, written, self.negotiate(environ), status, headers, exc_info,
+                               start_response)
+
+    def compressed(self, app_iter, written, encoding, status, headers, exc_info, start_response):
+        """Yield the body compressed, deciding from the first chunks whether it is worth it"""
+        try:
+            chunks = iter(app_iter)
+            buffered = list(written)
+            size = sum(len(chunk) for chunk in buffered)
+            # Streamed responses have no Content-Length; read ahead until the threshold
+            # is reached or the body ends, and send short bodies uncompressed.
+            if encoding is not None and 'Content-Length' not in headers:
+                for chunk in chunks:
+                    buffered.append(chunk)
+                    size += len(chunk)
+                    if size >= app.config['COMPRESSION_MIN_SIZE']:
+                        break
+                else:
+                    encoding = encoding if size >= app.config['COMPRESSION_MIN_SIZE'] else None
+                    if encoding is None:
+                        headers['Content-Length'] = str(size)
+
+            if encoding is None:
+                start_response(status, headers.to_wsgi_list(), exc_info)
+                yield from buffered
+                yield from chunks
+                return
+
+            headers['Content-Encoding'] = encoding
+            headers.pop('Content-Length', None)
+            # The compressed bytes differ from the uncompressed ones, so the validator
+            # can only promise semantic equivalence
+            etag = headers.get('ETag')
+            if etag and not etag.startswith('W/'):
+                headers['ETag'] = 'W/' + etag
+            start_response(status, headers.to_wsgi_list(), exc_info)
+
+            compress, finish = self.compressor(encoding)
+            for chunk in itertools.chain(buffered, chunks):
+                data = compress(chunk)
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+
+app.wsgi_app = CompressionMiddleware(app.wsgi_app)
 
 
 if __name__ == '__main__':
+    upgrade_db()
+    # With debug=True the reloader runs the app in a child process; only that one serves
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_reminder_scheduler()
     print("Starting Bluefin CRM...")
     print("Open your browser and go to: http://localhost:5000")
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
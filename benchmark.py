@@ -0,0 +1,333 @@
+"""Latency and throughput benchmarks for Bluefin CRM.
+
+Builds a database of the chosen size in a temporary directory, drives the app through
+Flask's test client (or a local WSGI server with --server), and reports p50/p95/p99
+latency per route, throughput under concurrent clients and peak RSS. Results are saved
+as JSON so a later run can be compared against them with --compare.
+
+    python benchmark.py --size 100k --output baseline-100k.json
+    python benchmark.py --size 100k --compare baseline-100k.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import resource
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+SIZES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+# The first user generate_seed_data() creates is the demo account
+BENCH_EMAIL = 'demo@bluefin.com'
+BENCH_PASSWORD = 'demo123'
+
+
+def build_database(path, count, seed=42):
+    """Create a database at path whose first user has `count` contacts, accounts, notes and opportunities"""
+    import app as bluefin
+
+    bluefin.app.config['DATABASE'] = path
+    bluefin.upgrade_db()
+    bluefin.generate_seed_data(1, count, firms_per_user=len(bluefin.FIRM_NAMES), notes_per_contact=1.0,
+                               accounts_per_contact=1.0, opportunities_per_user=count,
+                               calendar_notes_per_user=max(count // 10, 1), seed=seed)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(durations):
+    durations = sorted(durations)
+    return {
+        'requests': len(durations),
+        'mean_ms': round(sum(durations) / len(durations) * 1000, 3),
+        'p50_ms': round(percentile(durations, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(durations, 0.99) * 1000, 3),
+    }
+
+
+class TestClientDriver:
+    """Sends requests through Flask's test client, logged in as the benchmark user"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.local = threading.local()
+
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.flask_app.test_client()
+            with self.local.client.session_transaction() as session:
+                session['_user_id'] = '1'
+        return self.local.client
+
+    def request(self, method, path, body=None):
+        response = self.client().open(path, method=method, json=body)
+        data = response.get_data()
+        return response.status_code, data
+
+
+class ServerDriver:
+    """Sends requests over HTTP to the app running in a local threaded WSGI server"""
+
+    def __init__(self, flask_app):
+        from werkzeug.serving import make_server
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no per-request log lines
+        self.server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.local = threading.local()
+
+    def connection(self):
+        if not hasattr(self.local, 'connection'):
+            self.local.connection = http.client.HTTPConnection('127.0.0.1', self.port)
+            self.local.cookie = ''
+            status, _ = self.request('POST', '/login', form=f'email={BENCH_EMAIL}&password={BENCH_PASSWORD}')
+            if status != 302:
+                raise RuntimeError(f'Could not log in to the benchmark server (status {status})')
+        return self.local.connection
+
+    def request(self, method, path, body=None, form=None):
+        connection = self.connection() if form is None else self.local.connection
+        headers = {'Cookie': self.local.cookie}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            payload = form
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        connection.request(method, path, body=payload, headers=headers)
+        response = connection.getresponse()
+        data = response.read()
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.local.cookie = cookie.split(';', 1)[0]
+        return response.status, data
+
+    def close(self):
+        self.server.shutdown()
+
+
+def read_routes(db_path):
+    """Name and path of every read route benchmarked, with filters taken from the data"""
+    with sqlite3.connect(db_path) as db:
+        firm = db.execute('SELECT firm FROM contacts LIMIT 1').fetchone()[0]
+        contact_id = db.execute('SELECT contact_id FROM registered_accounts LIMIT 1').fetchone()[0]
+    today = datetime.now()
+    # A quarter of the generated history, and all of it
+    quarter_start, quarter_end = (today - timedelta(days=270)).date(), (today - timedelta(days=180)).date()
+    history_start = (today - timedelta(days=730)).date()
+    return [
+        ('contacts', '/contacts'),
+        ('contacts_firm', f'/contacts?firm={firm.replace(" ", "+")}'),
+        ('contacts_accounts', '/contacts?accounts=1-5'),
+        ('contacts_date_range', f'/contacts?start_date={quarter_start}&end_date={quarter_end}'),
+        ('contacts_all_filters',
+         f'/contacts?firm={firm.replace(" ", "+")}&accounts=1-5&start_date={history_start}&end_date={today.date()}'),
+        ('spreadsheet', '/spreadsheet'),
+        ('analytics', '/analytics&reports'),
+        ('calendar', f'/calendar?year={today.year}&month={today.month}'),
+        ('contact_card', f'/contact_card?id={contact_id}'),
+        ('api_opportunities_list', '/api/opportunities'),
+    ]
+
+
+def time_request(driver, method, path, body=None):
+    started = time.perf_counter()
+    status, data = driver.request(method, path, body)
+    elapsed = time.perf_counter() - started
+    if status >= 400:
+        raise RuntimeError(f'{method} {path} returned {status}: {data[:200]!r}')
+    return elapsed, data
+
+
+def bench_reads(driver, routes, repeats):
+    results = {}
+    for name, path in routes:
+        time_request(driver, 'GET', path)  # warm caches
+        results[name] = summarize([time_request(driver, 'GET', path)[0] for _ in range(repeats)])
+        print(f"  {name:<24} p50 {results[name]['p50_ms']:>9.2f}ms  p95 {results[name]['p95_ms']:>9.2f}ms  "
+              f"p99 {results[name]['p99_ms']:>9.2f}ms")
+    return results
+
+
+def bench_crud(driver, repeats, contact):
+    """Create, update, move and delete opportunities, timing each endpoint separately"""
+    timings = {'api_opportunities_create': [], 'api_opportunities_update': [],
+               'api_opportunities_stage': [], 'api_opportunities_delete': []}
+    for i in range(repeats):
+        elapsed, data = time_request(driver, 'POST', '/api/opportunities', {
+            'title': f'Bench {i}', 'contact': contact, 'amount': 1000 + i, 'stage': 'prospecting'})
+        timings['api_opportunities_create'].append(elapsed)
+        opportunity_id = json.loads(data)['id']
+        timings['api_opportunities_update'].append(time_request(
+            driver, 'PUT', f'/api/opportunities/{opportunity_id}', {'amount': 2000 + i, 'probability': 60})[0])
+        timings['api_opportunities_stage'].append(time_request(
+            driver, 'PUT', f'/api/opportunities/{opportunity_id}/stage', {'stage': 'proposal'})[0])
+        timings['api_opportunities_delete'].append(time_request(
+            driver, 'DELETE', f'/api/opportunities/{opportunity_id}')[0])
+    results = {name: summarize(durations) for name, durations in timings.items()}
+    for name, result in results.items():
+        print(f"  {name:<24} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+              f"p99 {result['p99_ms']:>9.2f}ms")
+    return results
+
+
+def bench_throughput(driver, routes, concurrency, total_requests):
+    """Requests per second with `concurrency` clients cycling through the read routes"""
+    paths = [path for _, path in routes]
+    durations = []
+    lock = threading.Lock()
+
+    def worker(worker_index):
+        for i in range(worker_index, total_requests, concurrency):
+            elapsed, _ = time_request(driver, 'GET', paths[i % len(paths)])
+            with lock:
+                durations.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result = summarize(durations)
+    result.update({'concurrency': concurrency, 'seconds': round(elapsed, 3),
+                   'requests_per_second': round(total_requests / elapsed, 1)})
+    print(f"  {concurrency} clients: {result['requests_per_second']} req/s, p95 {result['p95_ms']:.2f}ms")
+    return result
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def compare(results, baseline, tolerance):
+    """Print routes whose p95 got slower than the baseline by more than tolerance; return them"""
+    regressions = []
+    baseline_routes = baseline.get('routes', {})
+    meta = baseline.get('meta', {})
+    print(f"\nCompared with baseline from {meta.get('timestamp', 'unknown')}:")
+    for key in ('rows', 'driver', 'requests_per_route'):
+        if meta.get(key) != results['meta'][key]:
+            print(f"  note: baseline {key} was {meta.get(key)}, this run used {results['meta'][key]}")
+    for name, result in results['routes'].items():
+        before = baseline_routes.get(name)
+        if not before:
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0
+        marker = 'REGRESSION' if change > tolerance else ''
+        print(f"  {name:<24} p95 {before['p95_ms']:>9.2f}ms -> {result['p95_ms']:>9.2f}ms  {change:+7.1%} {marker}")
+        if change > tolerance:
+            regressions.append(name)
+    before = baseline.get('throughput', {}).get('requests_per_second')
+    after = results['throughput']['requests_per_second']
+    if before:
+        change = (after - before) / before
+        marker = 'REGRESSION' if change < -tolerance else ''
+        print(f"  {'throughput':<24} {before:>9.1f}/s -> {after:>9.1f}/s  {change:+7.1%} {marker}")
+        if change < -tolerance:
+            regressions.append('throughput')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--size', choices=sorted(SIZES), default='1k',
+                        help='rows per table: 1k, 100k or 1m (default 1k)')
+    parser.add_argument('--rows', type=int, help='exact rows per table, overrides --size')
+    parser.add_argument('--database', help='reuse this database instead of building one (must contain the '
+                                           'benchmark user, e.g. one kept with --keep)')
+    parser.add_argument('--keep', action='store_true', help='keep the generated database and print its path')
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per route (default 100)')
+    parser.add_argument('--concurrency', type=int, default=8, help='clients in the throughput test (default 8)')
+    parser.add_argument('--throughput-requests', type=int, default=1000,
+                        help='requests in the throughput test (default 1000)')
+    parser.add_argument('--server', action='store_true',
+                        help='send requests over HTTP to a local WSGI server instead of the test client')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare the results with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against the baseline before failing (default 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    rows = args.rows or SIZES[args.size]
+    workdir = tempfile.mkdtemp(prefix='bluefin-bench-')
+    db_path = args.database or os.path.join(workdir, 'bench.db')
+
+    import app as bluefin
+
+    if not args.database:
+        print(f'Building a database with {rows} rows per table...')
+        started = time.perf_counter()
+        # In a separate process, so the generator's memory doesn't count towards peak RSS
+        with ProcessPoolExecutor(max_workers=1) as builder:
+            builder.submit(build_database, db_path, rows).result()
+        print(f'  built in {time.perf_counter() - started:.1f}s')
+    bluefin.app.config['DATABASE'] = db_path
+    bluefin.upgrade_db()
+
+    driver = ServerDriver(bluefin.app) if args.server else TestClientDriver(bluefin.app)
+    routes = read_routes(db_path)
+    with sqlite3.connect(db_path) as db:
+        contact = db.execute('SELECT name FROM contacts WHERE user_id = 1 LIMIT 1').fetchone()[0]
+
+    print(f'Latency over {args.requests} requests per route:')
+    route_results = bench_reads(driver, routes, args.requests)
+    route_results.update(bench_crud(driver, args.requests, contact))
+    print('Throughput:')
+    throughput = bench_throughput(driver, routes, args.concurrency, args.throughput_requests)
+    if args.server:
+        driver.close()
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'rows': rows,
+            'driver': 'server' if args.server else 'test_client',
+            'requests_per_route': args.requests,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'routes': route_results,
+        'throughput': throughput,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    print(f"Peak RSS: {results['peak_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results saved to {args.output}')
+    if args.keep and not args.database:
+        print(f'Database kept at {db_path}')
+    elif not args.database:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        os.rmdir(workdir)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+// Items are appended as more pages load, so always look them up fresh
+function getContactItems() {
+  return document.querySelectorAll('.contact-item');
+}
+
+// Infinite scroll: load the next page of contacts when the end of the list comes into view
+const contactsList = document.querySelector('.contacts-list');
+const contactsSentinel = document.getElementById('contacts-sentinel');
+let loadingContacts = false;
+
+async function loadMoreContacts() {
+  const cursor = contactsSentinel.dataset.nextCursor;
+  if (!cursor || loadingContacts || browseState) return;
+
+  loadingContacts = true;
+  try {
+    const params = new URLSearchParams(window.location.search);
+    params.set('cursor', cursor);
+    const response = await fetch(`/api/contacts?${params.toString()}`);
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+
+    const page = await response.json();
+    if (browseState) return;  // a search replaced the list while this page was loading
+    contactsList.insertAdjacentHTML('beforeend', page.html);
+    contactsSentinel.dataset.nextCursor = page.next_cursor || '';
+  } catch (error) {
+    console.error('Error loading contacts:', error);
+  } finally {
+    loadingContacts = false;
+  }
+
+  // Keep going while the sentinel is still on screen (e.g. a very tall window)
+  if (contactsSentinel.getBoundingClientRect().top < window.innerHeight + 400) {
+    loadMoreContacts();
+  }
+}
+
+if (contactsSentinel && 'IntersectionObserver' in window) {
+  new IntersectionObserver(entries => {
+    if (entries.some(entry => entry.isIntersecting)) {
+      loadMoreContacts();
+    }
+  }, { rootMargin: '400px' }).observe(contactsSentinel);
+}
+
+// Search functionality: runs server-side against the full-text index, so it covers
+// every contact rather than only the pages loaded so far. Clearing the box restores
+// the list that was being browsed.
+const searchInput = document.getElementById('search-input');
+let browseState = null;
+let searchTimer = null;
+let searchSequence = 0;
+
+async function runSearch(text) {
+  const sequence = ++searchSequence;
+
+  if (!text) {
+    if (browseState) {
+      contactsList.innerHTML = browseState.html;
+      contactsSentinel.dataset.nextCursor = browseState.nextCursor;
+      browseState = null;
+    }
+    return;
+  }
+
+  if (!browseState) {
+    browseState = { html: contactsList.innerHTML, nextCursor: contactsSentinel.dataset.nextCursor };
+  }
+
+  try {
+    const response = await fetch(`/api/search?q=${encodeURIComponent(text)}`);
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+
+    const results = await response.json();
+    if (sequence !== searchSequence) return;  // a newer search has started
+    contactsList.innerHTML = results.html;
+    contactsSentinel.dataset.nextCursor = '';
+  } catch (error) {
+    console.error('Error searching contacts:', error);
+  }
+}
+
+if (contactsList) {
+  searchInput.addEventListener('input', function() {
+    const text = this.value.trim();
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => runSearch(text), 200);
+  });
+}
+
+// Modal functionality
+const modal = document.getElementById('add-contact-modal');
+const addContactBtn = document.getElementById('add-contact-btn');
+const closeModalBtn = document.getElementById('close-modal');
+const cancelBtn = document.getElementById('cancel-btn');
+const addContactForm = document.getElementById('add-contact-form');
+
+// Open modal
+addContactBtn.addEventListener('click', function() {
+  modal.classList.add('active');
+  document.getElementById('contact-name').focus();
+});
+
+// Close modal
+function closeModal() {
+  modal.classList.remove('active');
+  addContactForm.reset();
+}
+
+closeModalBtn.addEventListener('click', closeModal);
+cancelBtn.addEventListener('click', closeModal);
+
+// Close modal when clicking outside
+modal.addEventListener('click', function(e) {
+  if (e.target === modal) {
+    closeModal();
+  }
+});
+
+// Close modal with Escape key
+document.addEventListener('keydown', function(e) {
+  if (e.key === 'Escape' && modal.classList.contains('active')) {
+    closeModal();
+  }
+});
+
+// Export functionality: streamed from the server with the current filters applied
+document.getElementById('export-btn').addEventListener('click', function() {
+  window.location.href = `/export/contacts.csv${window.location.search}`;
+});
+
+// Upload functionality
+document.getElementById('upload-btn').addEventListener('click', function() {
+  window.location.href = '/upload';
+});
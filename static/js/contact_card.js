@@ -0,0 +1,265 @@
+// The contact being shown, from the contact form's hidden field
+const contactId = parseInt(document.getElementById('contact-id').value, 10);
+const isLocalPreview = window.location.protocol === 'file:';
+
+// Tab functionality
+function initializeTabs() {
+  const tabButtons = document.querySelectorAll('.tab-button');
+  const tabPanels = document.querySelectorAll('.tab-panel');
+
+  tabButtons.forEach(button => {
+    button.addEventListener('click', () => {
+      const targetTab = button.getAttribute('data-tab');
+
+      // Remove active class from all buttons and panels
+      tabButtons.forEach(btn => btn.classList.remove('active'));
+      tabPanels.forEach(panel => panel.classList.remove('active'));
+
+      // Add active class to clicked button and corresponding panel
+      button.classList.add('active');
+      document.getElementById(`${targetTab}-panel`).classList.add('active');
+    });
+  });
+}
+
+// Update profile initials when name changes
+function updateProfileInitials() {
+  const name = document.getElementById('contact-name').value;
+  const nameParts = name.trim().split(' ').filter(part => part.length > 0);
+  let initials = 'NA';
+
+  if (nameParts.length >= 2) {
+    // First letter of first name + first letter of last name
+    initials = nameParts[0][0].toUpperCase() + nameParts[nameParts.length - 1][0].toUpperCase();
+  } else if (nameParts.length === 1) {
+    // First two letters of single name
+    initials = nameParts[0].slice(0, 2).toUpperCase();
+  }
+
+  document.getElementById('profile-initials').textContent = initials;
+}
+
+// Auto-save contact information on input
+document.querySelectorAll('#contact-name, #contact-title, #contact-email, #contact-phone, #contact-firm, #contact-address, #contact-crd-number').forEach(input => {
+  input.addEventListener('blur', function() {
+    // Auto-submit the form when fields lose focus
+    document.getElementById('contact-form').submit();
+  });
+
+  // Update initials when name changes
+  if (input.id === 'contact-name') {
+    input.addEventListener('input', updateProfileInitials);
+  }
+});
+
+// Profile picture upload with auto-submit
+document.getElementById('profile-upload').addEventListener('change', function(e) {
+  const file = e.target.files[0];
+  if (file) {
+    // Show preview immediately
+    const reader = new FileReader();
+    reader.onload = function(e) {
+      const profilePic = document.getElementById('profile-picture');
+      profilePic.style.backgroundImage = `url(${e.target.result})`;
+      profilePic.classList.add('has-image');
+      document.getElementById('profile-initials').style.display = 'none';
+    };
+    reader.readAsDataURL(file);
+
+    // Auto-submit the form
+    document.getElementById('profile-upload-form').submit();
+  }
+});
+
+// Modal functionality
+const noteModal = document.getElementById('add-note-modal');
+const accountModal = document.getElementById('add-account-modal');
+const editAccountModal = document.getElementById('edit-account-modal');
+const addNoteBtn = document.getElementById('add-note-btn');
+const addAccountBtn = document.getElementById('add-account-btn');
+const closeNoteModalBtn = document.getElementById('close-note-modal');
+const closeAccountModalBtn = document.getElementById('close-account-modal');
+const closeEditAccountModalBtn = document.getElementById('close-edit-account-modal');
+const cancelNoteBtn = document.getElementById('cancel-note-btn');
+const cancelAccountBtn = document.getElementById('cancel-account-btn');
+const cancelEditAccountBtn = document.getElementById('cancel-edit-account-btn');
+const addNoteForm = document.getElementById('add-note-form');
+const addAccountForm = document.getElementById('add-account-form');
+const editAccountForm = document.getElementById('edit-account-form');
+
+// Open modals
+addNoteBtn.addEventListener('click', function() {
+  noteModal.classList.add('active');
+  document.getElementById('note-content').focus();
+});
+
+addAccountBtn.addEventListener('click', function() {
+  accountModal.classList.add('active');
+  document.getElementById('account-number').focus();
+});
+
+// Close modals
+function closeNoteModal() {
+  noteModal.classList.remove('active');
+  addNoteForm.reset();
+}
+
+function closeAccountModal() {
+  accountModal.classList.remove('active');
+  addAccountForm.reset();
+}
+
+function closeEditAccountModal() {
+  editAccountModal.classList.remove('active');
+  editAccountForm.reset();
+}
+
+closeNoteModalBtn.addEventListener('click', closeNoteModal);
+closeAccountModalBtn.addEventListener('click', closeAccountModal);
+closeEditAccountModalBtn.addEventListener('click', closeEditAccountModal);
+cancelNoteBtn.addEventListener('click', closeNoteModal);
+cancelAccountBtn.addEventListener('click', closeAccountModal);
+cancelEditAccountBtn.addEventListener('click', closeEditAccountModal);
+
+// Close modals when clicking outside
+noteModal.addEventListener('click', function(e) {
+  if (e.target === noteModal) {
+    closeNoteModal();
+  }
+});
+
+accountModal.addEventListener('click', function(e) {
+  if (e.target === accountModal) {
+    closeAccountModal();
+  }
+});
+
+editAccountModal.addEventListener('click', function(e) {
+  if (e.target === editAccountModal) {
+    closeEditAccountModal();
+  }
+});
+
+// Close modals with Escape key
+document.addEventListener('keydown', function(e) {
+  if (e.key === 'Escape') {
+    if (noteModal.classList.contains('active')) {
+      closeNoteModal();
+    }
+    if (accountModal.classList.contains('active')) {
+      closeAccountModal();
+    }
+    if (editAccountModal.classList.contains('active')) {
+      closeEditAccountModal();
+    }
+  }
+});
+
+// Note and account management functions
+function editNote(noteId, content) {
+  const newContent = prompt('Edit note:', content);
+  if (newContent !== null && newContent.trim() !== '') {
+    // In a real implementation, you'd send this to the server
+    alert('Note editing will be implemented with backend integration.');
+  }
+}
+
+function deleteNote(noteId) {
+  if (confirm('Are you sure you want to delete this note?')) {
+    fetch(`/delete_contact_note/${noteId}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      }
+    })
+    .then(response => response.json())
+    .then(data => {
+      if (data.message) {
+        location.reload(); // Refresh to show updated notes
+      } else {
+        alert('Error deleting note: ' + data.error);
+      }
+    })
+    .catch(error => {
+      console.error('Error:', error);
+      alert('Error deleting note');
+    });
+  }
+}
+
+// Enhanced editAccount function with full functionality
+function editAccount(accountId) {
+  // Show loading state
+  const editBtn = event.target;
+  const originalText = editBtn.textContent;
+  editBtn.textContent = 'Loading...';
+  editBtn.disabled = true;
+
+  // Fetch account data
+  fetch(`/get_registered_account/${accountId}`)
+    .then(response => {
+      if (!response.ok) {
+        throw new Error('Failed to fetch account data');
+      }
+      return response.json();
+    })
+    .then(account => {
+      // Populate the edit form
+      document.getElementById('edit-account-id').value = account.id;
+      document.getElementById('edit-account-number').value = account.account_number || '';
+      document.getElementById('edit-client-name').value = account.client_name || '';
+      document.getElementById('edit-strategy').value = account.strategy || '';
+      document.getElementById('edit-inception-value').value = account.inception_value || '';
+      document.getElementById('edit-fee-percent').value = account.fee_percent || '';
+      document.getElementById('edit-open-date').value = account.open_date || '';
+
+      // Set status radio button
+      if (account.status === 'New') {
+        document.getElementById('edit-status-new').checked = true;
+      } else if (account.status === 'Repapered') {
+        document.getElementById('edit-status-repapered').checked = true;
+      }
+
+      // Set form action
+      editAccountForm.action = `/update_registered_account/${account.id}`;
+
+      // Show the modal
+      editAccountModal.classList.add('active');
+      document.getElementById('edit-account-number').focus();
+    })
+    .catch(error => {
+      console.error('Error:', error);
+      alert('Error loading account data: ' + error.message);
+    })
+    .finally(() => {
+      // Reset button state
+      editBtn.textContent = originalText;
+      editBtn.disabled = false;
+    });
+}
+
+function deleteAccount(accountId) {
+  if (confirm('Are you sure you want to delete this account?')) {
+    fetch(`/delete_registered_account/${accountId}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      }
+    })
+    .then(response => response.json())
+    .then(data => {
+      if (data.message) {
+        location.reload(); // Refresh to show updated accounts
+      } else {
+        alert('Error deleting account: ' + data.error);
+      }
+    })
+    .catch(error => {
+      console.error('Error:', error);
+      alert('Error deleting account');
+    });
+  }
+}
+
+// Initialize page
+initializeTabs();
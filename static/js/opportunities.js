@@ -0,0 +1,742 @@
+// Global variables
+let opportunities = [];
+let filteredOpportunities = [];
+let currentEditingId = null;
+let isLoading = false;
+
+// API Helper Functions
+async function apiRequest(url, options = {}) {
+  const defaultOptions = {
+    headers: {
+      'Content-Type': 'application/json',
+    },
+  };
+
+  const response = await fetch(url, { ...defaultOptions, ...options });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({ error: 'Network error' }));
+    throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
+  }
+
+  return response.json();
+}
+
+function showLoading() {
+  document.getElementById('loading-overlay').classList.add('active');
+  isLoading = true;
+}
+
+function hideLoading() {
+  document.getElementById('loading-overlay').classList.remove('active');
+  isLoading = false;
+}
+
+function showMessage(message, type = 'error') {
+  const messagesDiv = document.getElementById('modal-messages');
+  messagesDiv.innerHTML = `<div class="${type}-message">${message}</div>`;
+  setTimeout(() => {
+    messagesDiv.innerHTML = '';
+  }, 5000);
+}
+
+// Load opportunities from database. The first load fetches the full list; later
+// loads only fetch rows changed since syncCursor, plus the ids deleted since then.
+let syncCursor = null;
+
+async function loadOpportunities(full = false) {
+  try {
+    showLoading();
+    // Save buffered moves first so the reload doesn't undo them
+    await flushStageMoves();
+    if (full || syncCursor === null) {
+      const response = await fetch('/api/opportunities');
+      if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+      opportunities = await response.json();
+      syncCursor = response.headers.get('X-Sync-Cursor');
+    } else {
+      const changes = await apiRequest(`/api/opportunities?since=${encodeURIComponent(syncCursor)}`);
+      const deleted = new Set(changes.deleted);
+      const byId = new Map((changes.full ? [] : opportunities)
+        .filter(opp => !deleted.has(opp.id))
+        .map(opp => [opp.id, opp]));
+      changes.opportunities.forEach(opp => byId.set(opp.id, opp));
+      opportunities = [...byId.values()]
+        .sort((a, b) => String(b.created_at).localeCompare(String(a.created_at)));
+      syncCursor = changes.cursor;
+    }
+    filteredOpportunities = [...opportunities];
+    renderOpportunities();
+    updateDashboard();
+    drawPipelineChart();
+    populateFilterDropdowns();
+  } catch (error) {
+    console.error('Error loading opportunities:', error);
+    showMessage('Failed to load opportunities: ' + error.message);
+  } finally {
+    hideLoading();
+  }
+}
+
+// Save opportunity to database
+async function saveOpportunityToDb(opportunityData, isEdit = false) {
+  try {
+    const url = isEdit ? `/api/opportunities/${currentEditingId}` : '/api/opportunities';
+    const method = isEdit ? 'PUT' : 'POST';
+
+    const savedOpportunity = await apiRequest(url, {
+      method: method,
+      body: JSON.stringify(opportunityData)
+    });
+
+    if (isEdit) {
+      const index = opportunities.findIndex(opp => opp.id === currentEditingId);
+      if (index !== -1) {
+        opportunities[index] = savedOpportunity;
+      }
+    } else {
+      opportunities.push(savedOpportunity);
+    }
+
+    applyFilters();
+    updateDashboard();
+    drawPipelineChart();
+
+    return savedOpportunity;
+  } catch (error) {
+    console.error('Error saving opportunity:', error);
+    throw error;
+  }
+}
+
+// Delete opportunity from database
+async function deleteOpportunityFromDb(opportunityId) {
+  try {
+    await apiRequest(`/api/opportunities/${opportunityId}`, {
+      method: 'DELETE'
+    });
+
+    opportunities = opportunities.filter(opp => opp.id !== opportunityId);
+    applyFilters();
+    updateDashboard();
+    drawPipelineChart();
+  } catch (error) {
+    console.error('Error deleting opportunity:', error);
+    throw error;
+  }
+}
+
+// Stage moves are buffered and sent together through the batch endpoint, so
+// dragging many cards in a row costs one request and one commit
+const STAGE_FLUSH_DELAY = 800;
+const pendingStageMoves = new Map();
+let stageFlushTimer = null;
+
+function queueStageMove(opportunityId, newStage) {
+  const opportunity = opportunities.find(opp => opp.id === opportunityId);
+  if (opportunity) {
+    opportunity.stage = newStage;
+    applyFilters();
+    updateDashboard();
+    drawPipelineChart();
+  }
+  pendingStageMoves.set(opportunityId, newStage);
+  clearTimeout(stageFlushTimer);
+  stageFlushTimer = setTimeout(flushStageMoves, STAGE_FLUSH_DELAY);
+}
+
+async function flushStageMoves(keepalive = false) {
+  clearTimeout(stageFlushTimer);
+  if (pendingStageMoves.size === 0) return;
+
+  const operations = [...pendingStageMoves].map(([id, stage]) => ({ op: 'stage', id, stage }));
+  pendingStageMoves.clear();
+
+  try {
+    const response = await apiRequest('/api/opportunities/batch', {
+      method: 'POST',
+      body: JSON.stringify({ operations }),
+      keepalive
+    });
+    if (response.failed > 0) {
+      console.error('Some stage moves failed:', response.results.filter(result => result.status !== 200));
+      loadOpportunities(true);
+    }
+  } catch (error) {
+    console.error('Error saving stage moves:', error);
+    // Revert the optimistic moves
+    loadOpportunities(true);
+  }
+}
+
+window.addEventListener('pagehide', () => flushStageMoves(true));
+
+// Populate filter dropdowns with unique values from data
+function populateFilterDropdowns() {
+  const salespersonFilter = document.getElementById('salesperson-filter');
+
+  // Clear existing options (except "All Salespeople")
+  while (salespersonFilter.children.length > 1) {
+    salespersonFilter.removeChild(salespersonFilter.lastChild);
+  }
+
+  // Get unique salespeople from opportunities
+  const uniqueSalespeople = [...new Set(opportunities
+    .map(opp => opp.salesperson)
+    .filter(sp => sp && sp.trim() !== '')
+  )].sort();
+
+  uniqueSalespeople.forEach(salesperson => {
+    const option = document.createElement('option');
+    option.value = salesperson;
+    option.textContent = salesperson;
+    salespersonFilter.appendChild(option);
+  });
+}
+
+// Render opportunities in Kanban columns
+function renderOpportunities() {
+  const stages = ['prospecting', 'qualifying', 'proposal', 'negotiation', 'closed-won', 'closed-lost'];
+
+  stages.forEach(stage => {
+    const column = document.getElementById(`${stage}-column`);
+    const stageOpportunities = filteredOpportunities.filter(opp => opp.stage === stage);
+
+    column.innerHTML = '';
+
+    stageOpportunities.forEach(opportunity => {
+      const card = createOpportunityCard(opportunity);
+      column.appendChild(card);
+    });
+
+    // Update column count
+    const countElement = column.parentElement.querySelector('.column-count');
+    countElement.textContent = stageOpportunities.length;
+  });
+}
+
+// Create opportunity card element
+function createOpportunityCard(opportunity) {
+  const card = document.createElement('div');
+  card.className = `opportunity-card stage-${opportunity.stage}`;
+  card.draggable = true;
+  card.dataset.id = opportunity.id;
+
+  const formattedAmount = new Intl.NumberFormat('en-US', {
+    style: 'currency',
+    currency: 'USD',
+    minimumFractionDigits: 0
+  }).format(opportunity.amount || 0);
+
+  const closeDate = opportunity.close_date ? new Date(opportunity.close_date).toLocaleDateString() : 'Not set';
+
+  card.innerHTML = `
+    <div class="card-header">
+      <div class="card-title">${opportunity.title}</div>
+      <div class="card-actions">
+        <button class="card-action" onclick="editOpportunity(${opportunity.id})" title="Edit">
+          <svg width="12" height="12" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <path d="M11 4H4a2 2 0 0 0-2 2v14a2 2 0 0 0 2 2h14a2 2 0 0 0 2-2v-7"></path>
+            <path d="M18.5 2.5a2.121 2.121 0 0 1 3 3L12 15l-4 1 1-4 9.5-9.5z"></path>
+          </svg>
+        </button>
+        <button class="card-action" onclick="deleteOpportunity(${opportunity.id})" title="Delete">
+          <svg width="12" height="12" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <polyline points="3,6 5,6 21,6"></polyline>
+            <path d="M19,6v14a2,2,0,0,1-2,2H7a2,2,0,0,1-2-2V6m3,0V4a2,2,0,0,1,2-2h4a2,2,0,0,1,2,2V6"></path>
+          </svg>
+        </button>
+      </div>
+    </div>
+    <div class="card-details">
+      <div class="card-detail">
+        <span>Contact:</span>
+        <span>${opportunity.contact}</span>
+      </div>
+      ${opportunity.salesperson ? `
+      <div class="card-detail">
+        <span>Salesperson:</span>
+        <span class="card-salesperson">${opportunity.salesperson}</span>
+      </div>
+      ` : ''}
+      <div class="card-detail">
+        <span>Amount:</span>
+        <span class="card-amount">${formattedAmount}</span>
+      </div>
+      <div class="card-detail">
+        <span>Probability:</span>
+        <span class="card-probability">${opportunity.probability || 0}%</span>
+      </div>
+      <div class="card-detail">
+        <span>Close Date:</span>
+        <span class="card-date">${closeDate}</span>
+      </div>
+    </div>
+  `;
+
+  // Add drag event listeners
+  card.addEventListener('dragstart', handleDragStart);
+  card.addEventListener('dragend', handleDragEnd);
+  card.addEventListener('click', (e) => {
+    if (!e.target.closest('.card-action')) {
+      editOpportunity(opportunity.id);
+    }
+  });
+
+  return card;
+}
+
+// Update dashboard statistics
+function updateDashboard() {
+  const totalOpps = filteredOpportunities.length;
+  const totalValue = filteredOpportunities.reduce((sum, opp) => sum + (opp.amount || 0), 0);
+  const weightedValue = filteredOpportunities.reduce((sum, opp) => sum + ((opp.amount || 0) * (opp.probability || 0) / 100), 0);
+  const avgDealSize = totalOpps > 0 ? totalValue / totalOpps : 0;
+
+  document.getElementById('total-opportunities').textContent = totalOpps;
+  document.getElementById('total-value').textContent = new Intl.NumberFormat('en-US', {
+    style: 'currency',
+    currency: 'USD',
+    minimumFractionDigits: 0
+  }).format(totalValue);
+  document.getElementById('weighted-value').textContent = new Intl.NumberFormat('en-US', {
+    style: 'currency',
+    currency: 'USD',
+    minimumFractionDigits: 0
+  }).format(weightedValue);
+  document.getElementById('avg-deal-size').textContent = new Intl.NumberFormat('en-US', {
+    style: 'currency',
+    currency: 'USD',
+    minimumFractionDigits: 0
+  }).format(avgDealSize);
+}
+
+// Draw pipeline chart
+function drawPipelineChart() {
+  const canvas = document.getElementById('pipeline-chart');
+  const ctx = canvas.getContext('2d');
+
+  // Clear canvas
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+
+  const stages = ['prospecting', 'qualifying', 'proposal', 'negotiation', 'closed-won', 'closed-lost'];
+  const stageLabels = ['Prospecting', 'Qualifying', 'Proposal', 'Negotiation', 'Closed Won', 'Closed Lost'];
+  const colors = ['#6c757d', '#17a2b8', '#ffc107', '#fd7e14', '#28a745', '#dc3545'];
+
+  const stageValues = stages.map(stage => {
+    return filteredOpportunities
+      .filter(opp => opp.stage === stage)
+      .reduce((sum, opp) => sum + (opp.amount || 0), 0);
+  });
+
+  const maxValue = Math.max(...stageValues);
+  if (maxValue === 0) {
+    ctx.fillStyle = '#666';
+    ctx.font = '16px Arial';
+    ctx.textAlign = 'center';
+    ctx.fillText('No data to display', canvas.width / 2, canvas.height / 2);
+    return;
+  }
+
+  const barWidth = 50;
+  const barSpacing = 10;
+  const chartHeight = 150;
+  const chartTop = 30;
+
+  // Draw bars
+  stageValues.forEach((value, index) => {
+    const barHeight = maxValue > 0 ? (value / maxValue) * chartHeight : 0;
+    const x = index * (barWidth + barSpacing) + 20;
+    const y = chartTop + chartHeight - barHeight;
+
+    ctx.fillStyle = colors[index];
+    ctx.fillRect(x, y, barWidth, barHeight);
+
+    // Draw value labels
+    ctx.fillStyle = '#333';
+    ctx.font = '10px Arial';
+    ctx.textAlign = 'center';
+    const formattedValue = new Intl.NumberFormat('en-US', {
+      style: 'currency',
+      currency: 'USD',
+      minimumFractionDigits: 0,
+      notation: 'compact'
+    }).format(value);
+    ctx.fillText(formattedValue, x + barWidth/2, y - 5);
+
+    // Draw stage labels
+    ctx.fillText(stageLabels[index], x + barWidth/2, chartTop + chartHeight + 15);
+  });
+}
+
+// Setup event listeners
+function setupEventListeners() {
+  // Modal controls
+  document.getElementById('add-opportunity-btn').addEventListener('click', () => openModal());
+  document.getElementById('close-modal').addEventListener('click', closeModal);
+  document.getElementById('cancel-btn').addEventListener('click', closeModal);
+  document.getElementById('opportunity-form').addEventListener('submit', saveOpportunity);
+  document.getElementById('delete-btn').addEventListener('click', async () => {
+    if (currentEditingId && confirm('Are you sure you want to delete this opportunity?')) {
+      try {
+        const deleteBtn = document.getElementById('delete-btn');
+        deleteBtn.disabled = true;
+        deleteBtn.innerHTML = '<div class="loading"></div> Deleting...';
+
+        await deleteOpportunityFromDb(currentEditingId);
+        closeModal();
+        showMessage('Opportunity deleted successfully!', 'success');
+      } catch (error) {
+        showMessage('Failed to delete opportunity: ' + error.message);
+      } finally {
+        const deleteBtn = document.getElementById('delete-btn');
+        deleteBtn.disabled = false;
+        deleteBtn.textContent = 'Delete';
+      }
+    }
+  });
+
+  // Filters
+  document.getElementById('contact-filter').addEventListener('change', applyFilters);
+  document.getElementById('salesperson-filter').addEventListener('change', applyFilters);
+  document.getElementById('amount-filter').addEventListener('change', applyFilters);
+  document.getElementById('probability-filter').addEventListener('change', applyFilters);
+  document.getElementById('date-filter').addEventListener('change', applyFilters);
+  document.getElementById('clear-filters').addEventListener('click', clearFilters);
+
+  // Export
+  document.getElementById('export-pipeline').addEventListener('click', exportPipeline);
+
+  // Drag and drop
+  setupDragAndDrop();
+
+  // Close modal when clicking outside
+  document.getElementById('opportunity-modal').addEventListener('click', function(e) {
+    if (e.target === this) {
+      closeModal();
+    }
+  });
+}
+
+// Setup drag and drop
+function setupDragAndDrop() {
+  const columns = document.querySelectorAll('.column-body');
+
+  columns.forEach(column => {
+    column.addEventListener('dragover', handleDragOver);
+    column.addEventListener('drop', handleDrop);
+    column.addEventListener('dragenter', handleDragEnter);
+    column.addEventListener('dragleave', handleDragLeave);
+  });
+}
+
+// Drag and drop handlers
+let draggedElement = null;
+
+function handleDragStart(e) {
+  draggedElement = this;
+  this.classList.add('dragging');
+  e.dataTransfer.effectAllowed = 'move';
+  e.dataTransfer.setData('text/html', this.outerHTML);
+}
+
+function handleDragEnd(e) {
+  this.classList.remove('dragging');
+  draggedElement = null;
+}
+
+function handleDragOver(e) {
+  if (e.preventDefault) {
+    e.preventDefault();
+  }
+  e.dataTransfer.dropEffect = 'move';
+  return false;
+}
+
+function handleDragEnter(e) {
+  this.classList.add('drag-over');
+}
+
+function handleDragLeave(e) {
+  this.classList.remove('drag-over');
+}
+
+async function handleDrop(e) {
+  if (e.stopPropagation) {
+    e.stopPropagation();
+  }
+
+  this.classList.remove('drag-over');
+
+  if (draggedElement !== this) {
+    const opportunityId = parseInt(draggedElement.dataset.id);
+    const newStage = this.parentElement.dataset.stage;
+
+    queueStageMove(opportunityId, newStage);
+  }
+
+  return false;
+}
+
+// Modal functions
+function openModal(opportunityId = null) {
+  const modal = document.getElementById('opportunity-modal');
+  const form = document.getElementById('opportunity-form');
+  const title = document.getElementById('modal-title');
+  const deleteBtn = document.getElementById('delete-btn');
+
+  currentEditingId = opportunityId;
+
+  // Clear any previous messages
+  document.getElementById('modal-messages').innerHTML = '';
+
+  if (opportunityId) {
+    const opportunity = opportunities.find(opp => opp.id === opportunityId);
+    if (opportunity) {
+      title.textContent = 'Edit Opportunity';
+      deleteBtn.style.display = 'inline-block';
+
+      // Populate form
+      document.getElementById('opp-title').value = opportunity.title || '';
+      // Opportunities from before contact_id existed may only match by name
+      const contactSelect = document.getElementById('opp-contact');
+      contactSelect.value = opportunity.contact_id || '';
+      if (!contactSelect.value) {
+        const match = Array.from(contactSelect.options).find(option => option.value && option.text === opportunity.contact);
+        contactSelect.value = match ? match.value : '';
+      }
+      document.getElementById('opp-salesperson').value = opportunity.salesperson || '';
+      document.getElementById('opp-amount').value = opportunity.amount || '';
+      document.getElementById('opp-probability').value = opportunity.probability || 50;
+      document.getElementById('opp-stage').value = opportunity.stage || 'prospecting';
+      document.getElementById('opp-close-date').value = opportunity.close_date || '';
+      document.getElementById('opp-notes').value = opportunity.notes || '';
+
+      // Handle reminder datetime format
+      if (opportunity.reminder) {
+        const reminderDate = new Date(opportunity.reminder);
+        if (!isNaN(reminderDate.getTime())) {
+          document.getElementById('opp-reminder').value = reminderDate.toISOString().slice(0, 16);
+        }
+      }
+    }
+  } else {
+    title.textContent = 'Add New Opportunity';
+    deleteBtn.style.display = 'none';
+    form.reset();
+    document.getElementById('opp-probability').value = 50; // Reset to default
+  }
+
+  modal.classList.add('active');
+  document.getElementById('opp-title').focus();
+}
+
+function closeModal() {
+  const modal = document.getElementById('opportunity-modal');
+  modal.classList.remove('active');
+  currentEditingId = null;
+}
+
+async function saveOpportunity(e) {
+  e.preventDefault();
+
+  const saveBtn = document.getElementById('save-btn');
+  const btnText = saveBtn.querySelector('.btn-text');
+  const btnLoading = saveBtn.querySelector('.loading');
+
+  try {
+    // Show loading state
+    saveBtn.disabled = true;
+    btnText.style.display = 'none';
+    btnLoading.style.display = 'inline-block';
+
+    const formData = new FormData(e.target);
+    const contactOption = document.getElementById('opp-contact').selectedOptions[0];
+    const opportunityData = {
+      title: formData.get('title'),
+      contact: contactOption.text,
+      contact_id: parseInt(contactOption.value),
+      salesperson: formData.get('salesperson') || null,
+      amount: parseFloat(formData.get('amount')) || 0,
+      probability: parseInt(formData.get('probability')) || 50,
+      stage: formData.get('stage'),
+      close_date: formData.get('close_date') || null,
+      notes: formData.get('notes') || null,
+      reminder: formData.get('reminder') || null
+    };
+
+    await saveOpportunityToDb(opportunityData, !!currentEditingId);
+
+    closeModal();
+    showMessage('Opportunity saved successfully!', 'success');
+
+  } catch (error) {
+    console.error('Error saving opportunity:', error);
+    showMessage('Failed to save opportunity: ' + error.message);
+  } finally {
+    // Reset button state
+    saveBtn.disabled = false;
+    btnText.style.display = 'inline';
+    btnLoading.style.display = 'none';
+  }
+}
+
+function editOpportunity(id) {
+  openModal(id);
+}
+
+async function deleteOpportunity(id) {
+  if (confirm('Are you sure you want to delete this opportunity?')) {
+    try {
+      await deleteOpportunityFromDb(id);
+      console.log('Deleted opportunity:', id);
+    } catch (error) {
+      console.error('Error deleting opportunity:', error);
+      alert('Failed to delete opportunity: ' + error.message);
+    }
+  }
+}
+
+// Filter functions
+function applyFilters() {
+  const contactFilter = document.getElementById('contact-filter').value;
+  const salespersonFilter = document.getElementById('salesperson-filter').value;
+  const amountFilter = document.getElementById('amount-filter').value;
+  const probabilityFilter = document.getElementById('probability-filter').value;
+  const dateFilter = document.getElementById('date-filter').value;
+
+  filteredOpportunities = opportunities.filter(opp => {
+    // Contact filter
+    if (contactFilter && opp.contact !== contactFilter) return false;
+
+    // Salesperson filter
+    if (salespersonFilter && opp.salesperson !== salespersonFilter) return false;
+
+    // Amount filter
+    if (amountFilter) {
+      const amount = opp.amount || 0;
+      const [min, max] = amountFilter.split('-').map(v => v === '' ? Infinity : parseInt(v));
+      if (amountFilter.includes('+')) {
+        if (amount < min) return false;
+      } else {
+        if (amount < min || amount > max) return false;
+      }
+    }
+
+    // Probability filter
+    if (probabilityFilter) {
+      const probability = opp.probability || 0;
+      const [min, max] = probabilityFilter.split('-').map(v => parseInt(v));
+      if (probability < min || probability > max) return false;
+    }
+
+    // Date filter
+    if (dateFilter && opp.close_date) {
+      const oppDate = new Date(opp.close_date);
+      const filterDate = new Date(dateFilter);
+      if (oppDate.toDateString() !== filterDate.toDateString()) return false;
+    }
+
+    return true;
+  });
+
+  renderOpportunities();
+  updateDashboard();
+  drawPipelineChart();
+}
+
+function clearFilters() {
+  document.getElementById('contact-filter').value = '';
+  document.getElementById('salesperson-filter').value = '';
+  document.getElementById('amount-filter').value = '';
+  document.getElementById('probability-filter').value = '';
+  document.getElementById('date-filter').value = '';
+
+  filteredOpportunities = [...opportunities];
+  renderOpportunities();
+  updateDashboard();
+  drawPipelineChart();
+}
+
+function exportPipeline() {
+  const csvContent = [
+    ['Title', 'Contact', 'Salesperson', 'Amount', 'Probability', 'Stage', 'Close Date', 'Notes'].join(','),
+    ...filteredOpportunities.map(opp => [
+      `"${opp.title || ''}"`,
+      `"${opp.contact || ''}"`,
+      `"${opp.salesperson || ''}"`,
+      opp.amount || 0,
+      opp.probability || 0,
+      `"${opp.stage || ''}"`,
+      `"${opp.close_date || ''}"`,
+      `"${(opp.notes || '').replace(/"/g, '""')}"`
+    ].join(','))
+  ].join('\n');
+
+  const blob = new Blob([csvContent], { type: 'text/csv' });
+  const url = window.URL.createObjectURL(blob);
+  const a = document.createElement('a');
+  a.href = url;
+  a.download = 'pipeline-export.csv';
+  document.body.appendChild(a);
+  a.click();
+  document.body.removeChild(a);
+  window.URL.revokeObjectURL(url);
+}
+
+// Notes: the newest page is rendered with the page, older ones are fetched by cursor
+function createNoteItem(note) {
+  const item = document.createElement('li');
+  item.className = 'note-item';
+  const meta = document.createElement('div');
+  meta.className = 'note-meta';
+  meta.textContent = `${note.user} \u00b7 ${note.timestamp}`;
+  const content = document.createElement('div');
+  content.className = 'note-content';
+  content.textContent = note.content;
+  item.append(meta, content);
+  return item;
+}
+
+async function loadMoreNotes() {
+  const button = document.getElementById('load-more-notes');
+  const cursor = button.dataset.nextCursor;
+  if (!cursor) {
+    return;
+  }
+
+  button.disabled = true;
+  try {
+    const page = await apiRequest(`/api/notes?cursor=${encodeURIComponent(cursor)}`);
+    const list = document.getElementById('notes-list');
+    page.notes.forEach(note => list.appendChild(createNoteItem(note)));
+    button.dataset.nextCursor = page.next_cursor || '';
+    button.hidden = !page.next_cursor;
+  } catch (error) {
+    console.error('Error loading notes:', error);
+  } finally {
+    button.disabled = false;
+  }
+}
+
+// Initialize the application
+document.addEventListener('DOMContentLoaded', function() {
+  setupEventListeners();
+  loadOpportunities();
+  document.getElementById('load-more-notes').addEventListener('click', loadMoreNotes);
+});
+
+// Pick up changes made in other tabs when this one becomes visible again
+document.addEventListener('visibilitychange', function() {
+  if (document.visibilityState === 'visible' && syncCursor !== null && !isLoading) {
+    loadOpportunities();
+  }
+});
+
+// Auto-save when user navigates away
+window.addEventListener('beforeunload', function(e) {
+  if (isLoading) {
+    e.preventDefault();
+    e.returnValue = 'Changes are being saved. Are you sure you want to leave?';
+  }
+});
@@ -0,0 +1,491 @@
+// Sample contact data with addresses and firms
+const contacts = [
+  { name: "John Smith", email: "john.smith@example.com", phone: "(555) 123-4567", firm: "Morgan Stanley", address: "123 Main St, New York, NY 10001" },
+  { name: "Sarah Johnson", email: "sarah.j@example.com", phone: "(555) 234-5678", firm: "Goldman Sachs", address: "456 Park Ave, Boston, MA 02108" },
+  { name: "Michael Brown", email: "m.brown@example.com", phone: "(555) 345-6789", firm: "JPMorgan Chase", address: "789 Oak Dr, Chicago, IL 60601" },
+  { name: "Emily Davis", email: "emily.davis@example.com", phone: "(555) 456-7890", firm: "Bank of America", address: "101 Pine St, San Francisco, CA 94101" },
+  { name: "Robert Wilson", email: "rwilson@example.com", phone: "(555) 567-8901", firm: "Wells Fargo", address: "202 Maple Rd, Seattle, WA 98101" },
+  { name: "Jennifer Lee", email: "jennifer.lee@example.com", phone: "(555) 678-9012", firm: "Citigroup", address: "303 Cedar Ln, Austin, TX 78701" },
+  { name: "David Martinez", email: "d.martinez@example.com", phone: "(555) 789-0123", firm: "UBS", address: "404 Birch Blvd, Denver, CO 80201" },
+  { name: "Lisa Anderson", email: "lisa.a@example.com", phone: "(555) 890-1234", firm: "Merrill Lynch", address: "505 Elm St, Portland, OR 97201" },
+  { name: "James Taylor", email: "james.t@example.com", phone: "(555) 901-2345", firm: "Charles Schwab", address: "606 Spruce Ave, Miami, FL 33101" },
+  { name: "Patricia Moore", email: "p.moore@example.com", phone: "(555) 012-3456", firm: "Fidelity", address: "707 Willow Way, Atlanta, GA 30301" },
+  { name: "Thomas Jackson", email: "t.jackson@example.com", phone: "(555) 123-4567", firm: "Edward Jones", address: "808 Aspen Ct, Dallas, TX 75201" },
+  { name: "Jessica White", email: "j.white@example.com", phone: "(555) 234-5678", firm: "Raymond James", address: "909 Redwood Rd, Phoenix, AZ 85001" }
+];
+
+let currentFilteredContacts = [...contacts]; // Track filtered contacts for proper indexing
+
+// Function to save contacts to localStorage
+function saveContacts() {
+  localStorage.setItem('crmContacts', JSON.stringify(contacts));
+}
+
+// Function to load contacts from localStorage
+function loadContacts() {
+  const savedContacts = localStorage.getItem('crmContacts');
+  if (savedContacts) {
+    contacts.length = 0; // Clear existing array
+    contacts.push(...JSON.parse(savedContacts)); // Add saved contacts
+    currentFilteredContacts = [...contacts]; // Update filtered contacts
+  }
+}
+
+// Function to update contact count
+function updateContactCount() {
+  document.getElementById('contact-count').textContent = `${currentFilteredContacts.length} contacts`;
+}
+
+// Function to generate table rows with editable cells
+function generateTableRows(contactsArray) {
+  const tableBody = document.getElementById('contacts-body');
+  tableBody.innerHTML = '';
+  currentFilteredContacts = contactsArray; // Update current filtered contacts
+
+  contactsArray.forEach((contact, displayIndex) => {
+    // Find the original index in the full contacts array
+    const originalIndex = contacts.findIndex(c =>
+      c.name === contact.name && c.email === contact.email && c.phone === contact.phone
+    );
+
+    const row = document.createElement('tr');
+    row.dataset.index = originalIndex;
+
+    // Create editable cells
+    row.innerHTML = `
+      <td><div class="editable-cell" contenteditable="true" data-field="name" data-index="${originalIndex}">${contact.name}</div></td>
+      <td><div class="editable-cell" contenteditable="true" data-field="email" data-index="${originalIndex}">${contact.email}</div></td>
+      <td><div class="editable-cell" contenteditable="true" data-field="phone" data-index="${originalIndex}">${contact.phone}</div></td>
+      <td><div class="editable-cell" contenteditable="true" data-field="firm" data-index="${originalIndex}">${contact.firm || ''}</div></td>
+      <td><div class="editable-cell" contenteditable="true" data-field="address" data-index="${originalIndex}">${contact.address || ''}</div></td>
+      <td>
+        <div class="action-buttons">
+          <button class="open-button" data-index="${originalIndex}">Open</button>
+          <button class="delete-button" data-index="${originalIndex}">Delete</button>
+        </div>
+      </td>
+    `;
+    tableBody.appendChild(row);
+  });
+
+  // Add event listeners to editable cells
+  setupEditableCells();
+
+  // Add event listeners to action buttons
+  setupActionButtons();
+
+  // Update contact count
+  updateContactCount();
+}
+
+// Setup editable cells
+function setupEditableCells() {
+  const cells = document.querySelectorAll('.editable-cell');
+
+  cells.forEach(cell => {
+    // Store original value when starting to edit
+    cell.addEventListener('focus', function() {
+      cell.dataset.originalValue = cell.textContent;
+    });
+
+    // Handle editing completion
+    cell.addEventListener('blur', function() {
+      const field = cell.dataset.field;
+      const index = parseInt(cell.dataset.index);
+      const newValue = cell.textContent.trim();
+
+      // Update the data if changed
+      if (newValue !== cell.dataset.originalValue) {
+        contacts[index][field] = newValue;
+        saveContacts(); // Save to localStorage
+        updateLastEdited();
+      }
+    });
+
+    // Handle keyboard events
+    cell.addEventListener('keydown', function(e) {
+      // Enter key completes editing
+      if (e.key === 'Enter') {
+        e.preventDefault();
+        cell.blur();
+      }
+
+      // Escape key cancels editing
+      if (e.key === 'Escape') {
+        cell.textContent = cell.dataset.originalValue;
+        cell.blur();
+      }
+
+      // Tab key moves to next cell
+      if (e.key === 'Tab') {
+        e.preventDefault();
+
+        const currentRow = cell.closest('tr');
+        const currentCellIndex = Array.from(currentRow.cells).findIndex(td =>
+          td.contains(cell)
+        );
+
+        let nextCell;
+
+        if (e.shiftKey) {
+          // Move to previous cell
+          if (currentCellIndex > 0) {
+            nextCell = currentRow.cells[currentCellIndex - 1].querySelector('.editable-cell');
+          } else {
+            // Move to last cell of previous row
+            const prevRow = currentRow.previousElementSibling;
+            if (prevRow) {
+              const lastCellIndex = prevRow.cells.length - 2; // Skip the actions cell
+              nextCell = prevRow.cells[lastCellIndex].querySelector('.editable-cell');
+            }
+          }
+        } else {
+          // Move to next cell
+          if (currentCellIndex < currentRow.cells.length - 2) { // Skip the actions cell
+            nextCell = currentRow.cells[currentCellIndex + 1].querySelector('.editable-cell');
+          } else {
+            // Move to first cell of next row
+            const nextRow = currentRow.nextElementSibling;
+            if (nextRow) {
+              nextCell = nextRow.cells[0].querySelector('.editable-cell');
+            }
+          }
+        }
+
+        if (nextCell) {
+          nextCell.focus();
+          // Place cursor at the end
+          const range = document.createRange();
+          const sel = window.getSelection();
+          range.selectNodeContents(nextCell);
+          range.collapse(false);
+          sel.removeAllRanges();
+          sel.addRange(range);
+        }
+      }
+    });
+  });
+}
+
+// Setup action buttons
+function setupActionButtons() {
+  // Setup open buttons
+  const openButtons = document.querySelectorAll('.open-button');
+  openButtons.forEach(button => {
+    button.addEventListener('click', function() {
+      const index = parseInt(button.dataset.index);
+      window.location.href = `/contact_card?id=${index}`;
+    });
+  });
+
+  // Setup delete buttons
+  const deleteButtons = document.querySelectorAll('.delete-button');
+  deleteButtons.forEach(button => {
+    button.addEventListener('click', function() {
+      const index = parseInt(button.dataset.index);
+
+      // Confirm deletion
+      if (confirm(`Are you sure you want to delete ${contacts[index].name}?`)) {
+        // Remove from data array
+        contacts.splice(index, 1);
+
+        // Save to localStorage
+        saveContacts();
+
+        // Regenerate table
+        generateTableRows(contacts);
+
+        // Update status
+        updateLastEdited();
+      }
+    });
+  });
+}
+
+// Update last edited timestamp
+function updateLastEdited() {
+  const now = new Date();
+  const formattedTime = now.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+  document.getElementById('last-edited').textContent = formattedTime;
+}
+
+// Load contacts from localStorage on page load
+loadContacts();
+
+// Generate initial table
+generateTableRows(contacts);
+
+// Search functionality
+const searchInput = document.getElementById('search-input');
+searchInput.addEventListener('input', function() {
+  const searchTerm = this.value.toLowerCase();
+  const filteredContacts = contacts.filter(contact =>
+    contact.name.toLowerCase().includes(searchTerm) ||
+    contact.email.toLowerCase().includes(searchTerm) ||
+    contact.phone.includes(searchTerm) ||
+    (contact.firm && contact.firm.toLowerCase().includes(searchTerm)) ||
+    (contact.address && contact.address.toLowerCase().includes(searchTerm))
+  );
+  generateTableRows(filteredContacts);
+});
+
+// Modal functionality
+const modal = document.getElementById('add-contact-modal');
+const addContactBtn = document.getElementById('add-contact-btn');
+const closeModalBtn = document.getElementById('close-modal');
+const cancelBtn = document.getElementById('cancel-btn');
+const addContactForm = document.getElementById('add-contact-form');
+
+// Open modal
+addContactBtn.addEventListener('click', function() {
+  modal.classList.add('active');
+  document.getElementById('contact-name').focus();
+});
+
+// Close modal
+function closeModal() {
+  modal.classList.remove('active');
+  addContactForm.reset();
+}
+
+closeModalBtn.addEventListener('click', closeModal);
+cancelBtn.addEventListener('click', closeModal);
+
+// Close modal when clicking outside
+modal.addEventListener('click', function(e) {
+  if (e.target === modal) {
+    closeModal();
+  }
+});
+
+// Close modal with Escape key
+document.addEventListener('keydown', function(e) {
+  if (e.key === 'Escape' && modal.classList.contains('active')) {
+    closeModal();
+  }
+});
+
+// Handle form submission
+addContactForm.addEventListener('submit', function(e) {
+  e.preventDefault();
+
+  const newContact = {
+    name: document.getElementById('contact-name').value.trim(),
+    email: document.getElementById('contact-email').value.trim(),
+    phone: document.getElementById('contact-phone').value.trim(),
+    firm: document.getElementById('contact-firm').value.trim(),
+    address: document.getElementById('contact-address').value.trim()
+  };
+
+  // Add to contacts array
+  contacts.push(newContact);
+
+  // Save to localStorage
+  saveContacts();
+
+  // Regenerate table
+  generateTableRows(contacts);
+
+  // Close modal
+  closeModal();
+
+  // Update last edited
+  updateLastEdited();
+
+  // Show success message
+  alert('Contact added successfully!');
+});
+
+// Export functionality: streamed from the server so every saved contact is included
+document.getElementById('export-btn').addEventListener('click', function() {
+  window.location.href = '/export/contacts.csv';
+});
+
+// Upload functionality - redirect to upload page
+document.getElementById('upload-btn').addEventListener('click', function() {
+  window.location.href = '/upload';
+});
+
+// Sorting functionality
+let currentSort = { column: null, direction: 'asc' };
+
+document.querySelectorAll('th .column-header span').forEach(header => {
+  header.addEventListener('click', function() {
+    const column = this.textContent.toLowerCase();
+
+    // Toggle sort direction if clicking the same column
+    if (currentSort.column === column) {
+      currentSort.direction = currentSort.direction === 'asc' ? 'desc' : 'asc';
+    } else {
+      currentSort.column = column;
+      currentSort.direction = 'asc';
+    }
+
+    // Sort the contacts
+    const sortedContacts = [...contacts].sort((a, b) => {
+      const valueA = (a[column] || '').toLowerCase();
+      const valueB = (b[column] || '').toLowerCase();
+
+      if (currentSort.direction === 'asc') {
+        return valueA.localeCompare(valueB);
+      } else {
+        return valueB.localeCompare(valueA);
+      }
+    });
+
+    // Update sort indicators
+    document.querySelectorAll('.sort-indicator').forEach(indicator => indicator.remove());
+
+    const indicator = document.createElement('span');
+    indicator.className = 'sort-indicator';
+    indicator.textContent = currentSort.direction === 'asc' ? ' ↑' : ' ↓';
+    this.appendChild(indicator);
+
+    // Regenerate table with sorted contacts
+    generateTableRows(sortedContacts);
+  });
+
+  // Add cursor pointer to make it clear it's clickable
+  header.style.cursor = 'pointer';
+});
+
+// Filter functionality
+let activeFilterDropdown = null;
+let filterValues = {
+  name: [],
+  email: [],
+  phone: [],
+  firm: [],
+  address: []
+};
+
+// Handle filter button clicks
+document.querySelectorAll('.filter-button').forEach(button => {
+  button.addEventListener('click', function(e) {
+    e.stopPropagation();
+    const column = this.dataset.column;
+
+    // Close any open dropdown
+    if (activeFilterDropdown) {
+      activeFilterDropdown.remove();
+      if (activeFilterDropdown.dataset.column === column) {
+        activeFilterDropdown = null;
+        return;
+      }
+    }
+
+    // Create new dropdown
+    const template = document.getElementById('filter-dropdown-template');
+    const dropdown = template.cloneNode(true);
+    dropdown.id = '';
+    dropdown.classList.add('active');
+    dropdown.dataset.column = column;
+
+    // Position the dropdown
+    const rect = this.getBoundingClientRect();
+    dropdown.style.top = `${rect.bottom + window.scrollY}px`;
+    dropdown.style.left = `${rect.left + window.scrollX - 180}px`;
+
+    // Get unique values for this column
+    const uniqueValues = [...new Set(contacts.map(contact => contact[column] || '').filter(val => val))];
+
+    // Populate filter options
+    const optionsContainer = dropdown.querySelector('.filter-options');
+    optionsContainer.innerHTML = ''; // Clear existing options
+
+    uniqueValues.forEach(value => {
+      const option = document.createElement('div');
+      option.className = 'filter-option';
+
+      const checkbox = document.createElement('input');
+      checkbox.type = 'checkbox';
+      checkbox.value = value;
+      checkbox.checked = filterValues[column].includes(value);
+
+      const label = document.createElement('span');
+      label.textContent = value;
+
+      option.appendChild(checkbox);
+      option.appendChild(label);
+
+      // Handle checkbox clicks
+      option.addEventListener('click', function(e) {
+        e.stopPropagation();
+        checkbox.checked = !checkbox.checked;
+      });
+
+      checkbox.addEventListener('click', function(e) {
+        e.stopPropagation();
+      });
+
+      optionsContainer.appendChild(option);
+    });
+
+    // Handle search within filter
+    const searchFilter = dropdown.querySelector('.filter-search');
+    searchFilter.addEventListener('input', function() {
+      const searchTerm = this.value.toLowerCase();
+      dropdown.querySelectorAll('.filter-option').forEach(option => {
+        const text = option.textContent.toLowerCase();
+        option.style.display = text.includes(searchTerm) ? '' : 'none';
+      });
+    });
+
+    // Handle clear button
+    dropdown.querySelector('.filter-clear').addEventListener('click', function(e) {
+      e.stopPropagation();
+      dropdown.querySelectorAll('.filter-option input').forEach(checkbox => {
+        checkbox.checked = false;
+      });
+    });
+
+    // Handle apply button
+    dropdown.querySelector('.filter-apply').addEventListener('click', function(e) {
+      e.stopPropagation();
+
+      // Get selected values
+      const selectedValues = [];
+      dropdown.querySelectorAll('.filter-option input:checked').forEach(checkbox => {
+        selectedValues.push(checkbox.value);
+      });
+
+      // Update filter values
+      filterValues[column] = selectedValues;
+
+      // Apply filters
+      applyFilters();
+
+      // Close dropdown
+      dropdown.remove();
+      activeFilterDropdown = null;
+    });
+
+    document.body.appendChild(dropdown);
+    activeFilterDropdown = dropdown;
+  });
+});
+
+// Close dropdown when clicking outside
+document.addEventListener('click', function(e) {
+  if (activeFilterDropdown && !activeFilterDropdown.contains(e.target)) {
+    activeFilterDropdown.remove();
+    activeFilterDropdown = null;
+  }
+});
+
+// Apply all filters
+function applyFilters() {
+  let filteredContacts = [...contacts];
+
+  // Apply each filter
+  Object.keys(filterValues).forEach(column => {
+    if (filterValues[column].length > 0) {
+      filteredContacts = filteredContacts.filter(contact =>
+        filterValues[column].includes(contact[column] || '')
+      );
+    }
+  });
+
+  // Update table
+  generateTableRows(filteredContacts);
+}
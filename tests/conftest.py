@@ -0,0 +1,27 @@
+import pytest
+
+import app as bluefin
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setitem(bluefin.app.config, 'DATABASE', str(tmp_path / 'bluefin.db'))
+    # Caches are per process and keyed by user id and data version, which start over
+    # with every new database
+    monkeypatch.setattr(bluefin, 'cache_backend', None)
+    monkeypatch.setattr(bluefin, 'user_cache', None)
+    monkeypatch.setattr(bluefin, 'fragment_cache', None)
+    bluefin.upgrade_db()
+    conn = bluefin.connect_db()
+    conn.execute("INSERT INTO users (id, email, password, name) VALUES (1, 'demo@bluefin.com', 'demo123', 'Demo User')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def client(db):
+    client = bluefin.app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+    return client
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+import app as bluefin
+
+STAGES = ('prospecting', 'proposal', 'closed-won')
+
+
+@pytest.fixture
+def opportunities(db):
+    rng = random.Random(8)
+    rows = []
+    for index in range(300):
+        close_date = None if index % 25 == 0 else f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+        rows.append((f'Deal {index}', rng.choice(STAGES), close_date, rng.choice([None, 1000.0, 2500.5])))
+    db.executemany('''INSERT INTO opportunities (user_id, title, contact, stage, close_date, amount)
+                      VALUES (1, ?, 'Someone', ?, ?, ?)''', rows)
+    db.commit()
+
+
+def expected_totals(db, start_date, end_date):
+    query = 'SELECT stage, COUNT(*), COALESCE(SUM(amount), 0) FROM opportunities WHERE user_id = 1'
+    params = []
+    if start_date:
+        query += ' AND close_date >= ?'
+        params.append(start_date)
+    if end_date:
+        query += ' AND close_date <= ?'
+        params.append(end_date)
+    return {stage: (count, amount) for stage, count, amount in db.execute(query + ' GROUP BY stage', params)}
+
+
+@pytest.mark.parametrize('start_date, end_date', [
+    (None, None),
+    ('2024-03-01', '2024-05-31'),  # whole months
+    ('2024-03-15', '2024-05-10'),  # partial months at both ends
+    ('2024-03-15', '2024-03-20'),  # within a single month
+    ('2024-02-29', '2024-03-01'),  # across a month boundary
+    ('2024-06-02', None),
+    (None, '2024-06-29'),
+    ('2024-13-01', None),  # not a date, compared as a string
+])
+def test_stage_totals_match_the_opportunities_table(db, opportunities, start_date, end_date):
+    totals = bluefin.opportunity_stage_totals(db, 1, start_date, end_date)
+    assert {stage: value for stage, value in totals.items() if value[0]} == expected_totals(db, start_date, end_date)
+
+
+def test_summaries_follow_updates_and_deletes(db, opportunities):
+    db.execute("UPDATE opportunities SET stage = 'closed-won', close_date = '2024-07-04', amount = 10 WHERE id % 3 = 0")
+    db.execute('DELETE FROM opportunities WHERE id % 5 = 0')
+    db.commit()
+    assert bluefin.opportunity_stage_totals(db, 1, '2024-01-10', '2024-11-20') == \
+        expected_totals(db, '2024-01-10', '2024-11-20')
+    before = db.execute('SELECT * FROM opportunity_stats ORDER BY 1, 2, 3').fetchall()
+    bluefin.rebuild_analytics_summaries(db)
+    assert [tuple(row) for row in db.execute('SELECT * FROM opportunity_stats ORDER BY 1, 2, 3')] == \
+        [tuple(row) for row in before]
+
+
+def test_contacts_by_firm(db):
+    db.executemany('INSERT INTO contacts (user_id, name, firm) VALUES (1, ?, ?)',
+                   [('Ann', 'Baird'), ('Ben', 'Baird'), ('Cal', None), ('Dee', 'Stifel')])
+    db.execute("UPDATE contacts SET firm = 'Stifel' WHERE name = 'Ben'")
+    db.commit()
+    analytics = bluefin.build_analytics(db, 1, None, None)
+    assert analytics['contacts_by_firm'] == [{'firm': 'Baird', 'count': 1}, {'firm': 'Stifel', 'count': 2}]
+    assert analytics['total_contacts'] == 4
@@ -0,0 +1,53 @@
+import pytest
+
+
+def batch(client, *operations):
+    response = client.post('/api/opportunities/batch', json={'operations': list(operations)})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.fixture
+def opportunity_id(client):
+    result = batch(client, {'op': 'create', 'data': {'title': 'Deal', 'contact': 'Someone', 'stage': 'prospecting'}})
+    return result['results'][0]['id']
+
+
+def test_batch_applies_valid_operations(client, opportunity_id):
+    result = batch(client,
+                   {'op': 'stage', 'id': opportunity_id, 'stage': 'proposal'},
+                   {'op': 'update', 'id': opportunity_id, 'data': {'amount': 5000}},
+                   {'op': 'create', 'data': {'title': 'Other', 'contact': 'Someone'}})
+    assert [item['status'] for item in result['results']] == [200, 200, 201]
+    assert result['results'][1]['opportunity']['stage'] == 'proposal'
+    assert result['results'][1]['opportunity']['amount'] == 5000
+
+
+@pytest.mark.parametrize('operation, status', [
+    ({'op': 'update', 'data': ['not', 'an', 'object']}, 400),
+    ({'op': 'create', 'data': 'Deal'}, 400),
+    ({'op': 'create', 'data': {'title': 'No contact'}}, 400),
+    ({'op': 'stage', 'stage': ['proposal']}, 400),
+    ({'op': 'stage'}, 400),
+    ({'op': 'rename'}, 400),
+    ({'op': 'delete', 'id': 999}, 404),
+    ({'op': 'delete', 'id': [1]}, 404),
+])
+def test_invalid_operations_are_skipped(client, opportunity_id, operation, status):
+    operation.setdefault('id', opportunity_id)
+    result = batch(client, operation, {'op': 'stage', 'id': opportunity_id, 'stage': 'negotiation'})
+    assert [item['status'] for item in result['results']] == [status, 200]
+    assert (result['applied'], result['failed']) == (1, 1)
+    opportunities = client.get('/api/opportunities').get_json()
+    assert [(item['id'], item['stage']) for item in opportunities] == [(opportunity_id, 'negotiation')]
+
+
+def test_operations_on_a_deleted_opportunity_fail(client, opportunity_id):
+    result = batch(client, {'op': 'delete', 'id': opportunity_id},
+                   {'op': 'stage', 'id': opportunity_id, 'stage': 'proposal'})
+    assert [item['status'] for item in result['results']] == [200, 404]
+
+
+@pytest.mark.parametrize('body', [{}, {'operations': []}, {'operations': {'op': 'delete'}}])
+def test_batch_needs_a_list_of_operations(client, body):
+    assert client.post('/api/opportunities/batch', json=body).status_code == 400
@@ -0,0 +1,56 @@
+import pytest
+
+import app as bluefin
+
+
+@pytest.fixture
+def contacts(db):
+    # Duplicate names, so pages have to break ties on id
+    names = ['Alice Smith', 'Bob Jones', 'Alice Smith', 'Carol White', 'Bob Jones', 'Dan Brown', 'Alice Smith']
+    db.executemany('INSERT INTO contacts (user_id, name, firm) VALUES (1, ?, ?)',
+                   [(name, 'Baird' if index % 2 else 'Stifel') for index, name in enumerate(names)])
+    db.execute("INSERT INTO users (id, email, password, name) VALUES (2, 'other@example.com', 'secret', 'Other')")
+    db.execute("INSERT INTO contacts (user_id, name) VALUES (2, 'Other User')")
+    db.commit()
+    return [(row['name'], row['id']) for row in
+            db.execute('SELECT name, id FROM contacts WHERE user_id = 1 ORDER BY name, id')]
+
+
+def all_pages(db, filters, limit):
+    seen, cursor = [], None
+    while True:
+        page, cursor = bluefin.fetch_contacts_page(db, 1, filters, cursor=cursor, limit=limit)
+        assert len(page) <= limit
+        seen += [(contact['name'], contact['id']) for contact in page]
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 7, 50])
+def test_pages_cover_every_contact_once_in_order(db, contacts, limit):
+    assert all_pages(db, {}, limit) == contacts
+
+
+def test_pages_apply_filters(db, contacts):
+    expected = [(row['name'], row['id']) for row in
+                db.execute("SELECT name, id FROM contacts WHERE user_id = 1 AND firm = 'Baird' ORDER BY name, id")]
+    assert all_pages(db, {'firm': 'Baird'}, 2) == expected
+
+
+def test_last_full_page_has_no_next_cursor(db, contacts):
+    page, cursor = bluefin.fetch_contacts_page(db, 1, {}, limit=len(contacts))
+    assert len(page) == len(contacts)
+    assert cursor is None
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    bluefin.encode_cursor(['Smith']),
+    bluefin.encode_cursor({'name': 'Smith', 'id': 1}),
+    bluefin.encode_cursor([['Smith'], 1]),
+    bluefin.encode_cursor([{'name': 'Smith'}, 1]),
+])
+def test_malformed_cursor_is_rejected(client, contacts, cursor):
+    response = client.get('/api/contacts', query_string={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import app as bluefin
+
+
+@pytest.fixture
+def start_import(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(bluefin, 'IMPORT_CHUNK_SIZE', 2)
+
+    def start_import(text):
+        path = tmp_path / 'contacts.csv'
+        path.write_text(text, encoding='utf-8')
+        job_id = db.execute('''
+            INSERT INTO import_jobs (user_id, filename, status, total_bytes, created_at)
+            VALUES (1, 'contacts.csv', 'running', ?, '2025-01-01T00:00:00')
+        ''', (path.stat().st_size,)).lastrowid
+        db.commit()
+        bluefin.run_contact_import(job_id, 1, str(path))
+        return db.execute('SELECT * FROM import_jobs WHERE id = ?', (job_id,)).fetchone()
+
+    return start_import
+
+
+def contact_names(db):
+    return [row['name'] for row in db.execute('SELECT name FROM contacts WHERE user_id = 1 ORDER BY id')]
+
+
+def test_import_commits_every_chunk(db, start_import):
+    job = start_import('Name,Email,Firm\nAnn,ann@example.com,Baird\nBen,,Stifel\n\nCal,cal@example.com,\n'
+                       'Dee,not-an-email,Baird\n,missing@example.com,\nEve,eve@example.com,Baird\n')
+    assert job['status'] == 'completed'
+    assert (job['processed_rows'], job['imported_rows'], job['error_count']) == (6, 4, 2)
+    assert job['processed_bytes'] == job['total_bytes']
+    assert json.loads(job['errors']) == [{'row': 6, 'error': 'Email address is not valid'},
+                                         {'row': 7, 'error': 'Name is required'}]
+    assert contact_names(db) == ['Ann', 'Ben', 'Cal', 'Eve']
+    assert bluefin.get_data_version(db, 1) > 0
+
+
+def test_failed_import_keeps_committed_chunks(db, start_import, monkeypatch):
+    validate = bluefin.validate_import_row
+
+    def fail_on_dee(row):
+        if row['name'] == 'Dee':
+            raise RuntimeError('disk on fire')
+        return validate(row)
+
+    monkeypatch.setattr(bluefin, 'validate_import_row', fail_on_dee)
+    job = start_import('Name\nAnn\nBen\nCal\nDee\nEve\n')
+    assert job['status'] == 'failed'
+    assert json.loads(job['errors'])[0] == {'row': None, 'error': 'disk on fire'}
+    # Ann and Ben were committed as a chunk, Cal was still pending
+    assert contact_names(db) == ['Ann', 'Ben']
+    assert job['imported_rows'] == 2
+
+
+def test_import_needs_a_name_column(db, start_import):
+    job = start_import('Email\nann@example.com\n')
+    assert job['status'] == 'failed'
+    assert 'Name' in json.loads(job['errors'])[0]['error']
+    assert contact_names(db) == []
+
+
+def test_import_job_reports_progress(client, db, start_import):
+    job = start_import('Name\nAnn\n')
+    response = client.get(f"/api/contacts/import/{job['id']}")
+    assert response.status_code == 200
+    assert response.get_json()['percent'] == 100
+    assert client.get('/api/contacts/import/999').status_code == 404
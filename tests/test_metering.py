@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+import app as bluefin
+
+COUNT_TO_20 = 'WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 20) SELECT slow(i) FROM n'
+
+
+@pytest.fixture
+def metered(db, monkeypatch):
+    observed = []
+    monkeypatch.setitem(bluefin.app.config, 'SLOW_QUERY_THRESHOLD_MS', 1000)
+    monkeypatch.setattr(bluefin, 'observe_query',
+                        lambda db, sql, parameters, endpoint, elapsed: observed.append((sql, elapsed)))
+    conn = bluefin.connect_db(bluefin.MeteredConnection)
+    conn.start_metering()
+    # Rows are produced as they are read, each taking a millisecond
+    conn.create_function('slow', 1, lambda value: time.sleep(0.001) or value)
+    yield conn, observed
+    conn.close()
+
+
+@pytest.mark.parametrize('read', [
+    lambda cursor: cursor.fetchall(),
+    lambda cursor: list(cursor),
+    lambda cursor: [cursor.fetchone() for _ in range(21)],
+    lambda cursor: [cursor.fetchmany(3) for _ in range(7)],
+])
+def test_statement_is_timed_through_its_last_row(metered, read):
+    conn, observed = metered
+    read(conn.execute(COUNT_TO_20))
+    assert conn.query_count == 1
+    assert conn.query_time >= 0.02
+    assert [(sql, elapsed >= 0.02) for sql, elapsed in observed] == [(COUNT_TO_20, True)]
+
+
+def test_unfinished_statement_is_reported_when_the_connection_closes(metered):
+    conn, observed = metered
+    assert conn.execute(COUNT_TO_20).fetchone()[0] == 1
+    assert observed == []
+    conn.close()
+    assert [sql for sql, _ in observed] == [COUNT_TO_20]
+
+
+def test_statements_without_rows_are_reported_right_away(metered):
+    conn, observed = metered
+    conn.execute('CREATE TABLE t (x)')
+    conn.executemany('INSERT INTO t VALUES (?)', [(1,), (2,)])
+    assert [sql for sql, _ in observed] == ['CREATE TABLE t (x)', 'INSERT INTO t VALUES (?)']
+    assert conn.query_count == 2
+
+
+def test_slow_queries_are_logged_past_the_shape_limit(db, monkeypatch, capsys):
+    monkeypatch.setitem(bluefin.app.config, 'SLOW_QUERY_THRESHOLD_MS', 5)
+    monkeypatch.setattr(bluefin, 'query_shapes', {'SELECT ?': {}})
+    monkeypatch.setattr(bluefin, 'SLOW_QUERY_MAX_SHAPES', 1)
+    bluefin.observe_query(db, 'SELECT name FROM users', [], 'contacts', 0.01)
+    bluefin.observe_query(db, 'SELECT email FROM users', [], 'contacts', 0.001)
+    assert 'Slow query (10.0ms) in contacts with parameters []: SELECT name FROM users' in capsys.readouterr().out
+    assert list(bluefin.query_shapes) == ['SELECT ?']
@@ -0,0 +1,46 @@
+import re
+
+import pytest
+
+import app as bluefin
+
+
+def query_plans(db, run):
+    """Run run(db) and return the EXPLAIN QUERY PLAN details of every statement it executed"""
+    statements = []
+    db.set_trace_callback(statements.append)
+    try:
+        run(db)
+    finally:
+        db.set_trace_callback(None)
+    return {sql: [row['detail'] for row in db.execute('EXPLAIN QUERY PLAN ' + sql)] for sql in statements}
+
+
+def assert_uses_indexes(plans):
+    assert plans
+    for sql, details in plans.items():
+        scans = [detail for detail in details if re.match(bluefin.PLAN_SCAN, detail)]
+        assert not scans, f'{sql} scans a table: {details}'
+        assert any(re.search(r'^SEARCH .* USING (COVERING )?INDEX idx_', detail) for detail in details), \
+            f'{sql} uses no index: {details}'
+
+
+def test_calendar_range_uses_indexes(db):
+    plans = query_plans(db, lambda db: bluefin.calendar_days(db, 1, '2025-01-01', '2025-02-01'))
+    assert_uses_indexes(plans)
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'firm': 'Ameriprise'},
+    {'start_date': '2025-01-01', 'end_date': '2025-01-31'},
+])
+def test_contacts_list_uses_indexes(db, filters):
+    plans = query_plans(db, lambda db: bluefin.fetch_contacts_page(db, 1, filters, limit=50))
+    assert_uses_indexes(plans)
+
+
+def test_contacts_list_next_page_uses_indexes(db):
+    cursor = bluefin.encode_cursor(['Smith', 10])
+    plans = query_plans(db, lambda db: bluefin.fetch_contacts_page(db, 1, {}, cursor=cursor, limit=50))
+    assert_uses_indexes(plans)
@@ -0,0 +1,99 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as bluefin
+
+
+class RecordingSink:
+    def __init__(self):
+        self.delivered = []
+        self.event = threading.Event()
+
+    def deliver(self, db, reminder):
+        self.delivered.append((reminder['id'], reminder['reminder']))
+        self.event.set()
+
+
+def add_opportunity(db, reminder):
+    opportunity_id = db.execute('''INSERT INTO opportunities (user_id, title, contact, stage, reminder)
+                                   VALUES (1, 'Deal', 'Someone', 'proposal', ?)''', (reminder,)).lastrowid
+    db.commit()
+    return opportunity_id
+
+
+def at(delta):
+    return (datetime.now() + delta).isoformat()
+
+
+@pytest.fixture
+def scheduler(db):
+    return bluefin.ReminderScheduler(RecordingSink())
+
+
+def test_window_load_queues_due_and_catch_up_reminders_in_order(db, scheduler):
+    later = add_opportunity(db, at(timedelta(minutes=2)))
+    missed = add_opportunity(db, at(-timedelta(hours=2)))
+    add_opportunity(db, at(-bluefin.REMINDER_CATCHUP - timedelta(hours=1)))  # too old
+    add_opportunity(db, at(bluefin.REMINDER_WINDOW + timedelta(minutes=1)))  # next window
+    add_opportunity(db, None)
+    scheduler._load_window(db)
+    assert [entry[1] for entry in sorted(scheduler._heap)] == [missed, later]
+
+
+def test_reminder_is_delivered_once(db, scheduler):
+    reminder = at(-timedelta(minutes=1))
+    opportunity_id = add_opportunity(db, reminder)
+    scheduler._deliver(db, opportunity_id, reminder)
+    scheduler._deliver(db, opportunity_id, reminder)
+    assert scheduler.sink.delivered == [(opportunity_id, reminder)]
+    scheduler._load_window(db)
+    assert scheduler._heap == []
+
+
+def test_changed_reminder_is_dropped(db, scheduler):
+    old = at(-timedelta(minutes=1))
+    opportunity_id = add_opportunity(db, old)
+    db.execute('UPDATE opportunities SET reminder = ? WHERE id = ?', (at(timedelta(hours=1)), opportunity_id))
+    db.commit()
+    scheduler._deliver(db, opportunity_id, old)
+    assert scheduler.sink.delivered == []
+
+
+def test_failed_delivery_is_retried(db, scheduler):
+    reminder = at(-timedelta(minutes=1))
+    opportunity_id = add_opportunity(db, reminder)
+    scheduler.sink.deliver = lambda db, reminder: 1 / 0
+    scheduler._deliver(db, opportunity_id, reminder)
+    assert db.execute('SELECT COUNT(*) FROM reminder_deliveries').fetchone()[0] == 0
+    scheduler._load_window(db)
+    assert [entry[1] for entry in scheduler._heap] == [opportunity_id]
+
+
+def test_queue_sink_writes_in_the_claim_transaction(db):
+    reminder = at(-timedelta(minutes=1))
+    opportunity_id = add_opportunity(db, reminder)
+    bluefin.ReminderScheduler(bluefin.QueueReminderSink())._deliver(db, opportunity_id, reminder)
+    row = db.execute('SELECT opportunity_id, email, reminder FROM reminder_queue').fetchone()
+    assert tuple(row) == (opportunity_id, 'demo@bluefin.com', reminder)
+
+
+def test_running_scheduler_delivers_notified_reminder(db, scheduler):
+    scheduler.start()
+    try:
+        # Wait for the first window load, so the notification lands inside the window
+        for _ in range(100):
+            with scheduler._condition:
+                if scheduler._window_end is not None:
+                    break
+            time.sleep(0.01)
+        reminder = at(timedelta(milliseconds=200))
+        opportunity_id = add_opportunity(db, reminder)
+        scheduler.notify(opportunity_id, reminder)
+        assert scheduler.sink.event.wait(5)
+        assert scheduler.sink.delivered == [(opportunity_id, reminder)]
+    finally:
+        scheduler.stop()
+        scheduler.join()
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+
+import app as bluefin
+
+
+def create_opportunity(client, title='Deal'):
+    response = client.post('/api/opportunities', json={'title': title, 'contact': 'Someone', 'stage': 'proposal'})
+    assert response.status_code in (200, 201), response.get_json()
+    return response.get_json()
+
+
+def floor_bounds(request):
+    """The range the cursor floor can fall in for a request made by request()"""
+    before = (datetime.now() - bluefin.SYNC_CURSOR_MARGIN).isoformat()
+    response = request()
+    after = (datetime.now() - bluefin.SYNC_CURSOR_MARGIN).isoformat()
+    return response, before, after
+
+
+def test_cursor_never_passes_the_floor_after_a_create(client):
+    create_opportunity(client)
+    response, before, after = floor_bounds(lambda: client.get('/api/opportunities'))
+    assert before <= response.headers['X-Sync-Cursor'] <= after
+
+    create_opportunity(client)
+    response, before, after = floor_bounds(lambda: client.get('/api/opportunities', query_string={'since': before}))
+    assert before <= response.get_json()['cursor'] <= after
+
+
+def test_future_since_does_not_freeze_the_cursor(client):
+    response, before, after = floor_bounds(
+        lambda: client.get('/api/opportunities', query_string={'since': '2999-01-01T00:00:00'}))
+    assert before <= response.get_json()['cursor'] <= after
+
+
+def test_changes_include_updates_and_deletes(client):
+    cursor = client.get('/api/opportunities').headers['X-Sync-Cursor']
+    kept = create_opportunity(client, 'Kept')
+    deleted = create_opportunity(client, 'Deleted')
+    assert client.delete(f"/api/opportunities/{deleted['id']}").status_code == 200
+
+    changes = client.get('/api/opportunities', query_string={'since': cursor}).get_json()
+    assert [opportunity['id'] for opportunity in changes['opportunities']] == [kept['id']]
+    assert changes['deleted'] == [deleted['id']]
+
+
+def test_deleting_a_contact_syncs_its_opportunities(client, db):
+    contact_id = db.execute("INSERT INTO contacts (user_id, name) VALUES (1, 'Someone')").lastrowid
+    opportunity_id = db.execute('''INSERT INTO opportunities (user_id, title, contact, contact_id, stage, updated_at)
+                                   VALUES (1, 'Deal', 'Someone', ?, 'proposal', '2020-01-01T00:00:00')''',
+                                (contact_id,)).lastrowid
+    db.commit()
+    cursor = client.get('/api/opportunities').headers['X-Sync-Cursor']
+
+    db.execute('DELETE FROM contacts WHERE id = ?', (contact_id,))
+    db.commit()
+    changes = client.get('/api/opportunities', query_string={'since': cursor}).get_json()
+    assert [(row['id'], row['contact_id']) for row in changes['opportunities']] == [(opportunity_id, None)]
+
+
+@pytest.mark.parametrize('since', ['yesterday', '2025-13-01', "2025-01-01' OR 1=1 --"])
+def test_invalid_since_is_rejected(client, since):
+    response = client.get('/api/opportunities', query_string={'since': since})
+    assert response.status_code == 400
+
+
+def test_since_with_an_offset_is_converted_to_local_time():
+    since = datetime(2025, 1, 1, 12, 0).astimezone()
+    assert bluefin.parse_sync_cursor(since.isoformat()) == since.replace(tzinfo=None).isoformat()